@@ -0,0 +1,250 @@
+"""
+Pre-serialized day payloads for the calendar API.
+
+``day_payload`` builds the same structure as ``DaySerializer`` from plain dicts and lists, without DRF's field
+machinery. The payloads of a whole church year are encoded to JSON once, when the year is first requested, and
+cached next to the year's snapshot (under the same calendar generation), so the calendar endpoints only join
+pre-encoded days.
+"""
+import json
+import zlib
+from datetime import timedelta
+
+from churchcal import single_flight
+from churchcal.local_cache import local_cache
+from churchcal.snapshot import (
+    CACHE_TIMEOUT,
+    DEFAULT_CALENDAR,
+    SNAPSHOT_VERSION,
+    SOFT_TIMEOUT,
+    get_church_year_snapshot,
+)
+from churchcal.utils import advent_year, week_days
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MONTHS = (
+    "January",
+    "February",
+    "March",
+    "April",
+    "May",
+    "June",
+    "July",
+    "August",
+    "September",
+    "October",
+    "November",
+    "December",
+)
+
+
+def encode(payload):
+    if orjson:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _str(value):
+    return None if value is None else str(value)
+
+
+def _colors(*colors):
+    return [color.lower() for color in colors if color]
+
+
+def commemoration_payload(commemoration):
+    rank = commemoration.rank
+    return {
+        "name": _str(commemoration.name),
+        "rank": None
+        if rank is None
+        else {
+            "name": _str(rank.name),
+            "formatted_name": _str(rank.formatted_name),
+            "precedence": None if rank.precedence_rank is None else int(rank.precedence_rank),
+        },
+        "colors": _colors(
+            commemoration.color,
+            commemoration.additional_color,
+            commemoration.alternate_color,
+            commemoration.alternate_color_2,
+        ),
+        "links": [link for link in (commemoration.link_1, commemoration.link_2, commemoration.link_3) if link],
+        "biography": _str(commemoration.biography),
+        "image_link": _str(commemoration.image_link),
+    }
+
+
+def _primary_color(day):
+    try:
+        if day.all:
+            return day.all[0].color.lower()
+    except (KeyError, AttributeError):
+        return None
+
+
+def _primary_evening_color(day):
+    try:
+        if day.all_evening:
+            return day.all_evening[0].color.lower()
+    except (KeyError, AttributeError):
+        return _primary_color(day)
+
+
+def _primary_feast(day):
+    try:
+        if day.all:
+            return day.all[0].name
+    except (KeyError, AttributeError):
+        return None
+
+
+def _primary_evening_feast(day):
+    try:
+        if day.all:
+            return day.all_evening[0].name
+    except (KeyError, AttributeError):
+        return None
+
+
+def _major_feast(day):
+    try:
+        if day.required:
+            return day.required[0].name
+    except (KeyError, AttributeError):
+        return None
+    return None
+
+
+def _major_or_minor_feast(day):
+    try:
+        for feast in day.all:
+            if "FERIA" not in feast.rank.name:
+                return feast.name
+    except (KeyError, AttributeError):
+        return None
+    return None
+
+
+def day_payload(day):
+    # the output of ``DaySerializer(day).data``, field for field
+    date = day.date
+    season = day.season
+    return {
+        "date": date.isoformat(),
+        "date_description": {
+            "date": "{}-{}-{}".format(date.year, date.month, date.day),
+            "weekday": week_days[date.weekday()],
+            "month": str(date.month),
+            "month_name": MONTHS[date.month - 1],
+            "day": str(date.day),
+            "year": "{:04d}".format(date.year),
+        },
+        "season": None
+        if season is None
+        else {"name": _str(season.name), "colors": _colors(season.color, season.alternate_color)},
+        "fast": {
+            "fast_day": day.fast_day,
+            "fast_day_description": day.FAST_DAYS_RANKS[day.fast_day],
+            "fast_day_reason": day.fast_day_reasons,
+        },
+        "commemorations": [commemoration_payload(commemoration) for commemoration in day.all],
+        "evening_commemorations": [commemoration_payload(commemoration) for commemoration in day.all_evening],
+        "mass_readings": [
+            {"citation": reading.long_citation, "text": reading.long_text} for reading in day.mass_readings
+        ],
+        "primary_color": _primary_color(day),
+        "primary_evening_color": _primary_evening_color(day),
+        "primary_feast": _primary_feast(day),
+        "primary_evening_feast": _primary_evening_feast(day),
+        "major_feast": _major_feast(day),
+        "major_or_minor_feast": _major_or_minor_feast(day),
+    }
+
+
+def join(days):
+    return b"[" + b",".join(days) + b"]"
+
+
+class YearPayload(object):
+    """The encoded payload of every day of a church year."""
+
+    def __init__(self, start_date, days):
+        self.start_date = start_date
+        self.days = tuple(days)
+        self.end_date = start_date + timedelta(days=len(self.days) - 1)
+        self.nbytes = sum(len(day) for day in self.days)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        return cls(snapshot.start_date, [encode(day_payload(day)) for day in snapshot])
+
+    # cached compressed; the day payloads repeat the same names, colors and readings many times over
+
+    def __getstate__(self):
+        return SNAPSHOT_VERSION, self.start_date, zlib.compress(b"\n".join(self.days))
+
+    def __setstate__(self, state):
+        version, start_date, data = state
+        if version != SNAPSHOT_VERSION:
+            raise ValueError("Unsupported year payload version {}".format(version))
+        self.__init__(start_date, zlib.decompress(data).split(b"\n"))
+
+    def day(self, date):
+        return self.days[(date - self.start_date).days]
+
+    def slice(self, start_date, end_date):
+        start_date = max(start_date, self.start_date)
+        end_date = min(end_date, self.end_date)
+        if start_date > end_date:
+            return ()
+        return self.days[(start_date - self.start_date).days : (end_date - self.start_date).days + 1]
+
+    def json(self):
+        return join(self.days)
+
+
+def payload_cache_key(year, calendar=DEFAULT_CALENDAR):
+    return "church_year_payload:{}:{}:{}:{}".format(SNAPSHOT_VERSION, calendar, local_cache.generation(calendar), year)
+
+
+def stale_payload_cache_key(year, calendar=DEFAULT_CALENDAR):
+    return "church_year_payload:{}:{}:latest:{}".format(SNAPSHOT_VERSION, calendar, year)
+
+
+def get_year_payload(year, calendar=DEFAULT_CALENDAR):
+    year = int(year)
+    key = payload_cache_key(year, calendar)
+    payload = local_cache.get(key)
+    if payload is None:
+        payload, stale = single_flight.get_or_build(
+            key,
+            lambda: YearPayload.from_snapshot(get_church_year_snapshot(year, calendar)),
+            SOFT_TIMEOUT,
+            CACHE_TIMEOUT,
+            stale_payload_cache_key(year, calendar),
+        )
+        if not stale:
+            local_cache.set(key, payload, payload.nbytes, generations=(calendar,))
+    return payload
+
+
+def iter_payload_days(start_date, end_date, calendar=DEFAULT_CALENDAR):
+    # the encoded days from start_date to end_date (inclusive), one church year at a time
+    for year in range(advent_year(start_date), advent_year(end_date) + 1):
+        days = get_year_payload(year, calendar).slice(start_date, end_date)
+        if days:
+            yield days
+
+
+def stream_days(start_date, end_date, calendar=DEFAULT_CALENDAR):
+    yield b"["
+    separator = b""
+    for days in iter_payload_days(start_date, end_date, calendar):
+        yield separator + b",".join(days)
+        separator = b","
+    yield b"]"
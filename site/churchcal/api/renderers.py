@@ -0,0 +1,33 @@
+"""
+Renderers for responses whose JSON has already been encoded (and usually cached).
+
+Views return ``Response(EncodedJSON(content))``, so content negotiation, ``?format=`` and the browsable API keep
+working: ``EncodedJSONRenderer`` writes the bytes out as they are, and re-indents them only for the browsable API.
+JSON that is written out as it is can also be streamed (see ``streams_encoded_json``).
+"""
+import json
+
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+
+class EncodedJSON(bytes):
+    """JSON that has already been encoded."""
+
+
+class EncodedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, EncodedJSON):
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            data = json.loads(data)
+            return super().render(data, accepted_media_type, renderer_context)
+        return bytes(data)
+
+
+def streams_encoded_json(request):
+    # whether the negotiated renderer would write encoded JSON out unchanged, so it can be streamed instead
+    renderer = request.accepted_renderer
+    return isinstance(renderer, EncodedJSONRenderer) and not renderer.get_indent(request.accepted_media_type, {})
+
+
+ENCODED_RENDERER_CLASSES = [EncodedJSONRenderer, BrowsableAPIRenderer]
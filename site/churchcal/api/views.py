@@ -1,59 +1,182 @@
-from django.core.cache import cache
+import re
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from churchcal import single_flight
+
+from churchcal.api.payloads import day_payload, encode, stream_days
 from churchcal.api.permissions import ReadOnly
-from churchcal.api.serializer import DaySerializer
-from churchcal.calculations import get_calendar_date, ChurchYear, CalendarYear
+from churchcal.api.renderers import ENCODED_RENDERER_CLASSES, EncodedJSON, streams_encoded_json
+from churchcal.calculations import get_calendar_date
+from churchcal.catalog import is_calendar
+from churchcal.facts import COLUMNS, LABELED_COLUMNS, CalendarFacts
+from churchcal.local_cache import local_cache
+from churchcal.snapshot import DEFAULT_CALENDAR
+from churchcal.utils import advent
+from churchcal.year_range import ChurchYearRange
+
+MAX_RANGE_DAYS = getattr(settings, "CHURCHCAL_MAX_RANGE_DAYS", 400)
+# each cold church year is built by the request that asks for it
+MAX_FACTS_YEARS = getattr(settings, "CHURCHCAL_MAX_FACTS_YEARS", 10)
+
+# the church years that can be built, since the years either side of them begin or end outside ``datetime.date``
+FIRST_YEAR = 1
+LAST_YEAR = 9998
+
+ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
 
 
-def get_calendar_year(year):
+def get_calendar_year(year, calendar=DEFAULT_CALENDAR):
     year = int(year)
-    first_year = year - 1
-    second_year = year
-    first_church_year = cache.get(str(first_year))
-    if not first_church_year:
-        first_church_year = ChurchYear(first_year)
-        cache.set(str(first_year), first_church_year, 60 * 60 * 12)
-    second_church_year = cache.get(str(second_year))
-    if not second_church_year:
-        second_church_year = ChurchYear(second_year)
-    cache.set(str(second_year), second_church_year, 60 * 60 * 12)
-    return CalendarYear(year, first_church_year, second_church_year)
+    return ChurchYearRange.from_cache(year - 1, year, calendar).calendar_year(year)
+
+
+def requested_calendar(request):
+    # the calendar abbreviation from ``?calendar=``, or None if there is no such calendar
+    calendar = request.query_params.get("calendar") or DEFAULT_CALENDAR
+    return calendar if is_calendar(calendar) else None
+
+
+def iso_date(value):
+    # the date of a ``YYYY-MM-DD`` string, or None
+    if not ISO_DATE.match(value):
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def in_church_years(*days):
+    return all(advent(FIRST_YEAR) <= day < advent(LAST_YEAR + 1) for day in days)
+
+
+def json_response(content):
+    # already encoded JSON, which the views' renderers write out as it is (see ``churchcal.api.renderers``)
+    return Response(EncodedJSON(content))
+
+
+def range_response(request, start_date, end_date, calendar=DEFAULT_CALENDAR):
+    # the days are sent as they are read from each church year's cached payload; only the browsable API and indented
+    # JSON need the whole body first
+    days = stream_days(start_date, end_date, calendar)
+    if streams_encoded_json(request):
+        return StreamingHttpResponse(days, content_type="application/json")
+    return json_response(b"".join(days))
 
 
 class DayView(APIView):
     permission_classes = [ReadOnly]
+    renderer_classes = ENCODED_RENDERER_CLASSES
 
     def get(self, request, year, month, day):
+        calendar = requested_calendar(request)
+        if not calendar:
+            return Response(status=404)
         try:
             date = timezone.now().replace(year=year, month=month, day=day)
         except ValueError:
             return Response(status=404)
-        calendar_date = get_calendar_date(date)
-        serializer = DaySerializer(calendar_date)
-        return Response(serializer.data)
+        if not in_church_years(date.date()):
+            return Response(status=404)
+        calendar_date = get_calendar_date(date, calendar)
+        return json_response(encode(day_payload(calendar_date)))
+
+
+class RangeView(APIView):
+    permission_classes = [ReadOnly]
+    renderer_classes = ENCODED_RENDERER_CLASSES
+
+    def get(self, request, start, end):
+        calendar = requested_calendar(request)
+        start_date = iso_date(start)
+        end_date = iso_date(end)
+        if not calendar or not start_date or not end_date or not in_church_years(start_date, end_date):
+            return Response(status=404)
+        if end_date < start_date:
+            return Response({"detail": "The end date is before the start date."}, status=400)
+        if (end_date - start_date).days >= MAX_RANGE_DAYS:
+            return Response({"detail": "Ranges are limited to {} days.".format(MAX_RANGE_DAYS)}, status=400)
+        return range_response(request, start_date, end_date, calendar)
 
 
 class MonthView(APIView):
     permission_classes = [ReadOnly]
+    renderer_classes = ENCODED_RENDERER_CLASSES
 
     def get(self, request, year, month):
-        calendar_year = get_calendar_year(year)
-        serializer = DaySerializer(
-            [date for date in calendar_year if date.date.month == month and date.date.year == year], many=True
-        )
-        return Response(serializer.data)
+        calendar = requested_calendar(request)
+        if not calendar:
+            return Response(status=404)
+        if not 1 <= month <= 12 or not FIRST_YEAR <= year <= LAST_YEAR:
+            return Response(status=404)
+        next_month = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        # the first church year begins in December of FIRST_YEAR, so that month only has the days from Advent
+        start_date = max(date(year, month, 1), advent(FIRST_YEAR))
+        end_date = next_month - timedelta(days=1)
+        if not in_church_years(start_date, end_date):
+            return Response(status=404)
+        return range_response(request, start_date, end_date, calendar)
 
 
 class YearView(APIView):
     permission_classes = [ReadOnly]
+    renderer_classes = ENCODED_RENDERER_CLASSES
 
     def get(self, request, year):
-        church_year = cache.get(str(year))
-        if not church_year:
-            church_year = ChurchYear(year)
-            cache.set(str(year), church_year, 60 * 60 * 12)
-        serializer = DaySerializer([date for date in church_year], many=True)
-        return Response(serializer.data)
+        calendar = requested_calendar(request)
+        if not calendar or not FIRST_YEAR <= year <= LAST_YEAR:
+            return Response(status=404)
+        return range_response(request, advent(year), advent(year + 1) - timedelta(days=1), calendar)
+
+
+def facts_conditions(query_params):
+    # ``?column=value``, ``?column__in=a,b`` and ``?column__lte=value`` style filters for CalendarFacts
+    conditions = {}
+    for condition, value in query_params.items():
+        column, _, lookup = condition.partition("__")
+        if column not in COLUMNS:
+            continue
+        values = value.split(",") if lookup == "in" else [value]
+        if column == "date":
+            values = [iso_date(value) for value in values]
+            if None in values:
+                raise ValueError("Dates are given as YYYY-MM-DD")
+        elif column not in LABELED_COLUMNS:
+            values = [int(value) for value in values]
+        conditions[condition] = values if lookup == "in" else values[0]
+    return conditions
+
+
+class FactsView(APIView):
+    permission_classes = [ReadOnly]
+    renderer_classes = ENCODED_RENDERER_CLASSES
+
+    def get(self, request, start, end):
+        calendar = requested_calendar(request)
+        if not calendar or not FIRST_YEAR <= start <= LAST_YEAR or not FIRST_YEAR <= end <= LAST_YEAR:
+            return Response(status=404)
+        if end < start or end - start >= MAX_FACTS_YEARS:
+            return Response({"detail": "Use up to {} church years.".format(MAX_FACTS_YEARS)}, status=400)
+        facts = CalendarFacts.for_years(start, end, calendar)
+        try:
+            conditions = facts_conditions(request.query_params)
+            if conditions:
+                facts = facts.filter(**conditions)
+        except ValueError as exception:
+            return Response({"detail": str(exception)}, status=400)
+        return json_response(encode(facts.to_dict()))
+
+
+class CacheStatsView(APIView):
+    # the caches of the worker that answers, for staff checking hit rates and memory use
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({"local_cache": local_cache.stats(), "single_flight": single_flight.get_stats()})
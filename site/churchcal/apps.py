@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class ChurchcalConfig(AppConfig):
+    name = "churchcal"
+
+    def ready(self):
+        from churchcal import signals  # noqa: F401
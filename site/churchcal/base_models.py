@@ -38,3 +38,12 @@ class BaseModel(UUIDModel, CreatableModel, UpdatableModel):
         model.pk = None
         model.original_pk = pk
         return model
+
+    def clone(self):
+        # a shallow copy with its own related object cache, so relations can be set on it without touching the original
+        from copy import copy
+
+        model = copy(self)
+        model._state = copy(self._state)
+        model._state.fields_cache = dict(self._state.fields_cache)
+        return model
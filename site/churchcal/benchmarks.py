@@ -0,0 +1,19 @@
+"""
+The timing loop shared by the ``bench_*`` management commands.
+"""
+import time
+
+
+def seconds_per_call(function, arguments=((),), number=1, warm_up=True):
+    """
+    Seconds per call of ``function(*args)`` for every ``args`` in ``arguments``, all of them called ``number`` times.
+    With ``warm_up`` they are all called once first, untimed, so caches are filled and code paths are loaded.
+    """
+    if warm_up:
+        for args in arguments:
+            function(*args)
+    started = time.perf_counter()
+    for _ in range(number):
+        for args in arguments:
+            function(*args)
+    return (time.perf_counter() - started) / (number * len(arguments))
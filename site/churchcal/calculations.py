@@ -1,36 +1,30 @@
+import logging
+import re
 from datetime import datetime, timedelta, date
 
 from dateutil.parser import parse
-from django.core.cache import cache
 from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
 from indexed import IndexedOrderedDict
 
-from churchcal.models import Commemoration, FerialCommemoration, Proper, Season, Calendar, CommemorationRank
-from .utils import advent, week_days, easter
+from churchcal.catalog import CalendarCatalog
+from churchcal.records import ResolvedCommemoration
+from .utils import advent, advent_year, week_days, easter
 
+logger = logging.getLogger(__name__)
 
-class CalendarDate(object):
-    def __init__(self, date, calendar, year):
-        self.date = date
-        self.calendar = calendar
+ISO_DATE = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})$")
 
-        self.required = []
-        self.optional = []
-        self.primary = None
-        self.finalized = False
 
-        self.season = None
-
-        self.year = year
+class BaseCalendarDate(object):
+    """Read-only behaviour shared by ``CalendarDate`` and the days hydrated from a ``ChurchYearSnapshot``."""
 
-    def _find_proper(self):
-        sunday_date = self.date
-        if sunday_date.weekday() != 6:
-            sun_offset = (sunday_date.weekday() - 6) % 7
-            sunday_date = sunday_date - timedelta(days=sun_offset)
-        date = datetime.strptime("2019-{}-{}".format(sunday_date.month, sunday_date.day), "%Y-%m-%d").date()
-        return Proper.objects.filter(calendar=self.calendar, start_date__lte=date, end_date__gte=date).first()
+    FAST_UNKNOWN = -1
+    FAST_NONE = 0
+    FAST_PARTIAL = 1
+    FAST_FULL = 2
+    FAST_DAYS_RANKS = {FAST_NONE: "", FAST_PARTIAL: "Fast (Partial abstinence)", FAST_FULL: "Fast (Total abstinence)"}
+    FAST_DAY_LABELS = {FAST_NONE: "NONE", FAST_PARTIAL: "FAST_PARTIAL", FAST_FULL: "FAST_TOTAL_ABSTIENCE"}
 
     @property
     def all(self):
@@ -54,16 +48,6 @@ class CalendarDate(object):
     def primary_evening(self):
         return self.all_evening[0]
 
-    @cached_property
-    def proper(self):
-        if self.season.name != "Season After Pentecost" and self.primary.name not in [
-            "The Day of Pentecost",
-            "Trinity Sunday",
-        ]:
-            return None
-
-        return self._find_proper()
-
     @cached_property
     def office_year(self):
         return 1 if self.year.start_year % 2 == 0 else 2
@@ -90,12 +74,34 @@ class CalendarDate(object):
             return self.proper.get_mass_readings_for_year(self.year.mass_year)
         return self.primary_evening.get_mass_readings_for_year(self.year.mass_year, time="evening")
 
-    FAST_UNKNOWN = -1
-    FAST_NONE = 0
-    FAST_PARTIAL = 1
-    FAST_FULL = 2
-    FAST_DAYS_RANKS = {FAST_NONE: "", FAST_PARTIAL: "Fast (Partial abstinence)", FAST_FULL: "Fast (Total abstinence)"}
-    FAST_DAY_LABELS = {FAST_NONE: "NONE", FAST_PARTIAL: "FAST_PARTIAL", FAST_FULL: "FAST_TOTAL_ABSTIENCE"}
+
+class CalendarDate(BaseCalendarDate):
+    def __init__(self, date, calendar, year):
+        self.date = date
+        self.calendar = calendar
+
+        self.required = []
+        self.optional = []
+        self.primary = None
+        self.finalized = False
+
+        self.season = None
+
+        self.year = year
+
+    def _find_proper(self):
+        sunday_date = self.date - timedelta(days=(self.date.weekday() + 1) % 7)
+        return self.year.catalog.proper(sunday_date.month, sunday_date.day)
+
+    @cached_property
+    def proper(self):
+        if self.season.name != "Season After Pentecost" and self.primary.name not in [
+            "The Day of Pentecost",
+            "Trinity Sunday",
+        ]:
+            return None
+
+        return self._find_proper()
 
     @cached_property
     def fast_day_reasons(self):
@@ -197,9 +203,7 @@ class CalendarDate(object):
             if self.required[1].rank.precedence_rank < 4:
                 alternate_sunday = self.required[1].copy()
                 if alternate_sunday.rank.name != "SUNDAY":
-                    alternate_sunday.rank = CommemorationRank.objects.get(
-                        calendar=self.calendar, name="ALTERNATE_SUNDAY"
-                    )
+                    alternate_sunday.rank = self.year.catalog.rank("ALTERNATE_SUNDAY")
                 self.required = self.required[:1] + [alternate_sunday]
             else:
                 self.required = self.required[:1]
@@ -218,10 +222,10 @@ class CalendarDate(object):
         if self.required and self.required[0].rank.name == "PRIVILEGED_OBSERVANCE":
             return
 
-        if SetNamesAndCollects.has_collect_for_feria(self):
+        if CollectResolver.feria_source(self)[0]:
             return
 
-        self.optional.append(FerialCommemoration(self.date, self.season, self.calendar))
+        self.optional.append(ResolvedCommemoration(self.year.catalog.feria(self.season)))
 
     def finalize_day(self):
         self.append_feria_if_needed()
@@ -243,166 +247,174 @@ class CalendarDate(object):
 class ChurchYearIterator:
     def __init__(self, church_year, start_position=-1, key=None):
         self._church_year = church_year
+        self._days = church_year.calendar_dates
         self._index = start_position + 1
         self._public_index = start_position
         if key:
             self.jump_by_key(key)
 
     def __next__(self):
-        if self._index < len(self._church_year.dates):
-            result = self._church_year.dates.values()[self._index]
+        if self._index < len(self._days):
+            result = self._days[self._index]
             self._index += 1
             self._public_index += 1
             return result
         raise StopIteration
 
     def next(self):
-        if self.index >= len(self.self._church_year.dates):
+        if self._index >= len(self._days):
             raise StopIteration
         self._public_index += 1
         self._index += 1
-        return self._church_year.dates.values()[self._public_index]
+        return self._days[self._public_index]
 
     def previous(self):
         if self._index <= 0:
             raise StopIteration
         self._public_index -= 1
         self._index -= 1
-        result = self._church_year.dates.values()[self._public_index]
+        result = self._days[self._public_index]
 
         return result
 
     def get_current(self):
-        return self._church_year.dates.values()[self._public_index]
+        return self._days[self._public_index]
 
     def get_previous(self):
         if self._index <= 0:
-            raise None
-        return self._church_year.dates.values()[self._public_index - 1]
+            return None
+        return self._days[self._public_index - 1]
 
     def get_next(self):
-        if self._index >= len(self._church_year.dates):
+        if self._index >= len(self._days):
             return None
-        return self._church_year.dates.values()[self._public_index + 1]
+        return self._days[self._public_index + 1]
 
     def get_by_index(self, index):
-        return self._church_year.dates.values()[index]
+        return self._days[index]
 
     def get_by_key(self, key):
-        index = self._church_year.dates.keys().index(key)
-        return self.get_by_index(index)
+        return self.get_by_index(self._church_year.index_of(key))
 
     def jump_by_index(self, index):
-        result = self._church_year.dates.values()[index]
+        result = self._days[index]
         self._index = index + 1
         self._public_index = index
         return result
 
     def jump_by_key(self, key):
-        index = self._church_year.dates.keys().index(key)
-        return self.jump_by_index(index)
+        return self.jump_by_index(self._church_year.index_of(key))
 
     def get_current_index(self):
         return self._public_index
 
 
-class ChurchYear(object):
+class BaseChurchYear(object):
+    @cached_property
+    def mass_year(self):
+        if self.start_year % 3 == 0:
+            return "A"
+
+        if self.start_year % 3 == 1:
+            return "B"
+
+        if self.start_year % 3 == 2:
+            return "C"
+
+    @cached_property
+    def daily_mass_year(self):
+        return 1 if self.end_year % 2 != 0 else 2
+
+    @cached_property
+    def office_year(self):
+        return "I" if self.start_year % 2 == 0 else "II"
+
+
+class ChurchYear(BaseChurchYear):
     def __iter__(self):
         return ChurchYearIterator(self)
 
-    #
-    # # in case we want to cache by day instead of year
-    # def build_from_cache(self):
-    #     for name, date in self.dates.items():
-    #         self.dates[name] = cache.get(name)
-    #         if not self.dates[name]:
-    #             return self.build_from_scratch()
-
-    def build_from_scratch(self):
-        self.seasons = self._get_seasons()
+    def build_from_scratch(self, lazy=False):
+        self._get_seasons()
         self.season_tracker = None
         # create each date
-        for name, date in self.dates.items():
-            single_date = datetime.strptime(name, "%Y-%m-%d").date()
-            self.dates[name] = CalendarDate(single_date, calendar=self.calendar, year=self)
+        self.calendar_dates = [
+            CalendarDate(single_date, calendar=self.calendar, year=self)
+            for single_date in self.daterange(self.start_date, self.end_date)
+        ]
 
         # add commemorations to date
-        commemorations = (
-            Commemoration.objects.select_related(
-                "rank",
-                "cannot_occur_after__rank",
-            )
-            .filter(calendar=self.calendar)
-            .all()
-        )
         already_added = []
-        for commemoration in commemorations:
+        for commemoration in self.catalog.commemorations:
             if not commemoration.can_occur_in_year(self.start_year):
                 continue
 
-            try:
-                self.dates[commemoration.initial_date_string(self.start_year)].add_commemoration(commemoration)
+            calendar_date = self.get_date(commemoration.initial_date(self.start_year))
+            if calendar_date:
+                calendar_date.add_commemoration(ResolvedCommemoration(self.catalog.record(commemoration)))
                 already_added.append(commemoration.pk)
 
-            except KeyError:
-                pass
+        # feasts transferred out of the last days of the previous church year
+        if self.transfers:
+            self.calendar_dates[0].required = list(self.transfers) + self.calendar_dates[0].required
+
+        self.ruled = 0
+        self.resolver = CollectResolver(self)
+        if not lazy:
+            self.resolve_through(len(self.calendar_dates) - 1)
 
-        for key, calendar_date in self.dates.items():
+    def apply_rules_through(self, index):
+        # seasons and transfers only flow forward, so the rules of a day only need the days before it
+        while self.ruled <= index:
+            calendar_date = self.calendar_dates[self.ruled]
             # seasons
             self._set_season(calendar_date)
 
             # apply transfers
             transfers = calendar_date.apply_rules()
-            new_date = (calendar_date.date + timedelta(days=1)).strftime("%Y-%m-%d")
-            if new_date in self.dates.keys():
-                self.dates[new_date].required = transfers + self.dates[new_date].required
+            if self.ruled + 1 < len(self.calendar_dates):
+                next_date = self.calendar_dates[self.ruled + 1]
+                next_date.required = transfers + next_date.required
+            else:
+                self.transfers_out = transfers
+            self.ruled += 1
 
-        SetNamesAndCollects(self)
+    def resolve_through(self, index):
+        # a day is final once the day after it is resolved, as that sets its evening
+        index = min(index + 1, len(self.calendar_dates) - 1)
+        self.apply_rules_through(index)
+        self.resolver.resolve_through(index)
 
-    def __init__(self, year_of_advent, calendar="ACNA_BCP2019"):
-        self.calendar = Calendar.objects.filter(abbreviation=calendar).first()
+    @property
+    def resolved(self):
+        # the number of final days; all of them once the last day is resolved
+        if self.resolver.resolved == len(self.calendar_dates):
+            return self.resolver.resolved
+        return max(self.resolver.resolved - 1, 0)
+
+    def __init__(self, year_of_advent, calendar="ACNA_BCP2019", catalog=None, transfers=None, lazy=False):
+        # ``transfers`` are the feasts transferred out of the end of the previous church year, worked out from that
+        # year when they aren't given, so that every year is built with them whichever way it is asked for
+        self.catalog = catalog or CalendarCatalog(calendar)
+        if transfers is None:
+            transfers = transfers_into(year_of_advent, self.catalog)
+        self.transfers = transfers
+        self.transfers_out = []
+        self.calendar = self.catalog.calendar
 
         self.start_year = year_of_advent
         self.end_year = year_of_advent + 1
 
-        self.dates = IndexedOrderedDict()
-
-        start_date = advent(year_of_advent)
-        end_date = advent(year_of_advent + 1) - timedelta(days=1)
+        self.start_date = advent(year_of_advent)
+        self.end_date = advent(year_of_advent + 1) - timedelta(days=1)
+        self.start_ordinal = self.start_date.toordinal()
+        self.calendar_dates = []
 
-        self.start_date = start_date
-        self.end_date = end_date
-
-        self.seasons = self._get_seasons()
-        self.season_tracker = None
-        # create each date
-        for single_date in self.daterange(start_date, end_date):
-            name = single_date.strftime("%Y-%m-%d")
-            self.dates[name] = None
-        return self.build_from_scratch()
-
-        # print(
-        #     "{} = {} - {} {}".format(
-        #         calendar_date.season,
-        #         calendar_date.date.strftime("%a, %b, %d, %Y"),
-        #         calendar_date.primary.__repr__(),
-        #         "(Proper {})".format(calendar_date.proper.number) if calendar_date.proper else "",
-        #         "+" if calendar_date.day_of_special_commemoration else "",
-        #     )
-        #
-        # )
-        # print(calendar_date.required, calendar_date.optional)
-
-        # #print("{} - {} - {}".format(self.mass_year, sself.daily_mass_year, self.office_year))
+        self.build_from_scratch(lazy)
 
     def _get_seasons(self):
-        seasons = (
-            Season.objects.filter(calendar=Calendar.objects.filter(abbreviation=self.calendar.abbreviation).get())
-            .order_by("order")
-            .all()
-        )
         season_mapping = {}
-        for season in seasons:
+        for season in self.catalog.seasons:
             season_mapping[season.start_commemoration.name] = season
         self.seasons = season_mapping
         # print(self.seasons)
@@ -436,42 +448,44 @@ class ChurchYear(object):
             yield start_date + timedelta(n)
 
     @cached_property
-    def mass_year(self):
-        if self.start_year % 3 == 0:
-            return "A"
-
-        if self.start_year % 3 == 1:
-            return "B"
-
-        if self.start_year % 3 == 2:
-            return "C"
-
-    @cached_property
-    def daily_mass_year(self):
-        return 1 if self.end_year % 2 != 0 else 2
-
-    @cached_property
-    def office_year(self):
-        return "I" if self.start_year % 2 == 0 else "II"
-
-    @cached_property
-    def first_date(self):
-        return self.dates[:1]
+    def last_date(self):
+        return self.calendar_dates[-1]
 
     @cached_property
-    def last_date(self):
-        return self.dates[-1]
+    def dates(self):
+        # the days keyed by "%Y-%m-%d", built on first use; lookups by date go through ``get_date`` instead
+        return IndexedOrderedDict((day.date.strftime("%Y-%m-%d"), day) for day in self.calendar_dates)
+
+    def index_of(self, date_string):
+        index = to_date(date_string).toordinal() - self.start_ordinal
+        if 0 <= index < len(self.calendar_dates):
+            return index
+        return None
 
     def get_date(self, date_string):
-        date = to_date(date_string)
-        try:
-            date = self.dates[date.strftime("%Y-%m-%d")]
-            date.year = self
-            return date
-        except KeyError:
-            print(date)
-            print(date.strftime("%Y-%m-%d"))
+        index = self.index_of(date_string)
+        if index is None:
             return None
+        calendar_date = self.calendar_dates[index]
+        calendar_date.year = self
+        return calendar_date
+
+
+def transfers_into(year_of_advent, catalog):
+    # what a year transfers out is decided by its own rules, so only those are applied to the year before, without
+    # the feasts it takes in itself
+    if year_of_advent <= 1:
+        # the year before would begin outside ``datetime.date``
+        return []
+    previous = ChurchYear(year_of_advent - 1, catalog=catalog, transfers=[], lazy=True)
+    try:
+        previous.apply_rules_through(len(previous.calendar_dates) - 1)
+    except IndexError:
+        # a day the calendar has no commemoration for can't be ruled; that year fails to build on its own, but the
+        # year after it is still built, without any transfers
+        logger.warning("Church year %s could not be ruled for its transfers", year_of_advent - 1, exc_info=True)
+        return []
+    return previous.transfers_out
 
 
 class CalendarYear(object):
@@ -480,82 +494,202 @@ class CalendarYear(object):
 
     def __init__(self, year, first_year, second_year):
         year = int(year)
-        dates = IndexedOrderedDict(**first_year.dates, **second_year.dates)
-        dates = {k: v for (k, v) in dates.items() if int(k.split("-")[0]) == year}
-        dates = IndexedOrderedDict(**dates)
-        self.dates = dates
-
-        del dates
-        del first_year
-        del second_year
-
-
-class SetNamesAndCollects(object):
-    def __init__(self, church_calendar):
-        self.church_calendar = church_calendar
-
-        checks = [
-            self.own_collect,
-            self.proper_collect,
-            self.feria_collect,
-            self.saint_collect,
-            self.fallback_collect,
+        self.calendar_dates = [
+            day for church_year in (first_year, second_year) for day in church_year if day.date.year == year
         ]
+        self.start_ordinal = date(year, 1, 1).toordinal()
 
-        self.i = iter(self.church_calendar)
-        while True:
-            try:
-                calendar_date = next(self.i)
+    @cached_property
+    def dates(self):
+        # the days keyed by "%Y-%m-%d", built on first use; lookups by date go through ``get_date`` instead
+        return IndexedOrderedDict((day.date.strftime("%Y-%m-%d"), day) for day in self.calendar_dates)
+
+    def index_of(self, date_string):
+        index = to_date(date_string).toordinal() - self.start_ordinal
+        if 0 <= index < len(self.calendar_dates):
+            return index
+        return None
 
-                for commemoration in calendar_date.all:
-                    if "SUNDAY" in commemoration.rank.name:
-                        self.append_seuptuagesima_if_needed(commemoration, calendar_date)
 
-            except StopIteration:
-                break
+class CollectResolver(object):
+    """
+    Sets the names and collects of every commemoration in a ``ChurchYear`` in one forward pass over its days.
+
+    Each day is resolved after the days before it, so ferias look back over finished days (whose feria sources are
+    worked out once and kept in ``feria_sources``), and the eve of a feast is added to the previous day's evening
+    once per day. The pass can stop after any day and carry on later (see ``ChurchYear.resolve_through``): the O
+    Antiphons are added to Advent Sundays as they are resolved, while the ferias and eves named after those Sundays
+    use their ``plain_name``, and the eve of the first day, which has always been added to the last day of the year,
+    waits until the last day is resolved.
+    """
+
+    FERIA_SOURCE_FEASTS = ("The Epiphany", "Christmas Day", "Ash Wednesday", "Ascension Day")
+    SUNDAY_FEASTS = ("Pentecost", "Trinity", "Easter")
+    PROPER_FEASTS = ("The Day of Pentecost", "Trinity Sunday")
+    O_ANTIPHONS = {
+        16: "O Sapientia / O Wisdom from on high",
+        17: "O Adonai / O Lord of Might",
+        18: "O Radix Jesse / O Root of Jesse",
+        19: "O Clavis David / O Key of David",
+        20: "O Oriens / O Daypsring",
+        21: "O Rex Gentium / O Desire of Nations",
+        22: "O Emmanuel / O Come, Emmanuel",
+        23: "O Virgo Virginum / O Virgin of Virgins",
+    }
+
+    def __init__(self, church_year):
+        self.church_year = church_year
+        self.days = church_year.calendar_dates
+        self.septuagesima = {
+            easter(year) - timedelta(days=9 * 7) for year in (church_year.start_year, church_year.end_year)
+        }
+        self.feria_sources = {}
+        self.ranks = {}
+        self.plain_names = {}
+        self.first_evening = None
+        self.resolved = 0
+
+    def resolve_through(self, index):
+        # the rules must already have been applied to every day up to ``index``
+        while self.resolved <= index:
+            self.resolve_day(self.resolved)
+            self.resolved += 1
+
+    def resolve_day(self, index):
+        calendar_date = self.days[index]
+        commemorations = calendar_date.all
+        for commemoration in commemorations:
+            if self.rank_flags(commemoration.rank)[1]:
+                self.append_septuagesima_if_needed(commemoration, calendar_date)
 
-        self.i = iter(self.church_calendar)
-        while True:
-            try:
-                calendar_date = next(self.i)
-                # print(calendar_date.date, calendar_date.primary.name, self.i.get_previous().primary.name, self.i.get_next().primary.name)
+        if index == len(self.days) - 1 and self.first_evening:
+            self.set_previous_evening(self.first_evening, calendar_date)
 
-                for commemoration in calendar_date.all:
-                    for check in checks:
-                        check(commemoration, calendar_date)
-                        if hasattr(commemoration, "morning_prayer_collect"):
-                            break
-                    self.check_previous_evening(calendar_date)
+        previous = self.days[index - 1] if index else None
+        evening = self.has_eve(calendar_date)
+        for commemoration in commemorations:
+            self.resolve_commemoration(commemoration, calendar_date, index)
+            if evening and previous:
+                previous.proper = calendar_date.proper
+        if evening and commemorations:
+            if previous:
+                self.set_previous_evening(calendar_date, previous)
+            else:
+                # the day before the first is the last day of the year, as it always has been
+                self.first_evening = calendar_date
+
+        if calendar_date.date.month == 12 and calendar_date.date.day in self.O_ANTIPHONS:
+            for commemoration in commemorations:
+                if self.rank_flags(commemoration.rank)[1]:
+                    self.plain_names[id(commemoration)] = commemoration.name
+                    self.append_o_antiphon_if_needed(commemoration, calendar_date)
 
-            except StopIteration:
-                break
+    def plain_name(self, commemoration):
+        # the name before any O Antiphon was added to it
+        return self.plain_names.get(id(commemoration), commemoration.name)
 
-        self.i = iter(self.church_calendar)
-        while True:
-            try:
-                calendar_date = next(self.i)
+    def rank_flags(self, rank):
+        # (is a feria, is a Sunday, is required) for each rank
+        flags = self.ranks.get(rank.pk)
+        if flags is None:
+            flags = self.ranks[rank.pk] = ("FERIA" in rank.name, "SUNDAY" in rank.name, rank.required)
+        return flags
 
-                for commemoration in calendar_date.all:
-                    if "SUNDAY" in commemoration.rank.name:
-                        self.append_o_antiphon_if_needed(commemoration, calendar_date)
+    @staticmethod
+    def has_collect(commemoration):
+        return hasattr(commemoration, "morning_prayer_collect")
 
-            except StopIteration:
-                break
+    def resolve_commemoration(self, commemoration, calendar_date, index):
+        is_feria, is_sunday, required = self.rank_flags(commemoration.rank)
 
-    def check_previous_evening(self, calendar_date):
-        if calendar_date.primary.rank.precedence_rank > 4:
+        if not is_feria and commemoration.collect_1:
+            commemoration.morning_prayer_collect = commemoration.evening_prayer_collect = commemoration.collect_1
+            if commemoration.collect_2:
+                commemoration.evening_prayer_collect = commemoration.collect_2
+        if self.has_collect(commemoration):
             return
 
-        if calendar_date.primary.rank.name == "PRIVILEGED_OBSERVANCE":
+        if required:
+            proper = calendar_date.proper
+            if proper and proper.collect_1:
+                commemoration.proper = proper
+                commemoration.morning_prayer_collect = commemoration.evening_prayer_collect = proper.collect_1
+                if commemoration.rank.name == "SUNDAY" or commemoration.name in self.PROPER_FEASTS:
+                    commemoration.name = "{} (Proper {})".format(commemoration.name, proper.number)
+                return
+
+        if is_feria:
+            self.feria_collect(commemoration, calendar_date, index)
+            if self.has_collect(commemoration):
+                return
+
+        if getattr(commemoration, "saint_type", None):
+            commemoration.morning_prayer_collect = (
+                commemoration.evening_prayer_collect
+            ) = commemoration.common_collect()
             return
 
-        previous = self.i.get_previous()
-        if not previous:
+        commemoration.morning_prayer_collect = commemoration.evening_prayer_collect = None
+
+    def feria_source_at(self, index, before):
+        if index < 0:
+            # looking back past the first day reaches the end of the year
+            self.church_year.apply_rules_through(len(self.days) - 1)
+        # days before the one being resolved are finished, so their feria sources can be kept
+        if not 0 <= index < before:
+            return self.feria_source(self.days[index])
+        if index not in self.feria_sources:
+            self.feria_sources[index] = self.feria_source(self.days[index])
+        return self.feria_sources[index]
+
+    def feria_collect(self, commemoration, calendar_date, index):
+        i = index
+        while True:
+            i = i - 1
+            previous = self.days[i]
+            target_commemoration, named_for_proper = self.feria_source_at(i, index)
+            if not target_commemoration:
+                continue
+
+            weekday = week_days[calendar_date.date.weekday()]
+            commemoration.collect_1 = target_commemoration.collect_1
+            commemoration.collect_2 = target_commemoration.collect_2
+            commemoration.collect_eve = target_commemoration.collect_eve
+            if previous.proper and previous.proper.collect_1:
+                calendar_date.proper = previous.proper
+                commemoration.morning_prayer_collect = previous.proper.collect_1
+                commemoration.evening_prayer_collect = previous.proper.collect_1
+                name = self.plain_name(target_commemoration)
+                if named_for_proper:
+                    name = "{} (Proper {})".format(name, previous.proper.number)
+                if name[:3] == "The":
+                    name = name.replace("The ", "the ")
+                commemoration.name = "{} after {}".format(weekday, name)
+                commemoration.original_proper = previous.proper
+            else:
+                commemoration.morning_prayer_collect = previous.primary.morning_prayer_collect
+                commemoration.evening_prayer_collect = previous.primary.evening_prayer_collect
+                commemoration.name = "{} after {}".format(
+                    weekday, self.plain_name(previous.primary).replace("The ", "the ")
+                )
+                commemoration.original_commemoration = previous.primary
+            self.append_septuagesima_if_needed(commemoration, calendar_date)
+            self.append_o_antiphon_if_needed(commemoration, calendar_date)
+            if "gesima" in commemoration.name:
+                commemoration.alternate_color_2 = "purple" if commemoration.alternate_color else None
+                commemoration.alternate_color = (
+                    commemoration.alternate_color if commemoration.alternate_color else "purple"
+                )
             return
 
-        # if previous.primary.rank.required and previous.primary.rank.name != "PRIVILEGED_OBSERVANCE":
-        #     return
+    @staticmethod
+    def has_eve(calendar_date):
+        return (
+            calendar_date.primary.rank.precedence_rank <= 4
+            and calendar_date.primary.rank.name != "PRIVILEGED_OBSERVANCE"
+        )
 
+    def set_previous_evening(self, calendar_date, previous):
         previous.evening_required = previous.required.copy()
         previous.evening_optional = previous.optional.copy()
         feast_copy = calendar_date.primary.copy()
@@ -563,7 +697,7 @@ class SetNamesAndCollects(object):
         if feast_copy.collect_eve:
             feast_copy.evening_prayer_collect = feast_copy.collect_eve
 
-        previous_names = [feast.name for feast in previous.all]
+        previous_names = [self.plain_name(feast) for feast in previous.all]
         if feast_copy.name not in previous_names:
             feast_copy.name = "Eve of {}".format(feast_copy.name)
             previous.evening_required.append(feast_copy)
@@ -580,81 +714,8 @@ class SetNamesAndCollects(object):
 
         previous.evening_season = calendar_date.season
 
-    def own_collect(self, commemoration, calendar_date):
-        if "FERIA" in commemoration.rank.name:
-            return False
-
-        if commemoration.collect_1:
-            commemoration.morning_prayer_collect = commemoration.evening_prayer_collect = commemoration.collect_1
-            if commemoration.collect_2:
-                commemoration.evening_prayer_collect = commemoration.collect_2
-            # commemoration.morning_prayer_collect = (
-            #     commemoration.evening_prayer_collect
-            # ) = commemoration.collect.replace(" [this day]", " this day")
-            # if commemoration.alternate_collect:
-            #     commemoration.evening_prayer_collect = commemoration.alternate_collect
-
-    def proper_collect(self, commemoration, calendar_date):
-        if not commemoration.rank.required:
-            return
-        if calendar_date.proper and calendar_date.proper.collect_1:
-            commemoration.proper = calendar_date.proper
-            commemoration.morning_prayer_collect = (
-                commemoration.evening_prayer_collect
-            ) = calendar_date.proper.collect_1
-            if commemoration.rank.name == "SUNDAY" or commemoration.name in ["The Day of Pentecost", "Trinity Sunday"]:
-                proper_string = " (Proper {})".format(calendar_date.proper.number)
-                commemoration.name = "{}{}".format(commemoration.name, proper_string)
-
-    def feria_collect(self, commemoration, calendar_date):
-        if "FERIA" in commemoration.rank.name:
-            i = self.i.get_current_index()
-            while True:
-                i = i - 1
-                previous = self.i.get_by_index(i)
-                if not previous:
-                    break
-                if self.has_collect_for_feria(previous):
-                    target_commemoration = self.has_collect_for_feria(previous)
-                    commemoration.collect_1 = target_commemoration.collect_1
-                    commemoration.collect_2 = target_commemoration.collect_2
-                    commemoration.collect_eve = target_commemoration.collect_eve
-                    if previous.proper and previous.proper.collect_1:
-                        calendar_date.proper = previous.proper
-                        commemoration.morning_prayer_collect = previous.proper.collect_1
-                        commemoration.evening_prayer_collect = previous.proper.collect_1
-                        name = target_commemoration.name
-
-                        if name[:3] == "The":
-                            name = name.replace("The ", "the ")
-                        if previous.primary.rank.name == "PRINCIPAL_FEAST":
-                            commemoration.name = "{} after {}".format(week_days[calendar_date.date.weekday()], name)
-                        else:
-                            commemoration.name = "{} after {}".format(week_days[calendar_date.date.weekday()], name)
-                        commemoration.original_proper = previous.proper
-                    else:
-                        commemoration.morning_prayer_collect = previous.primary.morning_prayer_collect
-                        commemoration.evening_prayer_collect = previous.primary.evening_prayer_collect
-                        commemoration.name = "{} after {}".format(
-                            week_days[calendar_date.date.weekday()], previous.primary.name.replace("The ", "the ")
-                        )
-                        commemoration.original_commemoration = previous.primary
-                    self.append_seuptuagesima_if_needed(commemoration, calendar_date)
-                    self.append_o_antiphon_if_needed(commemoration, calendar_date)
-                    if "gesima" in commemoration.name:
-                        commemoration.alternate_color_2 = "purple" if commemoration.alternate_color else None
-                        commemoration.alternate_color = (
-                            commemoration.alternate_color if commemoration.alternate_color else "purple"
-                        )
-                    break
-
-        return False
-
-    def append_seuptuagesima_if_needed(self, commemoration, calendar_date):
-        easter_day = easter(calendar_date.date.year)
-        seventy_days_before_easter = easter_day - timedelta(days=9 * 7)
-        date = calendar_date.date
-        if seventy_days_before_easter == date:
+    def append_septuagesima_if_needed(self, commemoration, calendar_date):
+        if calendar_date.date in self.septuagesima:
             commemoration.name = "{}, or Septuagesima".format(commemoration.name)
             commemoration.alternate_color_2 = "purple" if commemoration.alternate_color else None
             commemoration.alternate_color = (
@@ -662,144 +723,36 @@ class SetNamesAndCollects(object):
             )
 
     def append_o_antiphon_if_needed(self, commemoration, calendar_date):
-        if calendar_date.date.month == 12:
-            if calendar_date.date.day == 16:
-                commemoration.name = mark_safe(
-                    "{} <em>(O Sapientia / O Wisdom from on high)</em>".format(commemoration.name)
-                )
-
-            if calendar_date.date.day == 17:
-                commemoration.name = mark_safe("{} <em>(O Adonai / O Lord of Might)</em>".format(commemoration.name))
-
-            if calendar_date.date.day == 18:
-                commemoration.name = mark_safe(
-                    "{} <em>(O Radix Jesse / O Root of Jesse)</em>".format(commemoration.name)
-                )
-
-            if calendar_date.date.day == 19:
-                commemoration.name = mark_safe(
-                    "{} <em>(O Clavis David / O Key of David)</em>".format(commemoration.name)
-                )
-
-            if calendar_date.date.day == 20:
-                commemoration.name = mark_safe("{} <em>(O Oriens / O Daypsring)</em>".format(commemoration.name))
-
-            if calendar_date.date.day == 21:
-                commemoration.name = mark_safe(
-                    "{} <em>(O Rex Gentium / O Desire of Nations)</em>".format(commemoration.name)
-                )
-
-            if calendar_date.date.day == 22:
-                commemoration.name = mark_safe(
-                    "{} <em>(O Emmanuel / O Come, Emmanuel)</em>".format(commemoration.name)
-                )
-
-            if calendar_date.date.day == 23:
-                commemoration.name = mark_safe(
-                    "{} <em>(O Virgo Virginum / O Virgin of Virgins)</em>".format(commemoration.name)
-                )
-
-    def saint_collect(self, commemoration, calendar_date):
-        if not hasattr(commemoration, "saint_type") or not commemoration.saint_type:
-            return False
-
-        commemoration.morning_prayer_collect = commemoration.evening_prayer_collect = commemoration.common_collect()
-
-    def fallback_collect(self, commemoration, calendar_date):
-        commemoration.morning_prayer_collect = commemoration.evening_prayer_collect = None
-
-    @staticmethod
-    def has_collect_for_feria(calendar_date):
-        epiphany = SetNamesAndCollects.is_epiphany(calendar_date)
-        if epiphany:
-            return epiphany
-        christmas = SetNamesAndCollects.is_christmas(calendar_date)
-        if christmas:
-            return christmas
-        ash_wednesday = SetNamesAndCollects.is_ash_wednesday(calendar_date)
-        if ash_wednesday:
-            return ash_wednesday
-        ascension = SetNamesAndCollects.is_ascension(calendar_date)
-        if ascension:
-            return ascension
-        pentecost = SetNamesAndCollects.is_pentecost_or_trinity(calendar_date)
-        if pentecost:
-            return pentecost
-        sunday = SetNamesAndCollects.is_sunday(calendar_date)
-        if sunday:
-            return sunday
-
-        return False
-
-    @staticmethod
-    def is_epiphany(calendar_date):
-        if (
-            calendar_date.required
-            and "The Epiphany" in calendar_date.required[0].name
-            and calendar_date.required[0].rank.required
-        ):
-            return calendar_date.required[0]
-        return None
-
-    @staticmethod
-    def is_christmas(calendar_date):
-        if (
-            calendar_date.required
-            and "Christmas Day" in calendar_date.required[0].name
-            and calendar_date.required[0].rank.required
-        ):
-            return calendar_date.required[0]
-        return None
-
-    @staticmethod
-    def is_ash_wednesday(calendar_date):
-        if (
-            calendar_date.required
-            and "Ash Wednesday" in calendar_date.required[0].name
-            and calendar_date.required[0].rank.required
-        ):
-            return calendar_date.required[0]
-        return None
+        if calendar_date.date.month == 12 and calendar_date.date.day in self.O_ANTIPHONS:
+            commemoration.name = mark_safe(
+                "{} <em>({})</em>".format(commemoration.name, self.O_ANTIPHONS[calendar_date.date.day])
+            )
 
-    @staticmethod
-    def is_ascension(calendar_date):
-        if (
-            calendar_date.required
-            and "Ascension Day" in calendar_date.required[0].name
-            and calendar_date.required[0].rank.required
-        ):
-            return calendar_date.required[0]
-        return None
+    @classmethod
+    def feria_source(cls, calendar_date):
+        # the commemoration whose collect the ferias after this day use, and whether it is named for the day's proper
+        if calendar_date.required:
+            first = calendar_date.required[0]
+            if first.rank.required:
+                for name in cls.FERIA_SOURCE_FEASTS:
+                    if name in first.name:
+                        return first, False
 
-    @staticmethod
-    def is_sunday(calendar_date):
         if calendar_date.date.weekday() == 6:
-            for commemoration in calendar_date.all:
-                if commemoration.rank.name == "PRINCIPAL_FEAST" and "Pentecost" in commemoration.name:
-                    return commemoration
-                if commemoration.rank.name == "PRINCIPAL_FEAST" and "Trinity" in commemoration.name:
-                    return commemoration
-                if commemoration.rank.name == "PRINCIPAL_FEAST" and "Easter" in commemoration.name:
-                    return commemoration
-            for commemoration in calendar_date.all:
+            commemorations = calendar_date.all
+            for commemoration in commemorations:
+                if commemoration.rank.name == "PRINCIPAL_FEAST" and commemoration.name in cls.PROPER_FEASTS:
+                    return commemoration, True
+            for commemoration in commemorations:
+                if commemoration.rank.name == "PRINCIPAL_FEAST":
+                    for name in cls.SUNDAY_FEASTS:
+                        if name in commemoration.name:
+                            return commemoration, False
+            for commemoration in commemorations:
                 if commemoration.rank.name == "SUNDAY":
-                    return commemoration
-            return None
-        return None
+                    return commemoration, False
 
-    @staticmethod
-    def is_pentecost_or_trinity(calendar_date):
-        if calendar_date.date.weekday() == 6:
-            for commemoration in calendar_date.all:
-                if commemoration.rank.name == "PRINCIPAL_FEAST" and commemoration.name in [
-                    "The Day of Pentecost",
-                    "Trinity Sunday",
-                ]:
-                    commemoration = commemoration.copy()
-                    commemoration.name = f"{commemoration.name} (Proper {calendar_date.proper.number})"
-                    return commemoration
-            return None
-        return None
+        return None, False
 
 
 def to_date(date_string):
@@ -807,9 +760,15 @@ def to_date(date_string):
         return date_string.date()
 
     if isinstance(date_string, date):
-        return date
+        return date_string
 
     if isinstance(date_string, str):
+        match = ISO_DATE.match(date_string)
+        if match:
+            try:
+                return date(*map(int, match.groups()))
+            except ValueError:
+                return None
         try:
             return parse(date_string).date()
         except ValueError:
@@ -818,17 +777,13 @@ def to_date(date_string):
     return None
 
 
-def get_church_year(date_string):
-    date = to_date(date_string)
-    advent_start = advent(date.year)
-    year = date.year if date >= advent_start else date.year - 1
-    church_year = cache.get(str(year))
-    if not church_year:
-        church_year = ChurchYear(year)
-        cache.set(str(year), church_year, 60 * 60 * 12)
-    return church_year
+def get_church_year(date_string, calendar="ACNA_BCP2019"):
+    from churchcal.snapshot import get_church_year_snapshot
+
+    return get_church_year_snapshot(advent_year(to_date(date_string)), calendar)
+
 
+def get_calendar_date(date_string, calendar="ACNA_BCP2019"):
+    from churchcal.snapshot import get_snapshot_date
 
-def get_calendar_date(date_string):
-    church_year = get_church_year(date_string)
-    return church_year.get_date(date_string)
+    return get_snapshot_date(date_string, calendar)
@@ -0,0 +1,174 @@
+"""
+Everything ``ChurchYear`` needs from the database for one calendar, loaded up front in a fixed number of queries.
+
+Ranks, seasons, propers, commons and collects are shared between the years built from a catalog (they are never
+modified while building), and so are the ``CommemorationRecord``s of its commemorations and of each season's weekdays.
+Each year only creates the ``ResolvedCommemoration``s that are renamed and annotated as the year is resolved.
+
+Each worker keeps one catalog per calendar (see ``get_catalog``), so several calendars can be served side by side
+without rebuilding their catalogs for every church year.
+"""
+import threading
+import time
+from bisect import bisect_right
+from datetime import date
+
+from churchcal.local_cache import local_cache
+from churchcal.models import Calendar, Commemoration, CommemorationRank, Common, Proper, Season
+from churchcal.records import CommemorationRecord
+
+
+# propers are stored as dates in this year and looked up by the month and day of the Sunday on or before a date
+PROPER_YEAR = 2019
+
+
+class ProperTable(object):
+    """
+    The propers of a calendar as sorted, non-overlapping intervals of ``(month, day)``, found with ``bisect``.
+
+    Boundaries are ``(month, day, 0)`` where an interval starts and ``(month, day, 1)`` just after the day it ends,
+    so a date ``(month, day, 0)`` falls in the interval of the last boundary at or before it. Where propers overlap,
+    the first by primary key is used, as the database query always did.
+    """
+
+    def __init__(self, propers):
+        first_day, last_day = date(PROPER_YEAR, 1, 1), date(PROPER_YEAR, 12, 31)
+        intervals = []
+        for proper in propers:
+            start, end = max(proper.start_date, first_day), min(proper.end_date, last_day)
+            if start <= end:
+                intervals.append(((start.month, start.day, 0), (end.month, end.day, 1), proper))
+
+        self.bounds = sorted({bound for start, end, proper in intervals for bound in (start, end)})
+        self.propers = [
+            next((proper for start, end, proper in intervals if start <= bound < end), None) for bound in self.bounds
+        ]
+
+    def get(self, month, day):
+        index = bisect_right(self.bounds, (month, day, 0)) - 1
+        return self.propers[index] if index >= 0 else None
+
+
+class CalendarCatalog(object):
+    def __init__(self, calendar="ACNA_BCP2019"):
+        from office.models import Collect
+
+        self.calendar = Calendar.objects.filter(abbreviation=calendar).first()
+
+        self.ranks = {rank.pk: rank for rank in CommemorationRank.objects.filter(calendar=self.calendar)}
+        self.ranks_by_name = {rank.name: rank for rank in self.ranks.values()}
+
+        self.commemorations = list(
+            Commemoration.objects.select_related(
+                "rank",
+                "cannot_occur_after__rank",
+            )
+            .filter(calendar=self.calendar)
+            .all()
+        )
+        commemorations_by_pk = {commemoration.pk: commemoration for commemoration in self.commemorations}
+
+        self.seasons = list(Season.objects.filter(calendar=self.calendar).order_by("order"))
+        # matches the implicit primary key ordering of ``QuerySet.first()``
+        self.propers = list(Proper.objects.filter(calendar=self.calendar).order_by("pk"))
+
+        common_ids = {getattr(commemoration, "common_id", None) for commemoration in self.commemorations}
+        common_ids.discard(None)
+        commons = Common.objects.in_bulk(common_ids) if common_ids else {}
+
+        collect_ids = {proper.collect_1_id for proper in self.propers}
+        for commemoration in self.commemorations:
+            collect_ids.update((commemoration.collect_1_id, commemoration.collect_2_id, commemoration.collect_eve_id))
+        collect_ids.discard(None)
+        collects = Collect.objects.in_bulk(collect_ids) if collect_ids else {}
+
+        for commemoration in self.commemorations:
+            if commemoration.rank_id in self.ranks:
+                commemoration.rank = self.ranks[commemoration.rank_id]
+            if commemoration.cannot_occur_after_id in commemorations_by_pk:
+                commemoration.cannot_occur_after = commemorations_by_pk[commemoration.cannot_occur_after_id]
+            for field in ("collect_1", "collect_2", "collect_eve"):
+                setattr(commemoration, field, collects.get(getattr(commemoration, "{}_id".format(field))))
+            if getattr(commemoration, "common_id", None):
+                commemoration.common = commons[commemoration.common_id]
+
+        for season in self.seasons:
+            if season.start_commemoration_id in commemorations_by_pk:
+                season.start_commemoration = commemorations_by_pk[season.start_commemoration_id]
+            if season.rank_id in self.ranks:
+                season.rank = self.ranks[season.rank_id]
+
+        for proper in self.propers:
+            proper.calendar = self.calendar
+            proper.collect_1 = collects.get(proper.collect_1_id)
+        self.proper_table = ProperTable(self.propers)
+
+        self.records = {
+            commemoration.pk: CommemorationRecord(commemoration, calendar) for commemoration in self.commemorations
+        }
+        self.ferias = {season.pk: CommemorationRecord.for_season(season, calendar) for season in self.seasons}
+
+    def record(self, commemoration):
+        return self.records[commemoration.pk]
+
+    def feria(self, season):
+        return self.ferias[season.pk]
+
+    def rank(self, name):
+        return self.ranks_by_name[name]
+
+    def proper(self, month, day):
+        return self.proper_table.get(month, day)
+
+
+CALENDARS_KEY = "churchcal:calendars"
+# bumped when a calendar is added, changed or removed (see ``churchcal.signals``)
+CALENDARS_GENERATION = "churchcal_calendars"
+CALENDARS_TIMEOUT = 60 * 10
+CATALOG_TIMEOUT = 60 * 60 * 12
+
+# calendar abbreviation -> (catalog, generation, loaded at)
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(calendar="ACNA_BCP2019"):
+    # reloaded when this worker notices that the calendar's generation changed, or after CATALOG_TIMEOUT
+    generation = local_cache.generation(calendar)
+    now = time.monotonic()
+    with _catalogs_lock:
+        entry = _catalogs.get(calendar)
+        if entry is None or entry[1] != generation or now - entry[2] > CATALOG_TIMEOUT:
+            entry = _catalogs[calendar] = (CalendarCatalog(calendar), generation, now)
+        return entry[0]
+
+
+def clear_catalogs():
+    with _catalogs_lock:
+        _catalogs.clear()
+
+
+def _calendars():
+    # (calendar primary key -> abbreviation, abbreviations)
+    calendars = local_cache.get(CALENDARS_KEY)
+    if calendars is None:
+        by_pk = dict(Calendar.objects.values_list("pk", "abbreviation"))
+        calendars = (by_pk, frozenset(by_pk.values()))
+        local_cache.set(CALENDARS_KEY, calendars, timeout=CALENDARS_TIMEOUT, generations=(CALENDARS_GENERATION,))
+    return calendars
+
+
+def calendar_abbreviations():
+    return _calendars()[1]
+
+
+def calendar_abbreviation(pk):
+    abbreviation = _calendars()[0].get(pk)
+    if abbreviation is None:
+        # a calendar added since the abbreviations were cached
+        abbreviation = Calendar.objects.filter(pk=pk).values_list("abbreviation", flat=True).first()
+    return abbreviation
+
+
+def is_calendar(calendar):
+    return calendar in calendar_abbreviations()
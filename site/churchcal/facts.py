@@ -0,0 +1,184 @@
+"""
+Columnar per-day facts (fast day, season, color, primary feast and its rank) for a range of church years.
+
+``CalendarFacts`` reads the day and record tuples of cached ``ChurchYearSnapshot``s in one pass, without hydrating
+any day objects, into one array per column. Text columns (season, color, feast and rank) are stored as integer codes
+into a list of labels, so questions like "every fast day from 2020 to 2030" are a comparison over an array. The
+columns are NumPy arrays when NumPy is installed and ``array.array``s otherwise.
+"""
+import operator
+from array import array
+from datetime import date
+
+from churchcal.snapshot import (
+    DAY_FAST,
+    DAY_OPTIONAL,
+    DAY_REQUIRED,
+    DAY_SEASON,
+    DEFAULT_CALENDAR,
+    RECORD_COLORS,
+    RECORD_NAME,
+    RECORD_RANK,
+    get_church_year_snapshot,
+)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# column name: array typecode
+COLUMNS = {
+    "date": "l",
+    "weekday": "b",
+    "fast_day": "b",
+    "season": "h",
+    "color": "h",
+    "feast": "h",
+    "rank": "h",
+    "precedence": "b",
+    "major": "b",
+}
+LABELED_COLUMNS = ("season", "color", "feast", "rank")
+LOOKUPS = {
+    "exact": operator.eq,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+}
+
+# the rank, season, feast or color of a day without one
+NONE = -1
+
+
+class _Labels(object):
+    def __init__(self):
+        self.labels = []
+        self.codes = {}
+
+    def code(self, label):
+        if label is None:
+            return NONE
+        if label not in self.codes:
+            self.codes[label] = len(self.labels)
+            self.labels.append(label)
+        return self.codes[label]
+
+
+class CalendarFacts(object):
+    def __init__(self, columns, labels, calendar=DEFAULT_CALENDAR):
+        self.columns = columns
+        self.labels = labels
+        self.calendar = calendar
+
+    @classmethod
+    def from_snapshots(cls, snapshots, calendar=DEFAULT_CALENDAR):
+        columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        labels = {name: _Labels() for name in LABELED_COLUMNS}
+        for snapshot in snapshots:
+            ordinal = snapshot.start_date.toordinal()
+            for offset, day in enumerate(snapshot.days):
+                season = snapshot.seasons[day[DAY_SEASON]] if day[DAY_SEASON] is not None else None
+                records = day[DAY_REQUIRED] + day[DAY_OPTIONAL]
+                primary = snapshot.records[records[0]] if records else None
+                rank = snapshot.ranks[primary[RECORD_RANK]] if primary and primary[RECORD_RANK] is not None else None
+                color = primary[RECORD_COLORS][0] if primary else None
+
+                columns["date"].append(ordinal + offset)
+                columns["weekday"].append((ordinal + offset + 6) % 7)
+                columns["fast_day"].append(day[DAY_FAST])
+                columns["season"].append(labels["season"].code(season[1] if season else None))
+                columns["color"].append(labels["color"].code(color.lower() if color else None))
+                columns["feast"].append(labels["feast"].code(primary[RECORD_NAME] if primary else None))
+                columns["rank"].append(labels["rank"].code(rank[1] if rank else None))
+                columns["precedence"].append(rank[3] if rank and rank[3] is not None else NONE)
+                columns["major"].append(1 if day[DAY_REQUIRED] else 0)
+        if numpy:
+            columns = {name: numpy.asarray(column) for name, column in columns.items()}
+        return cls(columns, {name: labels[name].labels for name in LABELED_COLUMNS}, calendar)
+
+    @classmethod
+    def for_years(cls, start, end, calendar=DEFAULT_CALENDAR):
+        # ``start`` and ``end`` are the (inclusive) years in which the first and last church years begin
+        snapshots = [get_church_year_snapshot(year, calendar) for year in range(int(start), int(end) + 1)]
+        return cls.from_snapshots(snapshots, calendar)
+
+    def __len__(self):
+        return len(self.columns["date"])
+
+    def _value(self, column, value):
+        if column in LABELED_COLUMNS:
+            return self.labels[column].index(value) if value in self.labels[column] else None
+        if column == "date" and isinstance(value, date):
+            return value.toordinal()
+        return value
+
+    def mask(self, **conditions):
+        """
+        Rows matching all of the conditions, which are given as ``column=value``, ``column__in=values`` or
+        ``column__lt`` / ``__lte`` / ``__gt`` / ``__gte``. Labeled columns are compared by label.
+        """
+        selected = numpy.ones(len(self), dtype=bool) if numpy else [True] * len(self)
+        for condition, value in conditions.items():
+            column, _, lookup = condition.partition("__")
+            if column not in self.columns or (lookup and lookup != "in" and lookup not in LOOKUPS):
+                raise ValueError("Unknown condition {}".format(condition))
+            data = self.columns[column]
+            if lookup == "in":
+                codes = [self._value(column, item) for item in value]
+                codes = [code for code in codes if code is not None]
+                matches = numpy.isin(data, codes) if numpy else [item in codes for item in data]
+            else:
+                code = self._value(column, value)
+                compare = LOOKUPS[lookup or "exact"]
+                if code is None:
+                    matches = numpy.zeros(len(self), dtype=bool) if numpy else [False] * len(self)
+                else:
+                    matches = compare(data, code) if numpy else [compare(item, code) for item in data]
+            if numpy:
+                selected &= matches
+            else:
+                selected = [a and b for a, b in zip(selected, matches)]
+        return selected
+
+    def filter(self, mask=None, **conditions):
+        if mask is None:
+            mask = self.mask(**conditions)
+        if numpy:
+            columns = {name: column[mask] for name, column in self.columns.items()}
+        else:
+            columns = {
+                name: array(COLUMNS[name], (item for item, keep in zip(column, mask) if keep))
+                for name, column in self.columns.items()
+            }
+        return CalendarFacts(columns, self.labels, self.calendar)
+
+    def dates(self):
+        return [date.fromordinal(int(ordinal)) for ordinal in self.columns["date"]]
+
+    def column(self, name):
+        # the column's values, with labels in place of codes
+        values = [int(value) for value in self.columns[name]]
+        if name == "date":
+            return [date.fromordinal(value).isoformat() for value in values]
+        if name in LABELED_COLUMNS:
+            labels = self.labels[name]
+            return [labels[value] if value != NONE else None for value in values]
+        return values
+
+    def rows(self):
+        columns = [self.column(name) for name in COLUMNS]
+        return [dict(zip(COLUMNS, values)) for values in zip(*columns)]
+
+    def to_dict(self):
+        # compact form for the API: ISO dates, labeled columns as codes into ``labels``, and NONE for no value
+        return {
+            "calendar": self.calendar,
+            "length": len(self),
+            "labels": self.labels,
+            "columns": {
+                name: self.column("date") if name == "date" else [int(value) for value in column]
+                for name, column in self.columns.items()
+            },
+        }
@@ -0,0 +1,168 @@
+"""
+A bounded, per-process LRU cache that sits in front of the Django cache.
+
+Almost all traffic is served from the same two or three church years, so each worker keeps the most recently used
+church years and calendar dates in memory instead of fetching and unpickling them from memcached on every request.
+Entries expire after a timeout and the total (estimated) size is capped. Each entry can name the generations
+(stored in the Django cache, one per calendar and a few for the office data) it was built from, and is dropped as
+soon as this worker notices that one of them has changed; entries of other calendars and generations are kept.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def generation_key(calendar):
+    return "churchcal:generation:{}".format(calendar)
+
+
+def new_generation():
+    # used whenever a generation key is missing (first use, or evicted from the cache), so a generation that may
+    # still have entries cached under it is never handed out again
+    return time.time_ns() // 1000
+
+
+def get_generations(calendars):
+    keys = {generation_key(calendar): calendar for calendar in calendars}
+    generations = cache.get_many(keys.keys())
+    for key in keys.keys() - generations.keys():
+        cache.add(key, new_generation(), None)
+        generations[key] = cache.get(key)
+    return {calendar: generations[key] for key, calendar in keys.items()}
+
+
+def get_generation(calendar):
+    return get_generations([calendar])[calendar]
+
+
+def bump_generation(calendar):
+    try:
+        return cache.incr(generation_key(calendar))
+    except ValueError:
+        generation = new_generation()
+        cache.set(generation_key(calendar), generation, None)
+        return generation
+
+
+class LocalCache(object):
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024, timeout=60 * 10, generation_check_interval=5):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.generation_check_interval = generation_check_interval
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()
+        self.generations = {}
+        self._generations_checked_at = None
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_generations(self, now):
+        if (
+            self._generations_checked_at is not None
+            and now - self._generations_checked_at < self.generation_check_interval
+        ):
+            return
+        self._generations_checked_at = now
+        if not self.generations:
+            return
+        generations = get_generations(self.generations.keys())
+        changed = {name for name, generation in generations.items() if generation != self.generations[name]}
+        if changed:
+            self.generations = generations
+            self.invalidations += 1
+            for key in [key for key, entry in self._entries.items() if not changed.isdisjoint(entry[3])]:
+                self._remove(key)
+
+    def _clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def _remove(self, key):
+        value, size, expires_at, generations = self._entries.pop(key)
+        self.size -= size
+
+    def generation(self, calendar):
+        # the calendar's generation as last seen by this worker, refreshed at most every generation_check_interval
+        with self._lock:
+            self._check_generations(time.monotonic())
+            if calendar not in self.generations:
+                self.generations[calendar] = get_generation(calendar)
+            return self.generations[calendar]
+
+    def check_generations(self):
+        # notice changed generations now, rather than within generation_check_interval
+        with self._lock:
+            self._generations_checked_at = None
+            self._check_generations(time.monotonic())
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            self._check_generations(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, size, expires_at, generations = entry
+            if expires_at <= now:
+                self._remove(key)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, size=1, timeout=None, generations=()):
+        # ``generations`` names the generations the value was built from, which drop it when they change
+        if size > self.max_bytes:
+            return
+        now = time.monotonic()
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            self._check_generations(now)
+            if key in self._entries:
+                self._remove(key)
+            for name in generations:
+                if name not in self.generations:
+                    self.generations[name] = get_generation(name)
+            self._entries[key] = (value, size, now + timeout, frozenset(generations))
+            self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+            self._generations_checked_at = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size": self.size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "generations": dict(self.generations),
+            }
+
+
+local_cache = LocalCache(**getattr(settings, "CHURCHCAL_LOCAL_CACHE", {}))
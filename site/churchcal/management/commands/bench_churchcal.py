@@ -0,0 +1,179 @@
+import gc
+import json
+import platform
+import tracemalloc
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from churchcal.api.views import YearView
+from churchcal.benchmarks import seconds_per_call
+from churchcal.calculations import ChurchYear, get_calendar_date
+from churchcal.catalog import clear_catalogs, get_catalog
+from churchcal.local_cache import local_cache
+from churchcal.models import Calendar
+from churchcal.snapshot import DEFAULT_CALENDAR, ChurchYearSnapshot
+from churchcal.year_range import ChurchYearRange
+
+FIXTURE = "bench_calendar"
+
+
+def clear_caches():
+    cache.clear()
+    local_cache.clear()
+    clear_catalogs()
+
+
+def render_year_view(year, calendar):
+    request = APIRequestFactory().get("/api/v1/calendar/{}".format(year), {"calendar": calendar})
+    response = YearView.as_view()(request, year=year)
+    return b"".join(response.streaming_content) if response.streaming else response.render().content
+
+
+class Command(BaseCommand):
+    help = (
+        "Times building church years, calendar date lookups and the year view, with their query counts and peak "
+        "memory, and writes the results as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fixture",
+            action="store_true",
+            help="Migrate the (SQLite) database and load the bundled fixture calendar first",
+        )
+        parser.add_argument("--calendar", default=DEFAULT_CALENDAR)
+        parser.add_argument("--year", type=int, default=2023)
+        parser.add_argument("--first-year", type=int, default=2010, help="First year of the 10 and 50 year builds")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs of each benchmark; the fastest is reported")
+        parser.add_argument("--number", type=int, default=1000, help="Calls of each warm benchmark per run")
+        parser.add_argument("--output", help="File to write the JSON to instead of standard output")
+        parser.add_argument(
+            "--processes", type=int, help="Also time building the 50 year range with this many worker processes"
+        )
+
+    def handle(self, *args, **options):
+        if options["fixture"]:
+            self.load_fixture()
+        calendar = options["calendar"]
+        if not Calendar.objects.filter(abbreviation=calendar).exists():
+            raise CommandError("There is no {} calendar; use --fixture to load the bundled one".format(calendar))
+
+        year = options["year"]
+        first_year = options["first_year"]
+        date_string = "{}-06-01".format(year + 1)
+
+        def build_years(count):
+            def build():
+                catalog = get_catalog(calendar)
+                for build_year in range(first_year, first_year + count):
+                    ChurchYear(build_year, calendar, catalog=catalog)
+
+            return build
+
+        def warm_calendar_date():
+            get_calendar_date(date_string, calendar)
+
+        def warm_year_view():
+            render_year_view(year, calendar)
+
+        after_pentecost = []
+
+        def build_after_pentecost():
+            church_year = ChurchYear(year, calendar, catalog=get_catalog(calendar))
+            after_pentecost[:] = [day for day in church_year if day.season.name == "Season After Pentecost"]
+
+        def find_propers():
+            for day in after_pentecost:
+                day._find_proper()
+
+        benchmarks = {
+            "build_1_year": (lambda: ChurchYear(year, calendar, catalog=get_catalog(calendar)), None),
+            "build_10_years": (build_years(10), None),
+            "build_50_years": (build_years(50), None),
+            "range_50_years": (lambda: ChurchYearRange(first_year, first_year + 49, calendar).years, None),
+            "get_calendar_date_cold": (warm_calendar_date, None),
+            "get_calendar_date_warm": (warm_calendar_date, warm_calendar_date),
+            "year_view_cold": (warm_year_view, None),
+            "year_view_warm": (warm_year_view, warm_year_view),
+            # should make no queries: propers are looked up in the catalog
+            "propers_after_pentecost": (find_propers, build_after_pentecost),
+        }
+
+        if options["processes"]:
+            benchmarks["range_50_years_parallel"] = (
+                lambda: ChurchYearRange(first_year, first_year + 49, calendar, processes=options["processes"]).years,
+                None,
+            )
+
+        results = {}
+        for name, (function, warm_up) in benchmarks.items():
+            results[name] = self.measure(function, warm_up, options["repeat"], options["number"] if warm_up else 1)
+            self.stderr.write("{}: {:.6f}s".format(name, results[name]["seconds"]))
+
+        report = {
+            "calendar": calendar,
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "year": year,
+            "first_year": first_year,
+            "results": results,
+            "memory": self.year_memory(year, calendar),
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                output_file.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+    def load_fixture(self):
+        if connection.vendor != "sqlite":
+            raise CommandError(
+                "The fixture calendar is only loaded into SQLite databases (see website.settings_bench)"
+            )
+        call_command("migrate", verbosity=0, interactive=False)
+        call_command("loaddata", FIXTURE, verbosity=0)
+
+    def year_memory(self, year, calendar):
+        # bytes still allocated for a built church year (without its shared catalog) and the size of its snapshot
+        clear_caches()
+        catalog = get_catalog(calendar)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            church_year = ChurchYear(year, calendar, catalog=catalog)
+            gc.collect()
+            retained = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        return {
+            "church_year": retained,
+            "snapshot": ChurchYearSnapshot.from_church_year(church_year).nbytes,
+        }
+
+    def measure(self, function, warm_up, repeat, number):
+        # seconds are per call, for the fastest of ``repeat`` runs; queries and peak memory are for one call. Every
+        # run starts from empty caches, so a benchmark with ``warm_up`` measures the calls after it.
+        timings = []
+        for _ in range(repeat):
+            clear_caches()
+            if warm_up:
+                warm_up()
+            timings.append(seconds_per_call(function, number=number, warm_up=False))
+
+        clear_caches()
+        if warm_up:
+            warm_up()
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                function()
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return {"seconds": min(timings), "queries": len(queries), "peak_memory": peak_memory}
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from churchcal.benchmarks import seconds_per_call
+from churchcal.utils import advent, easter, weekday_after
+
+
+def delorean_weekday_after(weekday, month, day, year, number_after=1):
+    from delorean import Delorean
+
+    weekday = weekday.lower()
+    direction = "last" if number_after < 1 else "next"
+    number_after = abs(number_after)
+    d = Delorean(datetime=timezone.datetime(year, month, day), timezone="UTC")
+    return d._shift_date(direction, weekday, number_after).date
+
+
+def delorean_advent(year):
+    return delorean_weekday_after(weekday="sunday", month=12, day=25, year=year, number_after=-4)
+
+
+class Command(BaseCommand):
+    help = "Times the arithmetic advent/easter/weekday engine against the Delorean implementation it replaced"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=20000)
+
+    def handle(self, *args, **options):
+        try:
+            import delorean  # noqa: F401
+        except ImportError:
+            raise CommandError("Delorean is required as the reference implementation")
+
+        self.bench(options["number"])
+
+    def bench(self, number):
+        timings = {
+            "advent (table)": lambda: advent(2024),
+            "advent (delorean)": lambda: delorean_advent(2024),
+            "easter (table)": lambda: easter(2024),
+            "weekday_after": lambda: weekday_after("sunday", 11, 1, 2024, 1),
+            "weekday_after (delorean)": lambda: delorean_weekday_after("sunday", 11, 1, 2024, 1),
+        }
+        for name, func in timings.items():
+            seconds = seconds_per_call(func, number=number, warm_up=False)
+            self.stdout.write("{:<26} {:>10.3f} us/call".format(name, seconds * 1_000_000))
@@ -0,0 +1,42 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from churchcal.api.payloads import YearPayload, get_year_payload
+from churchcal.api.serializer import DaySerializer
+from churchcal.benchmarks import seconds_per_call
+from churchcal.snapshot import DEFAULT_CALENDAR, get_church_year_snapshot
+
+
+class Command(BaseCommand):
+    help = "Compares serializing a church year with DaySerializer against the pre-serialized day payloads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, default=2023)
+        parser.add_argument("--calendar", default=DEFAULT_CALENDAR)
+        parser.add_argument("--number", type=int, default=5)
+
+    def handle(self, *args, **options):
+        year, calendar = options["year"], options["calendar"]
+        snapshot = get_church_year_snapshot(year, calendar)
+
+        def serializer():
+            return JSONRenderer().render(DaySerializer([day for day in snapshot], many=True).data)
+
+        def build_payload():
+            return YearPayload.from_snapshot(snapshot).json()
+
+        def cached_payload():
+            return get_year_payload(year, calendar).json()
+
+        if json.loads(serializer()) != json.loads(cached_payload()):
+            raise CommandError("The day payloads differ from DaySerializer's output")
+
+        for name, func in (
+            ("DaySerializer + JSONRenderer", serializer),
+            ("YearPayload.from_snapshot", build_payload),
+            ("get_year_payload (cached)", cached_payload),
+        ):
+            seconds = seconds_per_call(func, number=options["number"])
+            self.stdout.write("{:<30} {:>10.2f} ms  {:>9} bytes".format(name, seconds * 1000, len(func())))
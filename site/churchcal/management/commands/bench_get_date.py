@@ -0,0 +1,46 @@
+import random
+from datetime import timedelta
+
+from dateutil.parser import parse
+from django.core.management.base import BaseCommand
+
+from churchcal.benchmarks import seconds_per_call
+from churchcal.calculations import ChurchYear, to_date
+from churchcal.snapshot import ChurchYearSnapshot
+
+
+class Command(BaseCommand):
+    help = "Times ChurchYear.get_date for random dates, by date object and by string"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, default=2023)
+        parser.add_argument("--number", type=int, default=10000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        church_year = ChurchYear(options["year"])
+        snapshot = ChurchYearSnapshot.from_church_year(church_year)
+
+        generator = random.Random(options["seed"])
+        span = (church_year.end_date - church_year.start_date).days
+        dates = [church_year.start_date + timedelta(days=generator.randint(0, span)) for _ in range(options["number"])]
+        padded = [date.strftime("%Y-%m-%d") for date in dates]
+        unpadded = ["{}-{}-{}".format(date.year, date.month, date.day) for date in dates]
+
+        keyed = church_year.dates
+
+        def string_keyed(date_string):
+            # the previous lookup: dateutil parsing plus a strftime key into an IndexedOrderedDict
+            return keyed[parse(date_string).date().strftime("%Y-%m-%d")]
+
+        timings = [
+            ("ChurchYear.get_date(date)", church_year.get_date, dates),
+            ("ChurchYear.get_date('%Y-%m-%d')", church_year.get_date, padded),
+            ("ChurchYear.get_date('%Y-%-m-%-d')", church_year.get_date, unpadded),
+            ("snapshot.get_date(date)", snapshot.get_date, dates),
+            ("to_date('%Y-%m-%d')", to_date, padded),
+            ("string keys + dateutil", string_keyed, padded),
+        ]
+        for name, func, arguments in timings:
+            seconds = seconds_per_call(func, [(argument,) for argument in arguments])
+            self.stdout.write("{:<36} {:>8.3f} us/lookup".format(name, seconds * 1_000_000))
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from churchcal.calculations import ChurchYear
+from churchcal.catalog import get_catalog
+from churchcal.snapshot import DEFAULT_CALENDAR
+
+
+def collect_text(collect):
+    # common collects are built from a saint's type, so they have no primary key and are compared by their text
+    if collect is None:
+        return None
+    text = "\n".join((collect.text or "", collect.traditional_text or ""))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def commemoration_golden(commemoration):
+    return {
+        "name": str(commemoration.name),
+        "rank": commemoration.rank.name,
+        "colors": [
+            commemoration.color,
+            commemoration.additional_color,
+            commemoration.alternate_color,
+            commemoration.alternate_color_2,
+        ],
+        "morning_prayer_collect": collect_text(getattr(commemoration, "morning_prayer_collect", None)),
+        "evening_prayer_collect": collect_text(getattr(commemoration, "evening_prayer_collect", None)),
+        "collects": [
+            collect_text(commemoration.collect_1),
+            collect_text(commemoration.collect_2),
+            collect_text(commemoration.collect_eve),
+        ],
+    }
+
+
+def day_golden(day):
+    return {
+        "season": day.season.name if day.season else None,
+        "evening_season": day.evening_season.name if day.evening_season else None,
+        "proper": day.proper.number if day.proper else None,
+        "fast_day": day.fast_day,
+        "required": [commemoration_golden(commemoration) for commemoration in day.required],
+        "optional": [commemoration_golden(commemoration) for commemoration in day.optional],
+        "evening": [commemoration_golden(commemoration) for commemoration in day.all_evening],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes or checks a golden file of the names, collects, evenings and propers of every day in a range of "
+        "church years"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("golden_file")
+        parser.add_argument("--first-year", type=int, default=2010)
+        parser.add_argument("--last-year", type=int, default=2039)
+        parser.add_argument("--calendar", default=DEFAULT_CALENDAR)
+        parser.add_argument("--write", action="store_true", help="Write the golden file instead of checking it")
+
+    def handle(self, *args, **options):
+        catalog = get_catalog(options["calendar"])
+        golden = {}
+        elapsed = 0
+        for year in range(options["first_year"], options["last_year"] + 1):
+            started = time.perf_counter()
+            church_year = ChurchYear(year, options["calendar"], catalog=catalog)
+            elapsed += time.perf_counter() - started
+            for day in church_year:
+                golden[day.date.isoformat()] = day_golden(day)
+        self.stdout.write(
+            "Built {} church years in {:.2f}s".format(options["last_year"] - options["first_year"] + 1, elapsed)
+        )
+
+        if options["write"]:
+            # one day per line, so that a changed day is a one line diff
+            lines = [
+                "{}: {}".format(json.dumps(date), json.dumps(golden[date], sort_keys=True)) for date in sorted(golden)
+            ]
+            with open(options["golden_file"], "w", encoding="utf-8") as output:
+                output.write("{\n" + ",\n".join(lines) + "\n}\n")
+            self.stdout.write("Wrote {} days to {}".format(len(golden), options["golden_file"]))
+            return
+
+        with open(options["golden_file"], encoding="utf-8") as golden_file:
+            expected = json.load(golden_file)
+        differences = [date for date in sorted(set(golden) | set(expected)) if golden.get(date) != expected.get(date)]
+        for date in differences[:20]:
+            self.stderr.write("{}: expected {}, got {}".format(date, expected.get(date), golden.get(date)))
+        if differences:
+            raise CommandError("{} of {} days differ from the golden file".format(len(differences), len(expected)))
+        self.stdout.write("All {} days match the golden file".format(len(golden)))
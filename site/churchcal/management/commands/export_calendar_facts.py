@@ -0,0 +1,43 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from churchcal.api.views import facts_conditions
+from churchcal.facts import COLUMNS, CalendarFacts
+from churchcal.snapshot import DEFAULT_CALENDAR
+
+
+class Command(BaseCommand):
+    help = "Exports the per-day calendar facts of a range of church years as CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument("start", type=int, help="Year in which the first church year begins")
+        parser.add_argument("end", type=int, help="Year in which the last church year begins")
+        parser.add_argument("--calendar", default=DEFAULT_CALENDAR)
+        parser.add_argument("--where", action="append", default=[], help="A filter such as fast_day__gte=1")
+        parser.add_argument("--output", help="File to write instead of standard output")
+
+    def handle(self, *args, **options):
+        facts = CalendarFacts.for_years(options["start"], options["end"], options["calendar"])
+        # parsed like the facts endpoint's query string, so ``__in`` takes a comma-separated list
+        where = {}
+        for condition in options["where"]:
+            name, equals, value = condition.partition("=")
+            if not equals or name.partition("__")[0] not in COLUMNS:
+                raise CommandError("Unknown condition {}".format(condition))
+            where[name] = value
+        try:
+            conditions = facts_conditions(where)
+            if conditions:
+                facts = facts.filter(**conditions)
+        except ValueError as exception:
+            raise CommandError(exception)
+
+        output = open(options["output"], "w", newline="", encoding="utf-8") if options["output"] else self.stdout
+        try:
+            writer = csv.DictWriter(output, fieldnames=list(COLUMNS))
+            writer.writeheader()
+            writer.writerows(facts.rows())
+        finally:
+            if options["output"]:
+                output.close()
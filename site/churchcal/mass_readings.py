@@ -0,0 +1,168 @@
+"""
+Mass reading lookups answered from an in-memory ``MassReadingIndex``.
+
+Each worker loads a calendar's ``MassReading``s once (and again when its generation changes) and groups them by
+commemoration, proper and common. The lookups only rely on ``uuid``, ``name``, ``saint_type``, ``proper`` and the
+``original_*`` attributes, so they serve both model instances and the records in ``churchcal.snapshot``. The long and
+short texts are left out of the index query and loaded for the whole calendar, in one query, by the first lookup that
+returns readings whose text is used; the readings of ``all_for_commemoration`` only need their citations.
+"""
+import time
+from collections import defaultdict
+
+from django.db.models import prefetch_related_objects
+
+from churchcal.local_cache import local_cache
+from churchcal.models import Common, MassReading
+
+INDEX_TIMEOUT = 60 * 60 * 12
+
+TEXT_FIELDS = ("long_text", "short_text")
+
+# calendar abbreviation -> (index, calendar generation, loaded at)
+_indexes = {}
+
+# Commemorations whose readings are narrowed to a single service. Keys are the time of day ("morning" or
+# "evening"), with ``None`` matching any time not listed.
+SERVICE_FILTERS = {
+    "Eve of Easter Day": {None: ("abbreviation", "EasterEve")},
+    "Easter Day": {"morning": ("service", "Principal Service"), None: ("service", "Evening Service")},
+    "Eve of The Nativity of our Lord Jesus Christ: Christmas Day": {None: ("service", "I")},
+    "The Nativity of Our Lord Jesus Christ: Christmas Day": {"morning": ("service", "II"), None: ("service", "III")},
+    "Eve of Palm Sunday": {None: ("service", "Liturgy of the Word")},
+    "Palm Sunday": {None: ("service", "Liturgy of the Word")},
+}
+
+# services that belong to the feast itself rather than to its eve
+EVE_EXCLUDED_SERVICES = ("II", "III", "Early Service", "Principal Service", "Evening Service")
+
+
+def _nulls_last(value):
+    return value is None, value or ""
+
+
+def _reading_sources(commemoration):
+    original = getattr(commemoration, "original_commemoration", None)
+    original_proper = getattr(commemoration, "original_proper", None)
+    proper = getattr(commemoration, "proper", None)
+    # copies made with ``BaseModel.copy`` clear the subclass pointer but keep the parent ``Commemoration`` key, so
+    # readings are matched on ``uuid`` rather than ``pk``
+    return original or commemoration, original_proper or proper or None
+
+
+class MassReadingIndex(object):
+    def __init__(self, calendar, readings, commons):
+        self.calendar = calendar
+        self.readings = list(readings)
+        self.texts_loaded = False
+        self.by_commemoration = defaultdict(list)
+        self.by_proper = defaultdict(list)
+        self.by_common = defaultdict(list)
+        for reading in self.readings:
+            if reading.commemoration_id:
+                self.by_commemoration[reading.commemoration_id].append(reading)
+            if reading.proper_id:
+                self.by_proper[reading.proper_id].append(reading)
+            if reading.common_id in commons:
+                self.by_common[commons[reading.common_id]].append(reading)
+
+    @classmethod
+    def load(cls, calendar):
+        commons = dict(Common.objects.values_list("pk", "abbreviation"))
+        readings = MassReading.objects.filter(calendar__abbreviation=calendar).defer(*TEXT_FIELDS)
+        return cls(calendar, readings, commons)
+
+    def with_texts(self, readings):
+        if readings and not self.texts_loaded:
+            texts = {
+                pk: texts
+                for pk, *texts in MassReading.objects.filter(calendar__abbreviation=self.calendar).values_list(
+                    "pk", *TEXT_FIELDS
+                )
+            }
+            for reading in self.readings:
+                reading.long_text, reading.short_text = texts.get(reading.pk, (None, None))
+            self.texts_loaded = True
+        return readings
+
+    def for_proper(self, proper, year):
+        readings = [reading for reading in self.by_proper[proper.pk] if year in reading.years]
+        return self.with_texts(sorted(readings, key=lambda reading: (reading.reading_number, reading.order)))
+
+    def for_commemoration(self, commemoration, year, time="morning"):
+        source, proper = _reading_sources(commemoration)
+        if proper:
+            readings = self.by_proper[proper.pk]
+        else:
+            readings = self.by_commemoration[source.uuid]
+        readings = [reading for reading in readings if year in reading.years]
+
+        if year in ["A", "C"] and time == "morning":
+            readings.sort(key=lambda reading: (reading.reading_number, -reading.order))
+        else:
+            readings.sort(key=lambda reading: (reading.reading_number, reading.order))
+
+        service_filter = SERVICE_FILTERS.get(commemoration.name)
+        if service_filter:
+            field, value = service_filter.get(time, service_filter.get(None))
+            readings = [reading for reading in readings if getattr(reading, field) == value]
+        return self.with_texts(readings)
+
+    def for_sanctorale(self, commemoration, year, time="morning"):
+        readings = self.for_commemoration(commemoration, year, time)
+        source, _ = _reading_sources(commemoration)
+        if not readings and getattr(source, "saint_type", None):
+            readings = self.with_texts(list(self.by_common[source.saint_type]))
+        return readings
+
+    def all_for_commemoration(self, commemoration, year):
+        source, proper = _reading_sources(commemoration)
+        if getattr(source, "saint_type", None):
+            readings = self.by_common[source.saint_type]
+        elif proper:
+            readings = [reading for reading in self.by_proper[proper.pk] if year in reading.years]
+        else:
+            readings = [reading for reading in self.by_commemoration[source.uuid] if year in reading.years]
+            if "Eve of" in source.name:
+                readings = [reading for reading in readings if reading.service not in EVE_EXCLUDED_SERVICES]
+
+        readings = sorted(
+            readings,
+            key=lambda reading: (
+                _nulls_last(reading.abbreviation),
+                reading.reading_number,
+                reading.order,
+                _nulls_last(reading.service),
+            ),
+        )
+        # the scripture texts are attached to copies so the shared index does not accumulate them
+        readings = [reading.clone() for reading in readings]
+        prefetch_related_objects(readings, "long_scripture", "short_scripture")
+        return readings
+
+
+def get_mass_reading_index(calendar):
+    # kept outside the LRU so the (large) indexes are never evicted to make room for church years; each is dropped
+    # when its calendar's generation changes or after INDEX_TIMEOUT
+    generation = local_cache.generation(calendar)
+    now = time.monotonic()
+    entry = _indexes.get(calendar)
+    if entry is None or entry[1] != generation or now - entry[2] > INDEX_TIMEOUT:
+        entry = _indexes[calendar] = (MassReadingIndex.load(calendar), generation, now)
+    return entry[0]
+
+
+def commemoration_mass_readings(calendar, commemoration, year, time="morning"):
+    return get_mass_reading_index(calendar).for_commemoration(commemoration, year, time)
+
+
+def sanctorale_mass_readings(calendar, commemoration, year, time="morning"):
+    return get_mass_reading_index(calendar).for_sanctorale(commemoration, year, time)
+
+
+def commemoration_all_mass_readings(calendar, commemoration, year):
+    return get_mass_reading_index(calendar).all_for_commemoration(commemoration, year)
+
+
+def proper_mass_readings(calendar, proper, year):
+    return get_mass_reading_index(calendar).for_proper(proper, year)
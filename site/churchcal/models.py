@@ -99,6 +99,8 @@ class Commemoration(BaseModel):
     def cannot_occur_after_subtype(self):
         if not self.cannot_occur_after:
             return None
+        if type(self.cannot_occur_after) is not Commemoration:
+            return self.cannot_occur_after
         return Commemoration.objects.get(pk=self.cannot_occur_after.pk)
 
     def initial_date_string(self, advent_year):
@@ -116,85 +118,14 @@ class Commemoration(BaseModel):
         return True
 
     def get_mass_readings_for_year(self, year, time="morning"):
-        commemoration = (
-            self.original_commemoration
-            if hasattr(self, "original_commemoration") and self.original_commemoration
-            else self
-        )
-        proper = (
-            self.original_proper
-            if hasattr(self, "original_proper") and self.original_proper
-            else self.proper
-            if hasattr(self, "proper") and self.proper
-            else None
-        )
-        if proper:
-            query = MassReading.objects.filter(years__contains=year, proper=proper).order_by("reading_number")
-        else:
-            query = MassReading.objects.filter(years__contains=year, commemoration=commemoration).order_by(
-                "reading_number"
-            )
-
-        if year in ["A", "C"] and time == "morning":
-            query = query.order_by("reading_number", "-order")
-        else:
-            query = query.order_by("reading_number", "order")
-
-        if self.name == "Eve of Easter Day":
-            query = query.filter(abbreviation="EasterEve")
-
-        if self.name == "Easter Day":
-            if time == "morning":
-                query = query.filter(service="Principal Service")
-            else:
-                query = query.filter(service="Evening Service")
-
-        if self.name == "Eve of The Nativity of our Lord Jesus Christ: Christmas Day":
-            query = query.filter(service="I")
-
-        if self.name == "The Nativity of Our Lord Jesus Christ: Christmas Day":
-            if time == "morning":
-                query = query.filter(service="II")
-            else:
-                query = query.fitler(service="III")
+        from churchcal.mass_readings import commemoration_mass_readings
 
-        if self.name in ["Eve of Palm Sunday", "Palm Sunday"]:
-            query = query.filter(service="Liturgy of the Word")
-
-        return query.all()
+        return commemoration_mass_readings(self.calendar.abbreviation, self, year, time)
 
     def get_all_mass_readings_for_year(self, year):
-        commemoration = (
-            self.original_commemoration
-            if hasattr(self, "original_commemoration") and self.original_commemoration
-            else self
-        )
-        proper = (
-            self.original_proper
-            if hasattr(self, "original_proper") and self.original_proper
-            else self.proper
-            if hasattr(self, "proper") and self.proper
-            else None
-        )
-        if hasattr(commemoration, "saint_type") and commemoration.saint_type:
-            query = MassReading.objects.filter(common__abbreviation=commemoration.saint_type).order_by(
-                "reading_number"
-            )
-        elif proper:
-            query = MassReading.objects.filter(years__contains=year, proper=proper).order_by("reading_number")
-        else:
-            query = MassReading.objects.filter(years__contains=year, commemoration=commemoration).order_by(
-                "reading_number"
-            )
-            if "Eve of" in commemoration.name:
-                query = query.exclude(
-                    service__in=["II", "III", "Early Service", "Principal Service", "Evening Service"]
-                )
-
-        query = query.order_by("abbreviation", "reading_number", "order", "service")
-        query = query.select_related("long_scripture", "short_scripture")
-        print(query.all())
-        return query.all()
+        from churchcal.mass_readings import commemoration_all_mass_readings
+
+        return commemoration_all_mass_readings(self.calendar.abbreviation, self, year)
 
     def __repr__(self):
         return "{} ({}) ({})".format(self.name, self.rank.formatted_name, self.color)
@@ -237,15 +168,9 @@ class SanctoraleCommemoration(Commemoration):
         return date(year, self.month, self.day)
 
     def get_mass_readings_for_year(self, year, time="morning"):
-        readings = super().get_mass_readings_for_year(year, time)
-        commemoration = (
-            self.original_commemoration
-            if hasattr(self, "original_commemoration") and self.original_commemoration
-            else self
-        )
-        if not readings and commemoration.saint_type:
-            readings = MassReading.objects.filter(common__abbreviation=commemoration.saint_type).all()
-        return readings
+        from churchcal.mass_readings import sanctorale_mass_readings
+
+        return sanctorale_mass_readings(self.calendar.abbreviation, self, year, time)
 
     def build_collect(self, text):
         if not self.common:
@@ -366,7 +291,9 @@ class Proper(BaseModel):
     calendar = models.ForeignKey(Calendar, on_delete=models.CASCADE, null=False, blank=False)
 
     def get_mass_readings_for_year(self, year):
-        return MassReading.objects.filter(years__contains=year, proper=self).order_by("reading_number", "order").all()
+        from churchcal.mass_readings import proper_mass_readings
+
+        return proper_mass_readings(self.calendar.abbreviation, self, year)
 
     def __repr__(self):
         return str(self.number)
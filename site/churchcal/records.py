@@ -0,0 +1,234 @@
+"""
+Slot-based commemorations for building a ``ChurchYear``.
+
+A ``CommemorationRecord`` holds what never changes while a year is resolved: the catalog commemoration's colors,
+collects, links and saint, and the model itself for the few methods that need it. Records are built once per
+``CalendarCatalog``, shared by every year built from it and cannot be assigned to. Each day holds
+``ResolvedCommemoration``s, which keep only the state the rules and ``CollectResolver`` change (name, rank, collects,
+propers, transfers) and read everything else from their record, so building a year no longer clones a model per
+commemoration or creates one per feria.
+"""
+from uuid import uuid4
+
+from churchcal.mass_readings import (
+    commemoration_all_mass_readings,
+    commemoration_mass_readings,
+    sanctorale_mass_readings,
+)
+
+
+class CommemorationRecord(object):
+    __slots__ = (
+        "model",
+        "uuid",
+        "pk",
+        "name",
+        "rank",
+        "color",
+        "additional_color",
+        "alternate_color",
+        "alternate_color_2",
+        "collect_1",
+        "collect_2",
+        "collect_eve",
+        "link_1",
+        "link_2",
+        "link_3",
+        "biography",
+        "image_link",
+        "saint_name",
+        "saint_type",
+        "saint_gender",
+        "sanctorale",
+        "feria",
+        "calendar",
+    )
+
+    def __init__(self, commemoration, calendar):
+        # ``calendar`` is the abbreviation of the catalog's calendar, which the mass readings are looked up in
+        from churchcal.models import SanctoraleCommemoration
+
+        self._set(
+            model=commemoration,
+            uuid=commemoration.uuid,
+            pk=commemoration.pk,
+            name=commemoration.name,
+            rank=commemoration.rank,
+            color=commemoration.color,
+            additional_color=commemoration.additional_color,
+            alternate_color=commemoration.alternate_color,
+            alternate_color_2=commemoration.alternate_color_2,
+            collect_1=commemoration.collect_1,
+            collect_2=commemoration.collect_2,
+            collect_eve=commemoration.collect_eve,
+            link_1=commemoration.link_1,
+            link_2=commemoration.link_2,
+            link_3=commemoration.link_3,
+            biography=commemoration.biography,
+            image_link=commemoration.image_link,
+            saint_name=getattr(commemoration, "saint_name", None),
+            saint_type=getattr(commemoration, "saint_type", None),
+            saint_gender=getattr(commemoration, "saint_gender", None),
+            sanctorale=isinstance(commemoration, SanctoraleCommemoration),
+            feria=False,
+            calendar=calendar,
+        )
+
+    @classmethod
+    def for_season(cls, season, calendar):
+        # the weekday of a season; like ``FerialCommemoration`` it is never saved, so its key matches nothing
+        record = cls.__new__(cls)
+        record._set(
+            model=None,
+            uuid=uuid4(),
+            pk=None,
+            name=season.rank.formatted_name,
+            rank=season.rank,
+            color=season.color,
+            additional_color=None,
+            alternate_color=season.alternate_color,
+            alternate_color_2=None,
+            collect_1=None,
+            collect_2=None,
+            collect_eve=None,
+            link_1=None,
+            link_2=None,
+            link_3=None,
+            biography=None,
+            image_link=None,
+            saint_name=None,
+            saint_type=None,
+            saint_gender=None,
+            sanctorale=False,
+            feria=True,
+            calendar=calendar,
+        )
+        return record
+
+    def _set(self, **values):
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        # records are shared by every year built from a catalog, so what a year changes belongs on its
+        # ``ResolvedCommemoration``
+        raise AttributeError("{} is immutable".format(type(self).__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError("{} is immutable".format(type(self).__name__))
+
+
+class ResolvedCommemoration(object):
+    # ``morning_prayer_collect`` and ``evening_prayer_collect`` stay unset until ``CollectResolver`` resolves them
+    __slots__ = (
+        "record",
+        "name",
+        "rank",
+        "alternate_color",
+        "alternate_color_2",
+        "transferred",
+        "morning_prayer_collect",
+        "evening_prayer_collect",
+        "collect_1",
+        "collect_2",
+        "collect_eve",
+        "proper",
+        "original_proper",
+        "original_commemoration",
+        "is_copy",
+    )
+
+    def __init__(self, record):
+        self.record = record
+        self.name = record.name
+        self.rank = record.rank
+        self.alternate_color = record.alternate_color
+        self.alternate_color_2 = record.alternate_color_2
+        self.transferred = False
+        self.collect_1 = record.collect_1
+        self.collect_2 = record.collect_2
+        self.collect_eve = record.collect_eve
+        self.proper = None
+        self.original_proper = None
+        self.original_commemoration = None
+        self.is_copy = False
+
+    def copy(self):
+        # copies (alternate Sundays and eves) keep the record but, like ``BaseModel.copy``, have no primary key
+        commemoration = ResolvedCommemoration.__new__(ResolvedCommemoration)
+        for name in self.__slots__:
+            if hasattr(self, name):
+                setattr(commemoration, name, getattr(self, name))
+        commemoration.is_copy = True
+        return commemoration
+
+    @property
+    def uuid(self):
+        return self.record.uuid
+
+    @property
+    def pk(self):
+        return None if self.is_copy else self.record.pk
+
+    @property
+    def color(self):
+        return self.record.color
+
+    @property
+    def additional_color(self):
+        return self.record.additional_color
+
+    @property
+    def link_1(self):
+        return self.record.link_1
+
+    @property
+    def link_2(self):
+        return self.record.link_2
+
+    @property
+    def link_3(self):
+        return self.record.link_3
+
+    @property
+    def biography(self):
+        return self.record.biography
+
+    @property
+    def image_link(self):
+        return self.record.image_link
+
+    @property
+    def saint_name(self):
+        return self.record.saint_name
+
+    @property
+    def saint_type(self):
+        return self.record.saint_type
+
+    @property
+    def saint_gender(self):
+        return self.record.saint_gender
+
+    @property
+    def name_no_tags(self):
+        from office.management.commands.import_collects import do_strip_tags
+
+        return do_strip_tags(self.name)
+
+    def common_collect(self):
+        return self.record.model.common_collect()
+
+    def get_mass_readings_for_year(self, year, time="morning"):
+        if self.record.sanctorale:
+            return sanctorale_mass_readings(self.record.calendar, self, year, time)
+        return commemoration_mass_readings(self.record.calendar, self, year, time)
+
+    def get_all_mass_readings_for_year(self, year):
+        return commemoration_all_mass_readings(self.record.calendar, self, year)
+
+    def __repr__(self):
+        return "{} ({}) ({})".format(self.name, self.rank.formatted_name, self.color)
+
+    def __str__(self):
+        return self.__repr__()
@@ -0,0 +1,101 @@
+"""
+Invalidates cached church years when the data they are built from changes.
+
+Every save or delete of a calendar model adds that calendar to the generations to bump once the transaction commits,
+so a transaction that saves many rows bumps each calendar once. The generation is part of every church year cache key,
+so the next request simply misses and rebuilds, and this worker's ``local_cache`` drops the entries of those
+calendars only. Collects are shared between calendars, so changing one bumps every calendar.
+"""
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from churchcal.catalog import CALENDARS_GENERATION, calendar_abbreviation, calendar_abbreviations
+from churchcal.local_cache import bump_generation, local_cache
+from churchcal.models import (
+    Calendar,
+    Commemoration,
+    CommemorationRank,
+    Common,
+    MassReading,
+    Proper,
+    SanctoraleBasedCommemoration,
+    SanctoraleCommemoration,
+    Season,
+    TemporaleCommemoration,
+)
+
+CALENDAR_MODELS = (
+    Commemoration,
+    SanctoraleCommemoration,
+    SanctoraleBasedCommemoration,
+    TemporaleCommemoration,
+    CommemorationRank,
+    Common,
+    MassReading,
+    Proper,
+    Season,
+)
+
+
+class PendingBumps(object):
+    # the generations to bump when the current transaction commits
+    def __init__(self):
+        self.names = set()
+
+    def __call__(self):
+        if getattr(_pending, "bumps", None) is self:
+            _pending.bumps = None
+        for name in self.names:
+            bump_generation(name)
+        # make this worker notice the new generations immediately
+        local_cache.check_generations()
+
+
+_pending = threading.local()
+
+
+def bump_generations(names):
+    # the names are added to the batch already registered in this (sub)transaction; a batch whose callback was
+    # dropped by a rollback is replaced by a new one
+    connection = transaction.get_connection()
+    bumps = getattr(_pending, "bumps", None)
+    savepoint_ids = set(connection.savepoint_ids)
+    if (
+        bumps is None
+        or not connection.in_atomic_block
+        or not any(callback[1] is bumps and callback[0] == savepoint_ids for callback in connection.run_on_commit)
+    ):
+        bumps = _pending.bumps = PendingBumps()
+        bumps.names.update(names)
+        # runs at once outside a transaction
+        transaction.on_commit(bumps)
+    else:
+        bumps.names.update(names)
+
+
+def calendar_changed(sender, instance, **kwargs):
+    calendar = calendar_abbreviation(instance.calendar_id)
+    if calendar:
+        bump_generations([calendar])
+    else:
+        all_calendars_changed(sender, instance, **kwargs)
+
+
+def all_calendars_changed(sender, instance, **kwargs):
+    bump_generations(calendar_abbreviations())
+
+
+def own_calendar_changed(sender, instance, **kwargs):
+    bump_generations([instance.abbreviation, CALENDARS_GENERATION])
+
+
+for model in CALENDAR_MODELS:
+    post_save.connect(calendar_changed, sender=model, dispatch_uid="churchcal_invalidate_{}".format(model.__name__))
+    post_delete.connect(calendar_changed, sender=model, dispatch_uid="churchcal_invalidate_{}".format(model.__name__))
+
+post_save.connect(own_calendar_changed, sender=Calendar, dispatch_uid="churchcal_invalidate_Calendar")
+post_delete.connect(own_calendar_changed, sender=Calendar, dispatch_uid="churchcal_invalidate_Calendar")
+post_save.connect(all_calendars_changed, sender="office.Collect", dispatch_uid="churchcal_invalidate_Collect")
+post_delete.connect(all_calendars_changed, sender="office.Collect", dispatch_uid="churchcal_invalidate_Collect")
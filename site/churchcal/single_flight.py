@@ -0,0 +1,112 @@
+"""
+Django cache entries that are (re)built by one process at a time.
+
+Values are stored as ``(refresh_at, value)`` with a soft timeout inside the cache's (hard) timeout. Once the soft
+timeout has passed, the first request to take the entry's lock rebuilds it in a background thread, while it and
+every other request keep being served the stored value. When there is no value at all, one request builds it and the
+others either get the value last stored under ``stale_key`` or wait for the build to finish, so a cold or expired
+key never starts more than one build at a time.
+"""
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+LOCK_TIMEOUT = 60
+WAIT_INTERVAL = 0.05
+
+_stats_lock = threading.Lock()
+stats = {"builds": 0, "refreshes": 0, "stale": 0, "waits": 0}
+
+
+def _count(name):
+    with _stats_lock:
+        stats[name] += 1
+
+
+def get_stats():
+    with _stats_lock:
+        return dict(stats)
+
+
+def lock_key(key):
+    return "lock:{}".format(key)
+
+
+def acquire(key, timeout=LOCK_TIMEOUT):
+    return cache.add(lock_key(key), True, timeout)
+
+
+def release(key):
+    cache.delete(lock_key(key))
+
+
+def _store(key, build, soft_timeout, hard_timeout, stale_key):
+    _count("builds")
+    value = build()
+    refresh_at = time.time() + soft_timeout if soft_timeout is not None else None
+    entries = {key: (refresh_at, value)}
+    if stale_key:
+        entries[stale_key] = (refresh_at, value)
+    cache.set_many(entries, hard_timeout)
+    return value
+
+
+def _store_locked(key, build, soft_timeout, hard_timeout, stale_key):
+    try:
+        # the value may have been stored between the caller's miss and taking the lock
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[1]
+        return _store(key, build, soft_timeout, hard_timeout, stale_key)
+    finally:
+        release(key)
+
+
+def _refresh(key, build, soft_timeout, hard_timeout, stale_key):
+    try:
+        _count("refreshes")
+        _store(key, build, soft_timeout, hard_timeout, stale_key)
+    except Exception:
+        logger.exception("Refreshing %s failed", key)
+    finally:
+        release(key)
+        connections.close_all()
+
+
+def get_or_build(key, build, soft_timeout=None, hard_timeout=None, stale_key=None):
+    # returns ``(value, stale)``, where ``stale`` is True for a value served from ``stale_key``
+    entry = cache.get(key)
+    if entry is not None:
+        refresh_at, value = entry
+        if refresh_at is not None and refresh_at <= time.time() and acquire(key):
+            threading.Thread(
+                target=_refresh, args=(key, build, soft_timeout, hard_timeout, stale_key), daemon=True
+            ).start()
+        return value, False
+
+    if acquire(key):
+        return _store_locked(key, build, soft_timeout, hard_timeout, stale_key), False
+
+    if stale_key:
+        entry = cache.get(stale_key)
+        if entry is not None:
+            _count("stale")
+            return entry[1], True
+
+    _count("waits")
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[1], False
+        # the build holding the lock failed, so the next waiter to get the lock takes over
+        if acquire(key):
+            return _store_locked(key, build, soft_timeout, hard_timeout, stale_key), False
+
+    return _store(key, build, soft_timeout, hard_timeout, stale_key), False
@@ -0,0 +1,702 @@
+"""
+Compact, model-free snapshots of a fully resolved ``ChurchYear``.
+
+A built ``ChurchYear`` holds commemoration records and Django model instances (ranks, seasons, propers and collects)
+for every day, which makes it large to cache and slow to unpickle. A ``ChurchYearSnapshot`` flattens the resolved
+year into tuples of primitives and hydrates lightweight, read-only day objects on demand.
+"""
+import pickle
+import threading
+import zlib
+from datetime import date as date_type, timedelta
+from uuid import UUID, uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from indexed import IndexedOrderedDict
+
+from churchcal import single_flight
+from churchcal.calculations import BaseCalendarDate, BaseChurchYear, ChurchYear, to_date
+from churchcal.catalog import get_catalog
+from churchcal.local_cache import local_cache
+from churchcal.mass_readings import (
+    commemoration_all_mass_readings,
+    commemoration_mass_readings,
+    proper_mass_readings,
+    sanctorale_mass_readings,
+)
+from churchcal.utils import advent_year
+
+SNAPSHOT_VERSION = 3
+DEFAULT_CALENDAR = "ACNA_BCP2019"
+# keys include the calendar's generation, which changes whenever its data is edited through the models; years are
+# still rebuilt (in the background) after SOFT_TIMEOUT to pick up edits made around the signals, e.g. by imports
+SOFT_TIMEOUT = 60 * 60 * 12
+CACHE_TIMEOUT = 60 * 60 * 24 * 7
+# cold requests for single dates resolve a church year only as far as they need (see ``lazy_snapshot_date``)
+LAZY_YEARS = getattr(settings, "CHURCHCAL_LAZY_YEARS", True)
+# roughly what a fully resolved ``ChurchYear`` keeps in memory, for sizing it in the local cache
+LAZY_YEAR_SIZE = 512 * 1024
+
+_lazy_lock = threading.Lock()
+
+# day tuple
+DAY_SEASON = 0
+DAY_EVENING_SEASON = 1
+DAY_REQUIRED = 2
+DAY_OPTIONAL = 3
+DAY_EVENING_REQUIRED = 4
+DAY_EVENING_OPTIONAL = 5
+DAY_PROPER = 6
+DAY_FAST = 7
+DAY_FAST_REASONS = 8
+
+# commemoration record tuple
+RECORD_BASE = 0
+RECORD_NAME = 1
+RECORD_RANK = 2
+RECORD_COLORS = 3
+RECORD_TRANSFERRED = 4
+RECORD_MORNING_COLLECT = 5
+RECORD_EVENING_COLLECT = 6
+RECORD_COLLECT_1 = 7
+RECORD_COLLECT_2 = 8
+RECORD_COLLECT_EVE = 9
+RECORD_PROPER = 10
+RECORD_ORIGINAL_PROPER = 11
+RECORD_ORIGINAL_COMMEMORATION = 12
+RECORD_IS_COPY = 13
+
+
+class _Table(object):
+    def __init__(self, interned):
+        self.rows = []
+        self.index = {}
+        self.interned = interned
+
+    def add(self, key, row):
+        if key not in self.index:
+            self.index[key] = len(self.rows)
+            self.rows.append(self.intern(row))
+        return self.index[key]
+
+    def intern(self, value):
+        # equal values share one object so pickle's memo writes each string and tuple only once
+        if isinstance(value, tuple):
+            value = tuple(self.intern(item) for item in value)
+        elif not isinstance(value, str):
+            return value
+        return self.interned.setdefault((type(value), value), value)
+
+
+def _uuid(value):
+    return UUID(bytes=value) if value else None
+
+
+class SnapshotRank(object):
+    __slots__ = ("pk", "name", "formatted_name", "precedence_rank", "required")
+
+    def __init__(self, row):
+        pk, self.name, self.formatted_name, self.precedence_rank, self.required = row
+        self.pk = _uuid(pk)
+
+    def __str__(self):
+        return self.formatted_name
+
+
+class SnapshotSeason(object):
+    __slots__ = ("pk", "name", "color", "alternate_color", "order")
+
+    def __init__(self, row):
+        pk, self.name, self.color, self.alternate_color, self.order = row
+        self.pk = _uuid(pk)
+
+    def __repr__(self):
+        return self.name
+
+
+class SnapshotProper(object):
+    __slots__ = ("pk", "number", "collect_1", "calendar_abbreviation")
+
+    def __init__(self, row, collect, calendar_abbreviation):
+        pk, self.number, collect_1 = row
+        self.pk = _uuid(pk)
+        self.collect_1 = collect(collect_1)
+        self.calendar_abbreviation = calendar_abbreviation
+
+    def get_mass_readings_for_year(self, year):
+        return proper_mass_readings(self.calendar_abbreviation, self, year)
+
+    def __repr__(self):
+        return str(self.number)
+
+
+class SnapshotCommemoration(object):
+    __slots__ = (
+        "uuid",
+        "pk",
+        "name",
+        "rank",
+        "color",
+        "additional_color",
+        "alternate_color",
+        "alternate_color_2",
+        "transferred",
+        "morning_prayer_collect",
+        "evening_prayer_collect",
+        "collect_1",
+        "collect_2",
+        "collect_eve",
+        "proper",
+        "original_proper",
+        "original_commemoration",
+        "link_1",
+        "link_2",
+        "link_3",
+        "biography",
+        "image_link",
+        "saint_name",
+        "saint_type",
+        "saint_gender",
+        "sanctorale",
+        "calendar_abbreviation",
+    )
+
+    def __init__(self, snapshot, row):
+        base = snapshot.commemorations[row[RECORD_BASE]] if row[RECORD_BASE] is not None else None
+        if base:
+            key, links, self.biography, self.image_link, saint, self.sanctorale = base
+            self.uuid = _uuid(key)
+            self.link_1, self.link_2, self.link_3 = links
+            self.saint_name, self.saint_type, self.saint_gender = saint
+        else:
+            # ferias are never saved, so like their ``CommemorationRecord`` they get a key that matches nothing
+            self.uuid = uuid4()
+            self.link_1 = self.link_2 = self.link_3 = None
+            self.biography = self.image_link = self.saint_name = self.saint_type = self.saint_gender = None
+            self.sanctorale = False
+        self.pk = None if row[RECORD_IS_COPY] or not base else self.uuid
+
+        self.name = row[RECORD_NAME]
+        self.rank = snapshot.rank(row[RECORD_RANK])
+        self.color, self.additional_color, self.alternate_color, self.alternate_color_2 = row[RECORD_COLORS]
+        self.transferred = row[RECORD_TRANSFERRED]
+        self.morning_prayer_collect = snapshot.collect(row[RECORD_MORNING_COLLECT])
+        self.evening_prayer_collect = snapshot.collect(row[RECORD_EVENING_COLLECT])
+        self.collect_1 = snapshot.collect(row[RECORD_COLLECT_1])
+        self.collect_2 = snapshot.collect(row[RECORD_COLLECT_2])
+        self.collect_eve = snapshot.collect(row[RECORD_COLLECT_EVE])
+        self.proper = snapshot.proper(row[RECORD_PROPER])
+        self.original_proper = snapshot.proper(row[RECORD_ORIGINAL_PROPER])
+        self.original_commemoration = snapshot.record(row[RECORD_ORIGINAL_COMMEMORATION])
+        self.calendar_abbreviation = snapshot.calendar_abbreviation
+
+    @property
+    def name_no_tags(self):
+        from office.management.commands.import_collects import do_strip_tags
+
+        return do_strip_tags(self.name)
+
+    def get_mass_readings_for_year(self, year, time="morning"):
+        if self.sanctorale:
+            return sanctorale_mass_readings(self.calendar_abbreviation, self, year, time)
+        return commemoration_mass_readings(self.calendar_abbreviation, self, year, time)
+
+    def get_all_mass_readings_for_year(self, year):
+        return commemoration_all_mass_readings(self.calendar_abbreviation, self, year)
+
+    def __repr__(self):
+        return "{} ({}) ({})".format(self.name, self.rank.formatted_name, self.color)
+
+    def __str__(self):
+        return self.__repr__()
+
+
+class SnapshotDate(BaseCalendarDate):
+    def __init__(self, snapshot, index, row):
+        self.year = snapshot
+        self.date = snapshot.start_date + timedelta(days=index)
+        self.season = snapshot.season(row[DAY_SEASON])
+        self.evening_season = snapshot.season(row[DAY_EVENING_SEASON])
+        self.required = [snapshot.record(record) for record in row[DAY_REQUIRED]]
+        self.optional = [snapshot.record(record) for record in row[DAY_OPTIONAL]]
+        if row[DAY_EVENING_REQUIRED] is not None:
+            self.evening_required = [snapshot.record(record) for record in row[DAY_EVENING_REQUIRED]]
+        if row[DAY_EVENING_OPTIONAL] is not None:
+            self.evening_optional = [snapshot.record(record) for record in row[DAY_EVENING_OPTIONAL]]
+        self.primary = self.required[0] if self.required else self.optional[0]
+        self.proper = snapshot.proper(row[DAY_PROPER])
+        self.fast_day = row[DAY_FAST]
+        self.fast_day_reasons = list(row[DAY_FAST_REASONS])
+        self.finalized = True
+
+    @property
+    def calendar(self):
+        return self.year.calendar
+
+    def __repr__(self):
+        return "{} {} - {}".format(
+            self.date.strftime("%A"),
+            str(self.date),
+            " | ".join(["{} {}".format(commemoration.name, commemoration.rank.name) for commemoration in self.all]),
+        )
+
+
+class ChurchYearSnapshot(BaseChurchYear):
+    def __init__(self, state):
+        (
+            version,
+            self.calendar_abbreviation,
+            self.start_year,
+            start_ordinal,
+            self.ranks,
+            self.seasons,
+            self.propers,
+            self.collects,
+            self.commemorations,
+            self.records,
+            self.days,
+        ) = state
+        self.end_year = self.start_year + 1
+        self.start_date = date_type.fromordinal(start_ordinal)
+        self.end_date = self.start_date + timedelta(days=len(self.days) - 1)
+        self._reset()
+
+    def _reset(self):
+        self.__dict__.pop("calendar", None)
+        self._ranks = {}
+        self._seasons = {}
+        self._propers = {}
+        self._records = {}
+        self._dates = {}
+        self._collect_instances = None
+
+    @property
+    def state(self):
+        return (
+            SNAPSHOT_VERSION,
+            self.calendar_abbreviation,
+            self.start_year,
+            self.start_date.toordinal(),
+            self.ranks,
+            self.seasons,
+            self.propers,
+            self.collects,
+            self.commemorations,
+            self.records,
+            self.days,
+        )
+
+    # the cached form is the compressed state only; hydrated objects are rebuilt lazily after loading
+
+    def __getstate__(self):
+        return SNAPSHOT_VERSION, zlib.compress(pickle.dumps(self.state, pickle.HIGHEST_PROTOCOL))
+
+    def __setstate__(self, state):
+        version, data = state
+        if version != SNAPSHOT_VERSION:
+            raise ValueError("Unsupported church year snapshot version {}".format(version))
+        self.__init__(pickle.loads(zlib.decompress(data)))
+
+    @classmethod
+    def from_church_year(cls, church_year):
+        return cls(SnapshotBuilder(church_year).build())
+
+    @cached_property
+    def nbytes(self):
+        return len(pickle.dumps(self.state, pickle.HIGHEST_PROTOCOL))
+
+    @cached_property
+    def calendar(self):
+        from churchcal.models import Calendar
+
+        return Calendar.objects.filter(abbreviation=self.calendar_abbreviation).first()
+
+    # hydration
+
+    def rank(self, index):
+        if index is None:
+            return None
+        if index not in self._ranks:
+            self._ranks[index] = SnapshotRank(self.ranks[index])
+        return self._ranks[index]
+
+    def season(self, index):
+        if index is None:
+            return None
+        if index not in self._seasons:
+            self._seasons[index] = SnapshotSeason(self.seasons[index])
+        return self._seasons[index]
+
+    def proper(self, index):
+        if index is None:
+            return None
+        if index not in self._propers:
+            self._propers[index] = SnapshotProper(self.propers[index], self.collect, self.calendar_abbreviation)
+        return self._propers[index]
+
+    def record(self, index):
+        if index is None:
+            return None
+        if index not in self._records:
+            self._records[index] = SnapshotCommemoration(self, self.records[index])
+        return self._records[index]
+
+    def collect(self, index):
+        if index is None:
+            return None
+        entry = self.collects[index]
+        if isinstance(entry, tuple):
+            from office.models import AbstractCollect
+
+            return AbstractCollect(text=entry[0], traditional_text=entry[1])
+        if self._collect_instances is None:
+            from office.models import Collect
+
+            keys = [UUID(bytes=key) for key in self.collects if not isinstance(key, tuple)]
+            self._collect_instances = {pk.bytes: collect for pk, collect in Collect.objects.in_bulk(keys).items()}
+        return self._collect_instances.get(entry)
+
+    # ChurchYear interface
+
+    def __len__(self):
+        return len(self.days)
+
+    def __iter__(self):
+        for index in range(len(self.days)):
+            yield self.get_by_index(index)
+
+    def get_by_index(self, index):
+        if index not in self._dates:
+            self._dates[index] = SnapshotDate(self, index, self.days[index])
+        return self._dates[index]
+
+    def get_date(self, date_string):
+        date = to_date(date_string)
+        index = date.toordinal() - self.start_date.toordinal()
+        if index < 0 or index >= len(self.days):
+            return None
+        return self.get_by_index(index)
+
+    @property
+    def dates(self):
+        return IndexedOrderedDict((day.date.strftime("%Y-%m-%d"), day) for day in self)
+
+    def slice(self, start, stop):
+        return ChurchYearSnapshot(SnapshotSlicer(self).build(start, stop))
+
+    def slice_date(self, date_string):
+        date = to_date(date_string)
+        index = date.toordinal() - self.start_date.toordinal()
+        if index < 0 or index >= len(self.days):
+            return None
+        return self.slice(index, index + 1)
+
+
+class SnapshotSlicer(object):
+    """Copies a range of days out of a snapshot, keeping only the table rows those days reference."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.tables = {
+            name: ({}, []) for name in ("ranks", "seasons", "propers", "collects", "commemorations", "records", "days")
+        }
+
+    def build(self, start, stop):
+        days = tuple(self.day(self.snapshot.days[index]) for index in range(start, stop))
+        return (
+            SNAPSHOT_VERSION,
+            self.snapshot.calendar_abbreviation,
+            self.snapshot.start_year,
+            self.snapshot.start_date.toordinal() + start,
+            tuple(self.tables["ranks"][1]),
+            tuple(self.tables["seasons"][1]),
+            tuple(self.tables["propers"][1]),
+            tuple(self.tables["collects"][1]),
+            tuple(self.tables["commemorations"][1]),
+            tuple(self.tables["records"][1]),
+            days,
+        )
+
+    def copy(self, table, index, convert=None):
+        if index is None:
+            return None
+        mapping, rows = self.tables[table]
+        if index not in mapping:
+            row = getattr(self.snapshot, table)[index]
+            if convert:
+                row = convert(row)
+            mapping[index] = len(rows)
+            rows.append(row)
+        return mapping[index]
+
+    def day(self, row):
+        return (
+            self.copy("seasons", row[DAY_SEASON]),
+            self.copy("seasons", row[DAY_EVENING_SEASON]),
+            self.record_list(row[DAY_REQUIRED]),
+            self.record_list(row[DAY_OPTIONAL]),
+            self.record_list(row[DAY_EVENING_REQUIRED]),
+            self.record_list(row[DAY_EVENING_OPTIONAL]),
+            self.copy("propers", row[DAY_PROPER], self.proper),
+            row[DAY_FAST],
+            row[DAY_FAST_REASONS],
+        )
+
+    def proper(self, row):
+        pk, number, collect_1 = row
+        return pk, number, self.copy("collects", collect_1)
+
+    def record(self, row):
+        return (
+            self.copy("commemorations", row[RECORD_BASE]),
+            row[RECORD_NAME],
+            self.copy("ranks", row[RECORD_RANK]),
+            row[RECORD_COLORS],
+            row[RECORD_TRANSFERRED],
+            self.copy("collects", row[RECORD_MORNING_COLLECT]),
+            self.copy("collects", row[RECORD_EVENING_COLLECT]),
+            self.copy("collects", row[RECORD_COLLECT_1]),
+            self.copy("collects", row[RECORD_COLLECT_2]),
+            self.copy("collects", row[RECORD_COLLECT_EVE]),
+            self.copy("propers", row[RECORD_PROPER], self.proper),
+            self.copy("propers", row[RECORD_ORIGINAL_PROPER], self.proper),
+            self.copy("records", row[RECORD_ORIGINAL_COMMEMORATION], self.record),
+            row[RECORD_IS_COPY],
+        )
+
+    def record_list(self, records):
+        if records is None:
+            return None
+        return tuple(self.copy("records", record, self.record) for record in records)
+
+
+class SnapshotBuilder(object):
+    def __init__(self, church_year):
+        self.church_year = church_year
+        interned = {}
+        self.ranks = _Table(interned)
+        self.seasons = _Table(interned)
+        self.propers = _Table(interned)
+        self.collects = _Table(interned)
+        self.commemorations = _Table(interned)
+        self.records = _Table(interned)
+        self.days = _Table(interned)
+
+    def build(self, start=0, stop=None):
+        # a range of days can be built from a lazy church year once it has resolved them (see ``lazy_snapshot_date``)
+        days = tuple(
+            self.days.intern(self.day(calendar_date)) for calendar_date in self.church_year.calendar_dates[start:stop]
+        )
+        return (
+            SNAPSHOT_VERSION,
+            self.church_year.calendar.abbreviation,
+            self.church_year.start_year,
+            self.church_year.start_date.toordinal() + start,
+            tuple(self.ranks.rows),
+            tuple(self.seasons.rows),
+            tuple(self.propers.rows),
+            tuple(self.collects.rows),
+            tuple(self.commemorations.rows),
+            tuple(self.records.rows),
+            days,
+        )
+
+    def day(self, calendar_date):
+        evening_required = getattr(calendar_date, "evening_required", None)
+        evening_optional = getattr(calendar_date, "evening_optional", None)
+        return (
+            self.season(calendar_date.season),
+            self.season(calendar_date.evening_season),
+            self.record_list(calendar_date.required),
+            self.record_list(calendar_date.optional),
+            self.record_list(evening_required) if evening_required is not None else None,
+            self.record_list(evening_optional) if evening_optional is not None else None,
+            self.proper(calendar_date.proper),
+            calendar_date.fast_day,
+            tuple(calendar_date.fast_day_reasons),
+        )
+
+    def rank(self, rank):
+        if rank is None:
+            return None
+        return self.ranks.add(
+            rank.pk, (rank.pk.bytes, rank.name, rank.formatted_name, rank.precedence_rank, rank.required)
+        )
+
+    def season(self, season):
+        if season is None:
+            return None
+        return self.seasons.add(
+            season.pk, (season.pk.bytes, season.name, season.color, season.alternate_color, season.order)
+        )
+
+    def proper(self, proper):
+        if proper is None:
+            return None
+        return self.propers.add(proper.pk, (proper.pk.bytes, proper.number, self.collect(proper.collect_1)))
+
+    def collect(self, collect):
+        if collect is None:
+            return None
+        if getattr(collect, "pk", None):
+            return self.collects.add(collect.pk.bytes, collect.pk.bytes)
+        entry = (collect.text, collect.traditional_text)
+        return self.collects.add(entry, entry)
+
+    def commemoration(self, record):
+        if record.feria:
+            return None
+        return self.commemorations.add(
+            record.uuid,
+            (
+                record.uuid.bytes,
+                (record.link_1, record.link_2, record.link_3),
+                record.biography,
+                record.image_link,
+                (record.saint_name, record.saint_type, record.saint_gender),
+                record.sanctorale,
+            ),
+        )
+
+    def record(self, commemoration):
+        if commemoration is None:
+            return None
+        row = (
+            self.commemoration(commemoration.record),
+            commemoration.name,
+            self.rank(commemoration.rank),
+            (
+                commemoration.color,
+                commemoration.additional_color,
+                commemoration.alternate_color,
+                commemoration.alternate_color_2,
+            ),
+            commemoration.transferred,
+            self.collect(getattr(commemoration, "morning_prayer_collect", None)),
+            self.collect(getattr(commemoration, "evening_prayer_collect", None)),
+            self.collect(commemoration.collect_1),
+            self.collect(commemoration.collect_2),
+            self.collect(commemoration.collect_eve),
+            self.proper(commemoration.proper),
+            self.proper(commemoration.original_proper),
+            self.record(commemoration.original_commemoration),
+            commemoration.is_copy,
+        )
+        return self.records.add(row, row)
+
+    def record_list(self, commemorations):
+        return tuple(self.record(commemoration) for commemoration in commemorations)
+
+
+def cache_key(year, calendar=DEFAULT_CALENDAR):
+    return "church_year_snapshot:{}:{}:{}:{}".format(
+        SNAPSHOT_VERSION, calendar, local_cache.generation(calendar), year
+    )
+
+
+def date_cache_key(date, calendar=DEFAULT_CALENDAR):
+    return "church_year_snapshot:{}:{}:{}:date:{}".format(
+        SNAPSHOT_VERSION, calendar, local_cache.generation(calendar), date.strftime("%Y-%m-%d")
+    )
+
+
+def lazy_cache_key(year, calendar=DEFAULT_CALENDAR):
+    return "church_year_lazy:{}:{}:{}".format(calendar, local_cache.generation(calendar), year)
+
+
+def stale_cache_key(year, calendar=DEFAULT_CALENDAR):
+    # the last snapshot stored for the year, whatever its generation
+    return "church_year_snapshot:{}:{}:latest:{}".format(SNAPSHOT_VERSION, calendar, year)
+
+
+def cache_dates(snapshot):
+    calendar = snapshot.calendar_abbreviation
+    cache.set_many(
+        {date_cache_key(day.date, calendar): snapshot.slice(index, index + 1) for index, day in enumerate(snapshot)},
+        CACHE_TIMEOUT,
+    )
+
+
+def build_church_year_snapshot(year, calendar=DEFAULT_CALENDAR):
+    snapshot = ChurchYearSnapshot.from_church_year(ChurchYear(year, calendar, catalog=get_catalog(calendar)))
+    cache_dates(snapshot)
+    return snapshot
+
+
+def church_year_snapshot(year, calendar=DEFAULT_CALENDAR):
+    # returns ``(snapshot, stale)``; a stale snapshot belongs to an earlier generation and is only served while the
+    # current one is being built, so it is never cached under a current key
+    year = int(year)
+    key = cache_key(year, calendar)
+    snapshot = local_cache.get(key)
+    if snapshot is not None:
+        return snapshot, False
+    snapshot, stale = single_flight.get_or_build(
+        key,
+        lambda: build_church_year_snapshot(year, calendar),
+        SOFT_TIMEOUT,
+        CACHE_TIMEOUT,
+        stale_cache_key(year, calendar),
+    )
+    if not stale:
+        local_cache.set(key, snapshot, snapshot.nbytes, generations=(calendar,))
+    return snapshot, stale
+
+
+def get_church_year_snapshot(year, calendar=DEFAULT_CALENDAR):
+    return church_year_snapshot(year, calendar)[0]
+
+
+def lazy_snapshot_date(date, calendar=DEFAULT_CALENDAR):
+    # resolves this worker's lazy church year up to the date (and the day after, for its evening) and snapshots just
+    # that day; later dates carry on from where earlier ones stopped, and once every day has been resolved the year
+    # is stored as a full snapshot and the lazy one dropped
+    year = advent_year(date)
+    key = lazy_cache_key(year, calendar)
+    with _lazy_lock:
+        church_year = local_cache.get(key)
+        if church_year is None:
+            church_year = ChurchYear(year, calendar, catalog=get_catalog(calendar), lazy=True)
+            local_cache.set(key, church_year, LAZY_YEAR_SIZE, generations=(calendar,))
+        index = date.toordinal() - church_year.start_ordinal
+        church_year.resolve_through(index)
+        snapshot = ChurchYearSnapshot(SnapshotBuilder(church_year).build(index, index + 1))
+        complete = church_year.resolved == len(church_year.calendar_dates)
+        if complete:
+            local_cache.delete(key)
+
+    if complete:
+
+        def build():
+            full_snapshot = ChurchYearSnapshot.from_church_year(church_year)
+            cache_dates(full_snapshot)
+            return full_snapshot
+
+        single_flight.get_or_build(
+            cache_key(year, calendar), build, SOFT_TIMEOUT, CACHE_TIMEOUT, stale_cache_key(year, calendar)
+        )
+    return snapshot
+
+
+def get_snapshot_date(date_string, calendar=DEFAULT_CALENDAR):
+    date = to_date(date_string)
+    key = date_cache_key(date, calendar)
+    calendar_date = local_cache.get(key)
+    if calendar_date is None:
+        snapshot = cache.get(key)
+        stale = False
+        if snapshot is None:
+            year_key = cache_key(advent_year(date), calendar)
+            if LAZY_YEARS and local_cache.get(year_key) is None and not cache.has_key(year_key):
+                snapshot = lazy_snapshot_date(date, calendar)
+            else:
+                church_year, stale = church_year_snapshot(advent_year(date), calendar)
+                snapshot = church_year.slice_date(date)
+            if not stale:
+                cache.set(key, snapshot, CACHE_TIMEOUT)
+        calendar_date = snapshot.get_by_index(0)
+        if not stale:
+            local_cache.set(key, calendar_date, snapshot.nbytes, generations=(calendar,))
+    return calendar_date
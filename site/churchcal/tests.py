@@ -0,0 +1,603 @@
+import csv
+import io
+import json
+import os
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from delorean import Delorean
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from churchcal import single_flight
+from churchcal.api.payloads import day_payload, encode
+from churchcal.api.views import (
+    MAX_FACTS_YEARS,
+    CacheStatsView,
+    DayView,
+    FactsView,
+    MonthView,
+    RangeView,
+    YearView,
+    get_calendar_year,
+)
+from churchcal.calculations import ChurchYear, get_calendar_date
+from churchcal.catalog import PROPER_YEAR, clear_catalogs, get_catalog
+from churchcal.local_cache import local_cache
+from churchcal.management.commands.calendar_golden import day_golden
+from churchcal.mass_readings import MassReadingIndex
+from churchcal.snapshot import ChurchYearSnapshot, SnapshotBuilder, lazy_snapshot_date
+from churchcal.records import ResolvedCommemoration
+from churchcal.models import Calendar, CommemorationRank, MassReading, Proper, SanctoraleCommemoration
+from churchcal.utils import (
+    FIRST_TABLE_YEAR,
+    LAST_TABLE_YEAR,
+    WEEKDAY_NUMBERS,
+    advent,
+    advent_year,
+    compute_advent,
+    weekday_after,
+)
+from churchcal.year_range import ChurchYearRange
+
+FIXTURE_CALENDAR = "ACNA_BCP2019"
+# written with ``manage.py calendar_golden churchcal/golden/bench_calendar.json --write`` from the bench_calendar
+# fixture by the church year engine as it was before the catalog and snapshots, for church years 2010 to 2039
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), "golden", "bench_calendar.json")
+GOLDEN_YEARS = range(2010, 2040)
+
+
+class CacheStatsViewTestCase(TestCase):
+    def get(self, user=None):
+        request = APIRequestFactory().get("/api/v1/calendar/cache_stats")
+        if user:
+            force_authenticate(request, user=user)
+        return CacheStatsView.as_view()(request)
+
+    def test_requires_staff(self):
+        self.assertEqual(self.get().status_code, 403)
+        self.assertEqual(self.get(User.objects.create_user("reader")).status_code, 403)
+
+    def test_returns_the_worker_cache_stats(self):
+        response = self.get(User.objects.create_user("staff", is_staff=True))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("hit_rate", response.data["local_cache"])
+        self.assertEqual(set(response.data["single_flight"]), {"builds", "refreshes", "stale", "waits"})
+
+
+class ChurchYearQueriesTestCase(TestCase):
+    fixtures = ["bench_calendar"]
+
+    def setUp(self):
+        clear_catalogs()
+
+    def tearDown(self):
+        clear_catalogs()
+
+    def build_years(self, count):
+        catalog = get_catalog(FIXTURE_CALENDAR)
+        for year in range(2010, 2010 + count):
+            ChurchYear(year, FIXTURE_CALENDAR, catalog=catalog)
+
+    def test_building_years_loads_the_catalog_once(self):
+        # the queries all load the catalog, however many years are built from it
+        for count in (1, 10, 50):
+            with self.subTest(years=count):
+                clear_catalogs()
+                with self.assertNumQueries(7):
+                    self.build_years(count)
+
+    def test_propers_after_pentecost_make_no_queries(self):
+        church_year = ChurchYear(2022, FIXTURE_CALENDAR, catalog=get_catalog(FIXTURE_CALENDAR))
+        days = [day for day in church_year if day.season.name == "Season After Pentecost"]
+        self.assertGreater(len(days), 150)
+        with self.assertNumQueries(0):
+            propers = [day._find_proper() for day in days]
+
+        for day, proper in zip(days, propers):
+            # the proper of the day's Sunday, as it was queried for every day before the catalog held them
+            sunday = day.date - timedelta(days=(day.date.weekday() + 1) % 7)
+            date_in_proper_year = date(PROPER_YEAR, sunday.month, sunday.day)
+            expected = Proper.objects.filter(
+                calendar__abbreviation=FIXTURE_CALENDAR,
+                start_date__lte=date_in_proper_year,
+                end_date__gte=date_in_proper_year,
+            ).first()
+            self.assertIsNotNone(proper, day.date)
+            self.assertEqual(proper, expected, day.date)
+
+
+def delorean_weekday_after(weekday, month, day, year, number_after=1):
+    # the implementation ``weekday_after`` replaced
+    direction = "last" if number_after < 1 else "next"
+    d = Delorean(datetime=datetime(year, month, day), timezone="UTC")
+    return d._shift_date(direction, weekday, abs(number_after)).date
+
+
+class DateEngineTestCase(SimpleTestCase):
+    def test_advent_matches_delorean(self):
+        for year in range(FIRST_TABLE_YEAR - 5, LAST_TABLE_YEAR + 6):
+            with self.subTest(year=year):
+                self.assertEqual(advent(year), delorean_weekday_after("sunday", 12, 25, year, -4))
+                self.assertEqual(advent(year), compute_advent(year))
+
+    def test_weekday_after_matches_delorean(self):
+        # every day of a leap year, for every weekday and offset (zero counts as one)
+        day = date(2024, 1, 1)
+        while day.year == 2024:
+            for weekday in WEEKDAY_NUMBERS:
+                for number_after in range(-5, 6):
+                    self.assertEqual(
+                        weekday_after(weekday, day.month, day.day, day.year, number_after),
+                        delorean_weekday_after(weekday, day.month, day.day, day.year, number_after),
+                        (weekday, day, number_after),
+                    )
+            day += timedelta(days=1)
+
+    def test_advent_year(self):
+        for year in (FIRST_TABLE_YEAR - 1, FIRST_TABLE_YEAR, 2019, LAST_TABLE_YEAR - 1, LAST_TABLE_YEAR + 1):
+            with self.subTest(year=year):
+                self.assertEqual(advent_year(advent(year)), year)
+                self.assertEqual(advent_year(advent(year) - timedelta(days=1)), year - 1)
+                self.assertEqual(advent_year(advent(year + 1) - timedelta(days=1)), year)
+
+
+class ChurchYearRangeTransfersTestCase(TestCase):
+    fixtures = ["bench_calendar"]
+
+    def setUp(self):
+        # two holy days on the last day of church year 2023, so the second is transferred into Advent 2024
+        calendar = Calendar.objects.get(abbreviation=FIXTURE_CALENDAR)
+        rank = CommemorationRank.objects.get(calendar=calendar, name="HOLY_DAY")
+        for name in ("First Test Holy Day", "Second Test Holy Day"):
+            SanctoraleCommemoration.objects.create(
+                name=name, rank=rank, color="red", calendar=calendar, month=11, day=30
+            )
+        self.clear_caches()
+
+    def tearDown(self):
+        self.clear_caches()
+
+    @staticmethod
+    def clear_caches():
+        cache.clear()
+        local_cache.clear()
+        clear_catalogs()
+
+    @staticmethod
+    def payloads(church_year_range):
+        return [day_payload(day) for day in church_year_range]
+
+    def test_cached_range_carries_transfers_into_the_next_year(self):
+        self.assertTrue(ChurchYear(2023, FIXTURE_CALENDAR).transfers_out)
+
+        built = ChurchYearRange(2023, 2024, FIXTURE_CALENDAR)
+        names = [
+            commemoration["name"] for commemoration in day_payload(built.years[1].get_by_index(1))["commemorations"]
+        ]
+        self.assertTrue(any("Test Holy Day" in name for name in names), names)
+
+        self.assertEqual(self.payloads(ChurchYearRange.from_cache(2023, 2024, FIXTURE_CALENDAR)), self.payloads(built))
+        # and again from the cached snapshots
+        self.assertEqual(self.payloads(ChurchYearRange.from_cache(2023, 2024, FIXTURE_CALENDAR)), self.payloads(built))
+
+    def test_parallel_range_matches_the_serial_build(self):
+        serial = ChurchYearRange(2022, 2025, FIXTURE_CALENDAR)
+        parallel = ChurchYearRange(2022, 2025, FIXTURE_CALENDAR, processes=2)
+        self.assertEqual(self.payloads(parallel), self.payloads(serial))
+
+    def test_every_way_of_getting_a_day_carries_transfers(self):
+        expected = day_payload(ChurchYearRange(2023, 2024, FIXTURE_CALENDAR).years[1].get_by_index(1))
+        day = advent(2024) + timedelta(days=1)
+        self.assertEqual(day_payload(ChurchYear(2024, FIXTURE_CALENDAR).calendar_dates[1]), expected)
+        # lazily, from a cold cache
+        self.assertEqual(day_payload(get_calendar_date(day, FIXTURE_CALENDAR)), expected)
+        # and from the whole church year
+        self.clear_caches()
+        with mock.patch("churchcal.snapshot.LAZY_YEARS", False):
+            self.assertEqual(day_payload(get_calendar_date(day, FIXTURE_CALENDAR)), expected)
+        days = [
+            calendar_date for calendar_date in get_calendar_year(2024, FIXTURE_CALENDAR) if calendar_date.date == day
+        ]
+        self.assertEqual([day_payload(calendar_date) for calendar_date in days], [expected])
+
+
+class MassReadingIndexTestCase(TestCase):
+    fixtures = ["bench_calendar"]
+
+    def test_index_holds_only_its_calendar(self):
+        calendar = Calendar.objects.get(abbreviation=FIXTURE_CALENDAR)
+        other = Calendar.objects.create(name="Other", abbreviation="OTHER", denomination=calendar.denomination)
+        reading = MassReading.objects.filter(commemoration__isnull=False).first()
+        reading.pk = None
+        reading.calendar = other
+        reading.save()
+
+        index = MassReadingIndex.load(FIXTURE_CALENDAR)
+        self.assertEqual(len(index.readings), MassReading.objects.filter(calendar=calendar).count())
+        self.assertNotIn(reading.pk, {indexed.pk for indexed in index.readings})
+        self.assertEqual([indexed.pk for indexed in MassReadingIndex.load("OTHER").readings], [reading.pk])
+
+    def test_texts_are_loaded_in_one_query_when_needed(self):
+        index = MassReadingIndex.load(FIXTURE_CALENDAR)
+        indexed = next(reading for reading in index.readings if reading.proper_id)
+        proper = Proper.objects.get(pk=indexed.proper_id)
+        self.assertFalse(index.texts_loaded)
+
+        with self.assertNumQueries(1):
+            readings = index.for_proper(proper, indexed.years[0])
+            texts = {reading.pk: reading.long_text for reading in index.readings}
+        self.assertIn(indexed, readings)
+        self.assertEqual(
+            texts,
+            dict(MassReading.objects.filter(calendar__abbreviation=FIXTURE_CALENDAR).values_list("pk", "long_text")),
+        )
+        with self.assertNumQueries(0):
+            index.for_proper(proper, indexed.years[0])
+
+
+class GenerationInvalidationTestCase(TestCase):
+    fixtures = ["bench_calendar"]
+
+    def setUp(self):
+        local_cache.clear()
+
+    def tearDown(self):
+        local_cache.clear()
+
+    def test_a_transaction_bumps_each_generation_once(self):
+        propers = list(Proper.objects.filter(calendar__abbreviation=FIXTURE_CALENDAR)[:20])
+        with mock.patch("churchcal.signals.bump_generation") as bump_generation:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                for proper in propers:
+                    proper.save()
+        self.assertEqual(len(callbacks), 1)
+        bump_generation.assert_called_once_with(FIXTURE_CALENDAR)
+
+    def test_saves_do_not_look_up_their_calendar(self):
+        propers = list(Proper.objects.filter(calendar__abbreviation=FIXTURE_CALENDAR)[:20])
+        propers[0].save()
+        with self.assertNumQueries(len(propers)):
+            for proper in propers:
+                proper.save()
+
+    def test_a_rolled_back_transaction_does_not_lose_later_bumps(self):
+        proper = Proper.objects.filter(calendar__abbreviation=FIXTURE_CALENDAR).first()
+        with mock.patch("churchcal.signals.bump_generation") as bump_generation:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                try:
+                    with transaction.atomic():
+                        proper.save()
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                proper.save()
+        self.assertEqual(len(callbacks), 1)
+        bump_generation.assert_called_once_with(FIXTURE_CALENDAR)
+
+    def test_a_bump_keeps_other_generations_cached(self):
+        local_cache.set("churchcal:test:own", 1, generations=(FIXTURE_CALENDAR,))
+        local_cache.set("churchcal:test:other", 2, generations=("OTHER",))
+        local_cache.set("churchcal:test:untagged", 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Proper.objects.filter(calendar__abbreviation=FIXTURE_CALENDAR).first().save()
+        self.assertIsNone(local_cache.get("churchcal:test:own"))
+        self.assertEqual(local_cache.get("churchcal:test:other"), 2)
+        self.assertEqual(local_cache.get("churchcal:test:untagged"), 3)
+
+
+class SingleFlightTestCase(SimpleTestCase):
+    key = "test_single_flight"
+    stale_key = "test_single_flight_stale"
+
+    def setUp(self):
+        cache.delete_many([self.key, self.stale_key, single_flight.lock_key(self.key)])
+        self.building = threading.Event()
+        self.finish = threading.Event()
+
+    def tearDown(self):
+        self.finish.set()
+        cache.delete_many([self.key, self.stale_key, single_flight.lock_key(self.key)])
+
+    def builder(self, value):
+        def build():
+            self.building.set()
+            self.finish.wait(5)
+            return value
+
+        return mock.Mock(side_effect=build)
+
+    def request_concurrently(self, build, count=20, **kwargs):
+        results = [None] * count
+
+        def request(index):
+            results[index] = single_flight.get_or_build(self.key, build, **kwargs)
+
+        threads = [threading.Thread(target=request, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads, results
+
+    def test_cold_key_is_built_once(self):
+        build = self.builder("new")
+        threads, results = self.request_concurrently(build)
+        self.assertTrue(self.building.wait(5))
+        time.sleep(single_flight.WAIT_INTERVAL * 2)
+        self.finish.set()
+        for thread in threads:
+            thread.join(5)
+
+        build.assert_called_once_with()
+        self.assertEqual(results, [("new", False)] * len(results))
+
+    def test_stale_value_is_served_while_building(self):
+        cache.set(self.stale_key, (None, "old"))
+        build = self.builder("new")
+        threads, results = self.request_concurrently(build, stale_key=self.stale_key)
+        self.assertTrue(self.building.wait(5))
+        # every request but the one building returns at once, without waiting for the build
+        for thread in threads:
+            thread.join(0.5)
+        waiting = [thread for thread in threads if thread.is_alive()]
+        self.assertEqual(len(waiting), 1)
+        self.assertEqual([result for result in results if result], [("old", True)] * (len(results) - 1))
+
+        self.finish.set()
+        waiting[0].join(5)
+        build.assert_called_once_with()
+        self.assertIn(("new", False), results)
+        self.assertEqual(cache.get(self.key)[1], "new")
+        self.assertEqual(cache.get(self.stale_key)[1], "new")
+
+    def test_expired_value_is_served_while_refreshing_once(self):
+        cache.set(self.key, (time.time() - 1, "old"))
+        build = self.builder("new")
+        threads, results = self.request_concurrently(build, soft_timeout=60, stale_key=self.stale_key)
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(results, [("old", False)] * len(results))
+
+        self.assertTrue(self.building.wait(5))
+        self.finish.set()
+        deadline = time.monotonic() + 5
+        while cache.get(self.key)[1] != "new" and time.monotonic() < deadline:
+            time.sleep(single_flight.WAIT_INTERVAL)
+        build.assert_called_once_with()
+        self.assertEqual(cache.get(self.key)[1], "new")
+
+
+class CalendarViewsTestCase(TestCase):
+    fixtures = ["bench_calendar"]
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        clear_catalogs()
+
+    def tearDown(self):
+        clear_catalogs()
+
+    @staticmethod
+    def get(view, path, data=None, accept=None, **kwargs):
+        extra = {"HTTP_ACCEPT": accept} if accept else {}
+        response = view.as_view()(APIRequestFactory().get(path, data, **extra), **kwargs)
+        return response.render() if hasattr(response, "render") else response
+
+    def test_day_view_returns_the_encoded_payload(self):
+        response = self.get(DayView, "/api/v1/calendar/2024-6-1", year=2024, month=6, day=1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response.content, encode(day_payload(get_calendar_date("2024-06-01", FIXTURE_CALENDAR))))
+
+    def test_views_keep_content_negotiation(self):
+        response = self.get(MonthView, "/api/v1/calendar/2024-6", {"format": "api"}, year=2024, month=6)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/html"))
+
+        response = self.get(MonthView, "/api/v1/calendar/2024-6", {"format": "json"}, year=2024, month=6)
+        days = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([day["date"] for day in days][::29], ["2024-06-01", "2024-06-30"])
+
+    def test_ranges_are_streamed(self):
+        response = self.get(YearView, "/api/v1/calendar/2023", year=2023)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/json")
+        chunks = list(response.streaming_content)
+        # a chunk per church year read, between the brackets
+        self.assertEqual(len(chunks), 3)
+        days = json.loads(b"".join(chunks))
+        self.assertEqual((days[0]["date"], days[-1]["date"]), ("2023-12-03", "2024-11-30"))
+
+        # indented JSON and the browsable API need the whole body
+        response = self.get(YearView, "/api/v1/calendar/2023", {"format": "api"}, year=2023)
+        self.assertFalse(response.streaming)
+        self.assertEqual(
+            len(json.loads(self.get(YearView, "/", accept="application/json; indent=2", year=2023).content)), 364
+        )
+
+    def test_years_outside_the_church_years_are_not_found(self):
+        self.assertEqual(self.get(DayView, "/api/v1/calendar/1-1-1", year=1, month=1, day=1).status_code, 404)
+        self.assertEqual(self.get(MonthView, "/api/v1/calendar/0-1", year=0, month=1).status_code, 404)
+        self.assertEqual(self.get(MonthView, "/api/v1/calendar/10000-1", year=10000, month=1).status_code, 404)
+        self.assertEqual(self.get(YearView, "/api/v1/calendar/0", year=0).status_code, 404)
+        self.assertEqual(self.get(YearView, "/api/v1/calendar/9999", year=9999).status_code, 404)
+
+    def test_first_month_has_the_days_from_the_first_advent(self):
+        self.assertEqual(self.get(MonthView, "/api/v1/calendar/1-11", year=1, month=11).status_code, 404)
+        response = self.get(MonthView, "/api/v1/calendar/1-12", year=1, month=12)
+        self.assertEqual(response.status_code, 200)
+        days = json.loads(b"".join(response.streaming_content))
+        self.assertEqual((days[0]["date"], days[-1]["date"]), ("0001-12-02", "0001-12-31"))
+
+    def test_month_view_rejects_unknown_months(self):
+        self.assertEqual(self.get(MonthView, "/api/v1/calendar/2024-13", year=2024, month=13).status_code, 404)
+
+    def test_range_view_takes_only_iso_dates(self):
+        for start, end in (
+            ("1", "2024-06-14"),
+            ("may", "2024-06-14"),
+            ("2024-6-1", "2024-06-14"),
+            ("20240601", "2024-06-14"),
+        ):
+            with self.subTest(start=start):
+                self.assertEqual(self.get(RangeView, "/", start=start, end=end).status_code, 404)
+        response = self.get(RangeView, "/", start="2024-06-01", end="2024-06-14")
+        self.assertEqual(len(json.loads(b"".join(response.streaming_content))), 14)
+
+    def test_facts_view_bounds(self):
+        self.assertEqual(self.get(FactsView, "/", start=0, end=1).status_code, 404)
+        self.assertEqual(self.get(FactsView, "/", start=9998, end=9999).status_code, 404)
+        self.assertEqual(self.get(FactsView, "/", start=2020, end=2020 + MAX_FACTS_YEARS).status_code, 400)
+        self.assertEqual(self.get(FactsView, "/", {"date__gte": "may"}, start=2023, end=2023).status_code, 400)
+        response = self.get(FactsView, "/", {"date__gte": "2024-06-01"}, start=2023, end=2023)
+        self.assertEqual(response.status_code, 200)
+
+
+class CalendarGoldenTestCase(TestCase):
+    fixtures = ["bench_calendar"]
+
+    def setUp(self):
+        clear_catalogs()
+
+    def tearDown(self):
+        clear_catalogs()
+
+    def test_church_years_match_the_golden_file(self):
+        with open(GOLDEN_FILE, encoding="utf-8") as golden_file:
+            expected = json.load(golden_file)
+        golden = {}
+        for year in GOLDEN_YEARS:
+            for day in ChurchYear(year, FIXTURE_CALENDAR):
+                golden[day.date.isoformat()] = day_golden(day)
+
+        self.assertEqual(sorted(golden), sorted(expected))
+        for date_string in sorted(golden):
+            with self.subTest(date=date_string):
+                self.assertEqual(golden[date_string], expected[date_string])
+
+
+class CommemorationRecordTestCase(TestCase):
+    fixtures = ["bench_calendar"]
+
+    def setUp(self):
+        clear_catalogs()
+        self.catalog = get_catalog(FIXTURE_CALENDAR)
+
+    def tearDown(self):
+        clear_catalogs()
+
+    def test_records_are_immutable(self):
+        for record in (
+            self.catalog.record(self.catalog.commemorations[0]),
+            self.catalog.feria(self.catalog.seasons[0]),
+        ):
+            with self.assertRaises(AttributeError):
+                record.name = "Renamed"
+            with self.assertRaises(AttributeError):
+                del record.rank
+
+    def test_resolution_state_is_kept_off_the_record(self):
+        record = self.catalog.record(self.catalog.commemorations[0])
+        name = record.name
+        commemoration = ResolvedCommemoration(record)
+        commemoration.name = "Renamed"
+        commemoration.transferred = True
+        self.assertEqual(record.name, name)
+        self.assertEqual(ResolvedCommemoration(record).name, name)
+
+
+class ExportCalendarFactsTestCase(TestCase):
+    fixtures = ["bench_calendar"]
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        clear_catalogs()
+
+    def tearDown(self):
+        clear_catalogs()
+
+    @staticmethod
+    def export(*where):
+        output = io.StringIO()
+        arguments = ["2023", "2023", "--calendar", FIXTURE_CALENDAR]
+        for condition in where:
+            arguments += ["--where", condition]
+        call_command("export_calendar_facts", *arguments, stdout=output)
+        return list(csv.DictReader(io.StringIO(output.getvalue())))
+
+    def test_conditions_are_parsed_like_the_facts_endpoint(self):
+        rows = self.export("date__gte=2024-06-01")
+        self.assertEqual(rows[0]["date"], "2024-06-01")
+        self.assertTrue(all(row["date"] >= "2024-06-01" for row in rows))
+
+        rows = self.export("fast_day__in=1,2")
+        self.assertTrue(rows)
+        self.assertEqual({row["fast_day"] for row in rows}, {"1", "2"})
+
+        rows = self.export("season__in=Lent,Holy Week")
+        self.assertTrue(rows)
+        self.assertEqual({row["season"] for row in rows}, {"Lent", "Holy Week"})
+
+    def test_bad_conditions_are_command_errors(self):
+        for condition in ("fast_day=yes", "date__gte=June", "nothing=1", "fast_day"):
+            with self.subTest(condition=condition):
+                with self.assertRaises(CommandError):
+                    self.export(condition)
+
+
+class LazyChurchYearTestCase(TestCase):
+    fixtures = ["bench_calendar"]
+    year = 2023
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        clear_catalogs()
+        eager = ChurchYearSnapshot.from_church_year(ChurchYear(self.year, FIXTURE_CALENDAR))
+        self.expected = [day_payload(day) for day in eager]
+
+    def tearDown(self):
+        cache.clear()
+        local_cache.clear()
+        clear_catalogs()
+
+    def orders(self):
+        indexes = list(range(len(self.expected)))
+        shuffled = indexes[:]
+        random.Random(self.year).shuffle(shuffled)
+        return {"reverse": indexes[::-1], "random": shuffled}
+
+    def test_lazy_year_matches_the_eager_build(self):
+        for order, indexes in self.orders().items():
+            with self.subTest(order=order):
+                church_year = ChurchYear(self.year, FIXTURE_CALENDAR, lazy=True)
+                payloads = {}
+                for index in indexes:
+                    church_year.resolve_through(index)
+                    snapshot = ChurchYearSnapshot(SnapshotBuilder(church_year).build(index, index + 1))
+                    payloads[index] = day_payload(snapshot.get_by_index(0))
+                self.assertEqual([payloads[index] for index in sorted(payloads)], self.expected)
+
+    def test_cold_dates_match_the_eager_build(self):
+        start = advent(self.year)
+        for order, indexes in self.orders().items():
+            with self.subTest(order=order):
+                cache.clear()
+                local_cache.clear()
+                payloads = {}
+                with mock.patch("churchcal.snapshot.LAZY_YEARS", True), mock.patch(
+                    "churchcal.snapshot.lazy_snapshot_date", wraps=lazy_snapshot_date
+                ) as lazy:
+                    for index in indexes:
+                        calendar_date = get_calendar_date(start + timedelta(days=index), FIXTURE_CALENDAR)
+                        payloads[index] = day_payload(calendar_date)
+                self.assertTrue(lazy.called)
+                self.assertEqual([payloads[index] for index in sorted(payloads)], self.expected)
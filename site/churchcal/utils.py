@@ -1,24 +1,37 @@
-from datetime import date
+from bisect import bisect_right
+from datetime import date, timedelta
 
 from django.utils import timezone
 
-import arrow
-from delorean import Delorean
+WEEKDAY_NUMBERS = {
+    "monday": 0,
+    "tuesday": 1,
+    "wednesday": 2,
+    "thursday": 3,
+    "friday": 4,
+    "saturday": 5,
+    "sunday": 6,
+}
+
+FIRST_TABLE_YEAR = 1900
+LAST_TABLE_YEAR = 2200
 
 
 def weekday_after(weekday, month, day, year=None, number_after=1):
+    # The nth named weekday strictly after (or, for number_after < 1, strictly before) the given date. Zero counts
+    # as one, matching the Delorean ``_shift_date`` behaviour this replaced.
     if not year:
-        year = arrow.utcnow().format("YYYY")
+        year = timezone.now().year
 
-    weekday = weekday.lower()
-    direction = "last" if number_after < 1 else "next"
-    number_after = abs(number_after)
-    d = Delorean(datetime=timezone.datetime(year, month, day), timezone="UTC")
-    return d._shift_date(direction, weekday, number_after).date
+    start = date(year, month, day)
+    target = WEEKDAY_NUMBERS[weekday.lower()]
+    shifts = max(abs(number_after), 1)
+    if number_after < 1:
+        return start - timedelta(days=((start.weekday() - target) % 7 or 7) + 7 * (shifts - 1))
+    return start + timedelta(days=((target - start.weekday()) % 7 or 7) + 7 * (shifts - 1))
 
 
-def easter(year):
-    "Returns Easter as a date object."
+def compute_easter(year):
     a = year % 19
     b = year // 100
     c = year % 100
@@ -30,8 +43,34 @@ def easter(year):
     return date(year, month, day)
 
 
+def compute_advent(year):
+    # four Sundays before Christmas Day
+    christmas = date(year, 12, 25)
+    return christmas - timedelta(days=(christmas.weekday() + 1) % 7 or 7) - timedelta(weeks=3)
+
+
+EASTER_TABLE = tuple(compute_easter(year) for year in range(FIRST_TABLE_YEAR, LAST_TABLE_YEAR + 1))
+ADVENT_TABLE = tuple(compute_advent(year) for year in range(FIRST_TABLE_YEAR, LAST_TABLE_YEAR + 1))
+
+
+def easter(year):
+    "Returns Easter as a date object."
+    if FIRST_TABLE_YEAR <= year <= LAST_TABLE_YEAR:
+        return EASTER_TABLE[year - FIRST_TABLE_YEAR]
+    return compute_easter(year)
+
+
 def advent(year):
-    return weekday_after(weekday="sunday", month=12, day=25, year=year, number_after=-4)
+    if FIRST_TABLE_YEAR <= year <= LAST_TABLE_YEAR:
+        return ADVENT_TABLE[year - FIRST_TABLE_YEAR]
+    return compute_advent(year)
+
+
+def advent_year(date):
+    # the year in which the church year containing ``date`` begins
+    if ADVENT_TABLE[0] <= date < ADVENT_TABLE[-1]:
+        return FIRST_TABLE_YEAR + bisect_right(ADVENT_TABLE, date) - 1
+    return date.year if date >= advent(date.year) else date.year - 1
 
 
 week_days = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
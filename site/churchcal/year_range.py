@@ -0,0 +1,112 @@
+"""
+``ChurchYearRange`` builds consecutive church years in one pass.
+
+The years share one ``CalendarCatalog`` and feasts transferred out of the last days of a church year are carried
+into the following Advent, just as ``ChurchYear`` (and so every cached snapshot) works them out for a single year.
+Days are kept as ``ChurchYearSnapshot``s and can be sliced by civil year or month.
+
+With ``processes``, the years are built by a pool of forked workers instead. Each year then works out its own
+transfers, which takes longer per year than carrying them along, so it only pays for long ranges on several cores.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from django.utils.functional import cached_property
+
+from churchcal.calculations import ChurchYear, to_date
+from churchcal.catalog import get_catalog
+from churchcal.snapshot import ChurchYearSnapshot, get_church_year_snapshot
+from churchcal.utils import advent
+
+_worker_catalog = None
+
+
+def _set_worker_catalog(catalog):
+    global _worker_catalog
+    _worker_catalog = catalog
+
+
+def _build_year(year):
+    # workers are forked with the catalog the parent has loaded, so building a year makes no queries
+    return ChurchYearSnapshot.from_church_year(ChurchYear(year, catalog=_worker_catalog))
+
+
+class ChurchYearRange(object):
+    def __init__(self, start, end, calendar="ACNA_BCP2019", years=None, processes=None):
+        # ``start`` and ``end`` are the (inclusive) years in which the first and last church years begin
+        self.start = int(start)
+        self.end = int(end)
+        self.calendar = calendar
+        self.processes = processes
+        self.start_date = advent(self.start)
+        self.end_date = advent(self.end + 1) - timedelta(days=1)
+        if years is not None:
+            self.years = list(years)
+
+    @classmethod
+    def from_cache(cls, start, end, calendar="ACNA_BCP2019"):
+        years = [get_church_year_snapshot(year, calendar) for year in range(int(start), int(end) + 1)]
+        return cls(start, end, calendar, years=years)
+
+    @cached_property
+    def years(self):
+        if self.processes and self.end > self.start:
+            return self._build_parallel()
+        catalog = get_catalog(self.calendar)
+        years = []
+        # the first year works out its own transfers; each following one takes them from the year before it
+        transfers = None
+        for year in range(self.start, self.end + 1):
+            church_year = ChurchYear(year, self.calendar, catalog=catalog, transfers=transfers)
+            transfers = church_year.transfers_out
+            years.append(ChurchYearSnapshot.from_church_year(church_year))
+        return years
+
+    def _build_parallel(self):
+        # forked, as the catalog's model instances are handed to the workers without pickling them
+        with ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_set_worker_catalog,
+            initargs=(get_catalog(self.calendar),),
+        ) as pool:
+            return list(pool.map(_build_year, range(self.start, self.end + 1)))
+
+    def __iter__(self):
+        for church_year in self.years:
+            yield from church_year
+
+    def __len__(self):
+        return (self.end_date - self.start_date).days + 1
+
+    def iter_dates(self):
+        # the dates covered, without building any years
+        for offset in range(len(self)):
+            yield self.start_date + timedelta(days=offset)
+
+    def get_date(self, date_string):
+        date = to_date(date_string)
+        for church_year in self.years:
+            if church_year.start_date <= date <= church_year.end_date:
+                return church_year.get_date(date)
+        return None
+
+    def days(self, start_date, end_date):
+        start_date = max(to_date(start_date), self.start_date)
+        end_date = min(to_date(end_date), self.end_date)
+        days = []
+        for church_year in self.years:
+            if church_year.end_date < start_date or church_year.start_date > end_date:
+                continue
+            first = (max(start_date, church_year.start_date) - church_year.start_date).days
+            last = (min(end_date, church_year.end_date) - church_year.start_date).days
+            days.extend(church_year.get_by_index(index) for index in range(first, last + 1))
+        return days
+
+    def calendar_year(self, year):
+        return self.days(date(year, 1, 1), date(year, 12, 31))
+
+    def month(self, year, month):
+        next_month = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        return self.days(date(year, month, 1), next_month - timedelta(days=1))
@@ -0,0 +1,57 @@
+"""
+A per-worker cache of the formatted lines of office modules, keyed by only what each module depends on.
+
+A ``Module`` that sets ``fragment_settings`` (the names of the settings its lines read) and ``fragment_facts`` (the
+names of the ``FACTS`` about the day they read) has its ``get_formatted_lines()`` cached under its class and those
+values alone. Offices whose other settings differ, or other days with the same facts, then share the module's lines,
+so the hit rate stays high however many combinations of settings are requested. Modules that read anything else
+(readings, psalms, collects) leave ``fragment_settings`` as None and are never cached.
+"""
+import copy
+
+from django.conf import settings
+
+from churchcal.local_cache import LocalCache
+
+# what a module can depend on about the office's day
+FACTS = {
+    "weekday": lambda office: office.date.date.weekday(),
+    "fast_day": lambda office: bool(office.date.fast_day),
+    "season": lambda office: office.date.season.name,
+    "evening_season": lambda office: office.date.evening_season.name,
+    "saint_names": lambda office: (
+        tuple(getattr(feast, "saint_name", None) for feast in office.date.all),
+        tuple(getattr(feast, "saint_name", None) for feast in office.date.all_evening),
+    ),
+}
+
+
+fragment_cache = LocalCache(
+    **getattr(settings, "OFFICE_FRAGMENT_CACHE", {"max_entries": 4096, "max_bytes": 16 * 1024 * 1024})
+)
+
+
+def fragment_key(module):
+    from office.api.text_store import text_store
+
+    return (
+        type(module).__module__,
+        type(module).__qualname__,
+        # only changes when texts are reloaded in development
+        text_store.version,
+        tuple((name, module.office.settings[name]) for name in module.fragment_settings),
+        tuple(FACTS[name](module.office) for name in module.fragment_facts),
+    )
+
+
+def cached_lines(module):
+    # copies of the cached lines, so callers can change them without changing the cache
+    key = fragment_key(module)
+    entry = fragment_cache.get(key)
+    if entry is None:
+        lines = module.get_formatted_lines()
+        entry = (lines is None, tuple(lines or ()))
+        fragment_cache.set(key, entry, sum(len(str(line.get("content", ""))) for line in entry[1]) or 1)
+    if entry[0]:
+        return None
+    return [copy.copy(line) for line in entry[1]]
@@ -0,0 +1,82 @@
+"""
+Whole-response caching for the office endpoints.
+
+An office depends only on its date, its calendar and its (canonical) settings, and on the data it is built from, so
+its rendered JSON is cached under those, together with the generations of the calendar, the lectionary, the settings
+and the Scripture and psalter texts (see ``office.signals``). Any edit to them changes the key and the next request
+renders the office again; rows written without signals, such as by ``bulk_create`` or ``update()``, are only picked
+up once the entry expires after ``OFFICE_RESPONSE_TIMEOUT`` seconds. Responses carry a strong ETag of their JSON, so a
+client or CDN that already has it gets a 304, and ``Cache-Control`` lets shared caches keep them for
+``OFFICE_RESPONSE_S_MAXAGE`` seconds. The cached JSON goes out through the view's renderers (see
+``churchcal.api.renderers``), so the browsable API and ``?format=`` still work.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from churchcal.api.renderers import EncodedJSON
+from churchcal.api.views import requested_calendar
+from churchcal.local_cache import local_cache
+from office.api.text_store import text_store
+from office.lectionary import LECTIONARY_GENERATION
+from office.setting_defaults import SETTINGS_GENERATION
+
+RESPONSE_VERSION = 1
+TEXTS_GENERATION = "office_texts"
+RESPONSE_TIMEOUT = getattr(settings, "OFFICE_RESPONSE_TIMEOUT", 60 * 60 * 24)
+MAX_AGE = getattr(settings, "OFFICE_RESPONSE_MAX_AGE", 60 * 5)
+S_MAXAGE = getattr(settings, "OFFICE_RESPONSE_S_MAXAGE", 60 * 60)
+
+
+def response_generations(calendar):
+    return calendar, LECTIONARY_GENERATION, SETTINGS_GENERATION, TEXTS_GENERATION
+
+
+def response_cache_key(office, date, calendar, settings_key):
+    generations = ":".join(str(local_cache.generation(name)) for name in response_generations(calendar))
+    # the text store's files only change with a deploy, which keeps the cache
+    return "office_response:{}:{}:{}:{}:{}:{}:{}".format(
+        RESPONSE_VERSION, office, date, calendar, generations, text_store.digest[:12], settings_key.digest
+    )
+
+
+def render_entry(data):
+    body = JSONRenderer().render(data)
+    return '"{}"'.format(hashlib.sha1(body).hexdigest()), body
+
+
+def cached_office_response(request, office, year, month, day, render):
+    """
+    The JSON response of ``render()``, which returns the serialized office, from the cache if it has been rendered
+    before. ``office`` names the office in the cache key.
+    """
+    from office.api.views.index import Settings
+
+    calendar = requested_calendar(request)
+    if not calendar:
+        raise NotFound("Unknown calendar")
+
+    date = "{:04d}-{:02d}-{:02d}".format(int(year), int(month), int(day))
+    key = response_cache_key(office, date, calendar, Settings(request).key)
+    entry = local_cache.get(key)
+    if entry is None:
+        entry = cache.get(key)
+        if entry is None:
+            entry = render_entry(render())
+            cache.set(key, entry, RESPONSE_TIMEOUT)
+        local_cache.set(key, entry, len(entry[1]), generations=response_generations(calendar))
+
+    etag, body = entry
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = Response(EncodedJSON(body))
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=MAX_AGE, s_maxage=S_MAXAGE)
+    # the same office is also rendered as the browsable API
+    patch_vary_headers(response, ["Accept"])
+    return response
@@ -0,0 +1,103 @@
+"""
+The fixed texts of the offices (``office/api/texts/*.csv``), parsed once per worker.
+
+``TextStore`` compiles each file the first time it is used into a tuple of ``Line``s, which are never handed out:
+every read returns fresh copies of them, so callers can change the lines they get (several modules fill in names or
+alleluias) without changing the store. With ``OFFICE_TEXTS_RELOAD`` (on when ``DEBUG`` is) every read checks the
+file's modification time and recompiles a file that has been edited.
+"""
+import csv
+import hashlib
+import os
+import threading
+
+from django.conf import settings
+
+from office.api.views import Line
+
+TEXTS_DIRECTORY = os.path.join(os.path.dirname(os.path.realpath(__file__)), "texts")
+RELOAD = getattr(settings, "OFFICE_TEXTS_RELOAD", settings.DEBUG)
+TRUE_VALUES = ("y", "yes", "t", "true", "on", "1")
+
+
+def process_row(row):
+    result = {"content": row[0]}
+    if len(row) > 1 and row[1]:
+        result["line_type"] = row[1]
+    result["indented"] = False
+    if len(row) > 2:
+        if row[2].lower() == "true":
+            result["indented"] = "indent"
+        else:
+            result["indented"] = row[2]
+
+    if len(row) > 3:
+        if not row[3]:
+            result["extra_space_before"] = False
+        else:
+            result["extra_space_before"] = row[3].lower() in TRUE_VALUES
+    return result
+
+
+def compile_text(path):
+    with open(path, encoding="utf-8") as csvfile:
+        reader = csv.reader(csvfile, quotechar='"', delimiter=",", quoting=csv.QUOTE_ALL, skipinitialspace=True)
+        return tuple(Line(**process_row(row)) for row in reader)
+
+
+def copy_line(line):
+    # a ``Line`` with the same items, without going through ``Line.__init__`` again
+    copy = Line.__new__(Line)
+    copy.update(line)
+    return copy
+
+
+class TextStore(object):
+    def __init__(self, directory=TEXTS_DIRECTORY, reload=RELOAD):
+        self.directory = directory
+        self.reload = reload
+        self._texts = {}
+        self._lock = threading.Lock()
+        # changes whenever a file is recompiled, so caches of lines built from the texts can be dropped
+        self.version = 0
+        self._digest = None
+
+    def path(self, name):
+        return os.path.join(self.directory, "{}.csv".format(name))
+
+    def rows(self, name):
+        name = name.replace(".csv", "")
+        text = self._texts.get(name)
+        if text is not None and not self.reload:
+            return text[1]
+        path = self.path(name)
+        modified = os.stat(path).st_mtime_ns if self.reload else None
+        if text is not None and text[0] == modified:
+            return text[1]
+        rows = compile_text(path)
+        with self._lock:
+            if name in self._texts:
+                self.version += 1
+                self._digest = None
+            self._texts[name] = (modified, rows)
+        return rows
+
+    def lines(self, name):
+        return [copy_line(line) for line in self.rows(name)]
+
+    @property
+    def digest(self):
+        # of the contents of every text, for keys of caches shared between workers and deploys; computed by the
+        # first office response cache key that needs it (not at startup, so management commands never read the
+        # texts), and again after a file has been recompiled
+        if self._digest is None:
+            content = hashlib.sha1()
+            for name in sorted(entry.name for entry in os.scandir(self.directory) if entry.name.endswith(".csv")):
+                content.update(name.encode("utf-8"))
+                with open(os.path.join(self.directory, name), "rb") as text_file:
+                    content.update(text_file.read())
+            self._digest = content.hexdigest()
+        return self._digest
+
+
+text_store = TextStore()
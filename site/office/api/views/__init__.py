@@ -1,6 +1,8 @@
 from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
 
+from office.api.fragment_cache import cached_lines
+
 
 class Line(dict):
     def __init__(
@@ -25,6 +27,11 @@ class Line(dict):
 
 
 class Module(object):
+    # the settings and day facts the lines depend on, for caching them (see ``office.api.fragment_cache``); None
+    # means they may depend on anything, and are not cached
+    fragment_settings = None
+    fragment_facts = ()
+
     def __init__(self, office=None):
         self.office = office
 
@@ -64,5 +71,5 @@ class Module(object):
 
     @cached_property
     def json(self):
-        lines = self.get_formatted_lines()
+        lines = cached_lines(self) if self.fragment_settings is not None else self.get_formatted_lines()
         return {"name": self.get_name(), "lines": lines}
@@ -1,9 +1,6 @@
-import csv
 import datetime
 import json
-import os
 from collections import defaultdict
-from distutils.util import strtobool
 from urllib.parse import quote
 
 import mailchimp_marketing as MailchimpMarketing
@@ -17,24 +14,27 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.generic.base import TemplateResponseMixin
 from mailchimp_marketing.api_client import ApiClientError
 from rest_framework import serializers, mixins, viewsets
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from churchcal.api.permissions import ReadOnly
+from churchcal.api.renderers import ENCODED_RENDERER_CLASSES
 from churchcal.api.serializer import DaySerializer
+from churchcal.api.views import requested_calendar
 from churchcal.calculations import get_church_year
+from office.api.response_cache import cached_office_response
 from office.api.serializers import UpdateNoticeSerializer
+from office.api.text_store import text_store
 from office.api.views import Module, Line
 from office.api.views.ep import EPOpeningSentence
 from office.canticles import DefaultCanticles, BCP1979CanticleTable, REC2011CanticleTable, EP2, EP1, S8
+from office.lectionary import get_lectionary
+from office.setting_defaults import SettingsKey, get_setting_defaults
 from office.models import (
     UpdateNotice,
-    HolyDayOfficeDay,
-    StandardOfficeDay,
-    ThirtyDayPsalterDay,
     Setting,
     SettingOption,
     Collect,
@@ -65,20 +65,12 @@ class Collects:
 class Settings(dict):
     def __init__(self, request):
         settings = self._get_settings(request)
-        settings["extra_collects"] = self._get_extra_collects(request)
+        extra_collects = self._get_extra_collects(request)
+        # the same settings always give the same key, whatever the order or validity of the query parameters
+        self.key = SettingsKey(settings, [collect.pk for collect in extra_collects])
+        settings["extra_collects"] = extra_collects
         super().__init__(**settings)
 
-    def _default_settings(self):
-        settings = (
-            Setting.objects.order_by("site", "setting_type", "order")
-            .prefetch_related(
-                Prefetch("settingoption_set", queryset=SettingOption.objects.order_by("order"), to_attr="options")
-            )
-            .all()
-        )
-        defaults = {setting.name: setting.options[0].value for setting in settings}
-        return defaults
-
     def _get_extra_collects(self, request):
         try:
             extra_collects = request.query_params.get("extra_collects", "")
@@ -87,18 +79,13 @@ class Settings(dict):
             extra_collects = extra_collects.split(",")
             if not extra_collects:
                 return []
-            extra_collects = Collect.objects.filter(pk__in=extra_collects).all()
+            extra_collects = list(Collect.objects.filter(pk__in=extra_collects).order_by("order", "pk"))
         except:
             return []
         return extra_collects
 
     def _get_settings(self, request):
-        settings = self._default_settings().copy()
-        specified_settings = {k: v for (k, v) in request.query_params.items() if k in settings.keys()}
-        for k, v in settings.items():
-            if k in specified_settings.keys():
-                settings[k] = specified_settings[k]
-        return settings
+        return get_setting_defaults().normalize(request.query_params)
 
 
 # heading
@@ -113,29 +100,8 @@ class Settings(dict):
 
 
 def file_to_lines(filename):
-    def process_row(row):
-        result = {"content": row[0]}
-        if len(row) > 1 and row[1]:
-            result["line_type"] = row[1]
-        result["indented"] = False
-        if len(row) > 2:
-            if row[2].lower() == "true":
-                result["indented"] = "indent"
-            else:
-                result["indented"] = row[2]
-
-        if len(row) > 3:
-            if not row[3]:
-                result["extra_space_before"] = False
-            else:
-                result["extra_space_before"] = bool(strtobool(row[3].lower()))
-        return result
-
-    filename = "{}.csv".format(filename.replace(".csv", ""))
-    dir_path = os.path.dirname(os.path.realpath(__file__))
-    with open("{}/../texts/{}".format(dir_path, filename), encoding="utf-8") as csvfile:
-        reader = csv.reader(csvfile, quotechar='"', delimiter=",", quoting=csv.QUOTE_ALL, skipinitialspace=True)
-        return [Line(**process_row(row)) for row in reader]
+    # fresh lines from the parsed text (see ``office.api.text_store``)
+    return text_store.lines(filename)
 
 
 class MPOpeningSentence(Module):
@@ -301,14 +267,14 @@ class Office(object):
 
         self.settings = Settings(request)
 
-        self.date = get_calendar_date("{}-{}-{}".format(year, month, day))
+        self.calendar = requested_calendar(request)
+        if not self.calendar:
+            raise NotFound("Unknown calendar")
+        self.date = get_calendar_date("{}-{}-{}".format(year, month, day), self.calendar)
 
-        try:
-            self.office_readings = HolyDayOfficeDay.objects.get(commemoration=self.date.primary)
-        except HolyDayOfficeDay.DoesNotExist:
-            self.office_readings = StandardOfficeDay.objects.get(month=self.date.date.month, day=self.date.date.day)
-
-        self.thirty_day_psalter_day = ThirtyDayPsalterDay.objects.get(day=self.date.date.day)
+        lectionary = get_lectionary()
+        self.office_readings = lectionary.office_day(self.date)
+        self.thirty_day_psalter_day = lectionary.psalter_day(self.date.date.day)
 
     @cached_property
     def readings(self):
@@ -330,6 +296,8 @@ class Office(object):
 
 class Confession(Module):
     name = "Confession of Sin"
+    fragment_settings = ("confession", "absolution", "language_style")
+    fragment_facts = ("fast_day",)
 
     def get_intro_lines(self):
         language_style = self.office.settings["language_style"]
@@ -388,6 +356,7 @@ class Confession(Module):
 
 class Preces(Module):
     name = "Preces"
+    fragment_settings = ("language_style",)
 
     def get_lines(self):
         language_style = self.office.settings["language_style"]
@@ -674,6 +643,8 @@ class MPInvitatory(Module):
 
 
 class EPInvitatory(Module):
+    fragment_settings = ("language_style",)
+
     def get_lines(self):
         language_style = self.office.settings["language_style"]
         file = "phos_hilaron_traditional" if language_style == "traditional" else "phos_hilaron"
@@ -1173,6 +1144,7 @@ class EPThirdReading(ReadingModule):
 
 class Creed(Module):
     name = "The Apostle's Creed"
+    fragment_settings = ("language_style",)
 
     def get_lines(self):
         language_style = self.office.settings["language_style"]
@@ -1437,6 +1409,7 @@ class ShowGreatLitanyMixin(object):
 
 class Intercessions(Module):
     name = "Intercessions, Thanksgivings, and Praise"
+    fragment_settings = ()
 
     def get_lines(self):
         return [
@@ -1448,6 +1421,7 @@ class Intercessions(Module):
 
 class FinalPrayers(Module):
     name = "Final Prayers"
+    fragment_settings = ("general_thanksgiving", "chrysostom", "language_style")
 
     def get_lines(self):
         general_thanksgiving = self.office.settings["general_thanksgiving"]
@@ -1485,6 +1459,8 @@ class FinalPrayers(Module):
 
 class Dismissal(Module):
     name = "Dismissal"
+    fragment_settings = ("grace", "language_style")
+    fragment_facts = ("weekday", "season")
 
     def get_fixed_grace(self):
         return {
@@ -1556,6 +1532,9 @@ class Dismissal(Module):
 
 
 class GreatLitany(ShowGreatLitanyMixin, Module):
+    fragment_settings = ("mp_great_litany", "ep_great_litany", "language_style", "national_holidays")
+    fragment_facts = ("weekday", "saint_names")
+
     office_name = "office"
 
     def get_names(self):
@@ -1641,6 +1620,7 @@ class MorningPrayer(Office):
 
 class FamilyRubricSection(Module):
     name = "Rubrics"
+    fragment_settings = ()
 
     def get_lines(self):
         return [
@@ -1694,6 +1674,8 @@ class FamilyMiddayOpeningSentence(Module):
 
 
 class FamilyEarlyEveningHymn(Module):
+    fragment_settings = ("language_style",)
+
     def get_lines(self):
         language_style = self.office.settings["language_style"]
         filename = "phos_hilaron_traditional" if language_style == "traditional" else "phos_hilaron"
@@ -1708,6 +1690,8 @@ class FamilyCloseOfDayHymn(Module):
 
 
 class FamilyCloseOfDayClosingSentence(Module):
+    fragment_settings = ()
+
     def get_lines(self):
         return [
             Line("Closing Sentence", "heading"),
@@ -1957,6 +1941,8 @@ class FamilyCloseOfDayScripture(FamilyReadingModule):
 
 
 class FamilyIntercessions(Module):
+    fragment_settings = ()
+
     def get_lines(self):
         return [
             Line("Intercessions", "heading"),
@@ -1965,6 +1951,8 @@ class FamilyIntercessions(Module):
 
 
 class FamilyCloseOfDayIntercessions(Module):
+    fragment_settings = ()
+
     def get_lines(self):
         return [
             Line("Intercessions", "heading"),
@@ -1976,6 +1964,8 @@ class FamilyCloseOfDayIntercessions(Module):
 
 
 class FamilyPraise(Module):
+    fragment_settings = ()
+
     def get_lines(self):
         return [
             Line("Praise", "heading"),
@@ -1984,6 +1974,8 @@ class FamilyPraise(Module):
 
 
 class FamilyCredo(Module):
+    fragment_settings = ("family-creed", "language_style")
+
     def get_lines(self):
         creed = self.office.settings["family-creed"]
 
@@ -1997,6 +1989,8 @@ class FamilyCredo(Module):
 
 
 class FamilyPater(Module):
+    fragment_settings = ("language_style", "language_style_for_our_father")
+
     def get_lines(self):
         style = self.office.settings["language_style"]
         pater_style = self.office.settings["language_style_for_our_father"]
@@ -2185,6 +2179,8 @@ class EveningPrayer(Office):
 
 class MiddayInvitatory(Module):
     name = "Invitatory"
+    fragment_settings = ("language_style",)
+    fragment_facts = ("evening_season",)
 
     @property
     def alleluia(self):
@@ -2380,6 +2376,8 @@ class MiddayAdditonalCollects(AdditionalCollects):
 
 class MiddayConclusion(Module):
     name = "Conclusion"
+    fragment_settings = ("language_style",)
+    fragment_facts = ("season",)
 
     @property
     def alleluia(self):
@@ -2411,6 +2409,7 @@ class MiddayPrayer(Office):
 
 class ComplineOpeningSentence(Module):
     name = "Opening Sentence"
+    fragment_settings = ("language_style",)
 
     # heading
     # subheading
@@ -2439,6 +2438,7 @@ class ComplineOpeningSentence(Module):
 
 class ComplineConfession(Module):
     name = "Confession"
+    fragment_settings = ("language_style",)
 
     # heading
     # subheading
@@ -2474,6 +2474,8 @@ class ComplineConfession(Module):
 
 class ComplineInvitatory(Module):
     name = "Invitatory"
+    fragment_settings = ("language_style",)
+    fragment_facts = ("evening_season",)
 
     # heading
     # subheading
@@ -2695,6 +2697,9 @@ class ComplinePrayers(AdditionalCollects):
 
 
 class ComplineCanticle(Module):
+    fragment_settings = ("language_style",)
+    fragment_facts = ("evening_season",)
+
     @property
     def antiphon(self):
         return "Guide us waking, O Lord, and guard us sleeping; that awake we may watch with Christ, and asleep we may rest in peace.{}".format(
@@ -2731,6 +2736,7 @@ class ComplineCanticle(Module):
 
 class ComplineConclusion(Module):
     name = "Conclusion"
+    fragment_settings = ()
 
     def get_lines(self):
         return [
@@ -2766,28 +2772,42 @@ class Readings(Module):
 
         self.settings = Settings(request)
 
-        self.date = get_calendar_date("{}-{}-{}".format(year, month, day))
-        self.mass_year = get_church_year("{}-{}-{}".format(year, month, day)).mass_year
+        self.calendar = requested_calendar(request)
+        if not self.calendar:
+            raise NotFound("Unknown calendar")
+        self.date = get_calendar_date("{}-{}-{}".format(year, month, day), self.calendar)
+        self.mass_year = get_church_year("{}-{}-{}".format(year, month, day), self.calendar).mass_year
         self.translation = translation
         self.psalms = psalms
 
-        try:
-            self.holy_day_readings = HolyDayOfficeDay.objects.get(commemoration=self.date.primary)
+        lectionary = get_lectionary()
+        self.holy_day_readings = lectionary.holy_day(self.date.primary)
+        if self.holy_day_readings is not None:
             self.holy_day_scriptures = Scripture.objects.get
-        except HolyDayOfficeDay.DoesNotExist:
-            self.holy_day_readings = None
 
-        self.standard_readings = StandardOfficeDay.objects.get(month=self.date.date.month, day=self.date.date.day)
+        self.standard_readings = lectionary.standard_day(self.date.date.month, self.date.date.day)
 
-        self.thirty_day_psalter_day = ThirtyDayPsalterDay.objects.get(day=self.date.date.day)
+        self.thirty_day_psalter_day = lectionary.psalter_day(self.date.date.day)
 
 
 class OfficeAPIView(APIView):
     permission_classes = [ReadOnly]
+    renderer_classes = ENCODED_RENDERER_CLASSES
 
     def get(self, request, year, month, day):
         raise NotImplementedError("You must implement this method.")
 
+    def office_response(self, request, office_class, year, month, day):
+        # the serialized office, cached by date, calendar and settings (see ``office.api.response_cache``)
+        return cached_office_response(
+            request,
+            office_class.__name__,
+            year,
+            month,
+            day,
+            lambda: OfficeSerializer(office_class(request, year, month, day)).data,
+        )
+
 
 class GenericDailyOfficeSerializer(serializers.Serializer):
     modules = serializers.SerializerMethodField()
@@ -3323,58 +3343,42 @@ class ReadingsSerializer(serializers.Serializer):
 
 class MorningPrayerView(OfficeAPIView):
     def get(self, request, year, month, day):
-        office = MorningPrayer(request, year, month, day)
-        serializer = OfficeSerializer(office)
-        return Response(serializer.data)
+        return self.office_response(request, MorningPrayer, year, month, day)
 
 
 class FamilyMorningPrayerView(OfficeAPIView):
     def get(self, request, year, month, day):
-        office = FamilyMorningPrayer(request, year, month, day)
-        serializer = OfficeSerializer(office)
-        return Response(serializer.data)
+        return self.office_response(request, FamilyMorningPrayer, year, month, day)
 
 
 class FamilyMiddayPrayerView(OfficeAPIView):
     def get(self, request, year, month, day):
-        office = FamilyMiddayPrayer(request, year, month, day)
-        serializer = OfficeSerializer(office)
-        return Response(serializer.data)
+        return self.office_response(request, FamilyMiddayPrayer, year, month, day)
 
 
 class FamilyEarlyEveningPrayerView(OfficeAPIView):
     def get(self, request, year, month, day):
-        office = FamilyEarlyEveningPrayer(request, year, month, day)
-        serializer = OfficeSerializer(office)
-        return Response(serializer.data)
+        return self.office_response(request, FamilyEarlyEveningPrayer, year, month, day)
 
 
 class FamilyCloseOfDayPrayerView(OfficeAPIView):
     def get(self, request, year, month, day):
-        office = FamilyCloseOfDayPrayer(request, year, month, day)
-        serializer = OfficeSerializer(office)
-        return Response(serializer.data)
+        return self.office_response(request, FamilyCloseOfDayPrayer, year, month, day)
 
 
 class EveningPrayerView(OfficeAPIView):
     def get(self, request, year, month, day):
-        office = EveningPrayer(request, year, month, day)
-        serializer = OfficeSerializer(office)
-        return Response(serializer.data)
+        return self.office_response(request, EveningPrayer, year, month, day)
 
 
 class MiddayPrayerView(OfficeAPIView):
     def get(self, request, year, month, day):
-        office = MiddayPrayer(request, year, month, day)
-        serializer = OfficeSerializer(office)
-        return Response(serializer.data)
+        return self.office_response(request, MiddayPrayer, year, month, day)
 
 
 class ComplineView(OfficeAPIView):
     def get(self, request, year, month, day):
-        office = Compline(request, year, month, day)
-        serializer = OfficeSerializer(office)
-        return Response(serializer.data)
+        return self.office_response(request, Compline, year, month, day)
 
 
 class ReadingsView(OfficeAPIView):
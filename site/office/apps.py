@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class OfficeConfig(AppConfig):
     name = "office"
+
+    def ready(self):
+        from office import signals  # noqa: F401
@@ -0,0 +1,80 @@
+"""
+Daily office lectionary lookups answered from an in-memory ``Lectionary``.
+
+``StandardOfficeDay`` (one row per day of the year), ``HolyDayOfficeDay`` (one per holy day) and
+``ThirtyDayPsalterDay`` (one per day of the month) are small and almost never change, so each worker loads all three
+once instead of querying them for every office. The rows are shared and must not be modified. Saving or deleting any
+of them bumps the lectionary's generation (see ``office.signals``), which makes every worker reload it.
+"""
+import time
+
+from churchcal.local_cache import local_cache
+from office.models import HolyDayOfficeDay, StandardOfficeDay, ThirtyDayPsalterDay
+
+# the name the lectionary's generation is kept under, next to the calendars' generations
+LECTIONARY_GENERATION = "office_lectionary"
+LECTIONARY_TIMEOUT = 60 * 60 * 12
+
+_lectionary = None
+_lectionary_generation = None
+_lectionary_loaded_at = None
+
+
+class Lectionary(object):
+    def __init__(self, holy_days, standard_days, psalter_days):
+        # where a key has more than one row, the first by primary key is used
+        self.holy_days = {}
+        for day in holy_days:
+            self.holy_days.setdefault(day.commemoration_id, day)
+        self.standard_days = {}
+        for day in standard_days:
+            self.standard_days.setdefault((day.month, day.day), day)
+        self.psalter_days = {}
+        for day in psalter_days:
+            self.psalter_days.setdefault(day.day, day)
+
+    @classmethod
+    def load(cls):
+        return cls(
+            HolyDayOfficeDay.objects.order_by("pk"),
+            StandardOfficeDay.objects.order_by("pk"),
+            ThirtyDayPsalterDay.objects.order_by("pk"),
+        )
+
+    def holy_day(self, commemoration):
+        # only the saved commemoration itself has a holy day: copies of it (alternate Sundays, eves, Pentecost and
+        # Trinity in the propers) have no primary key, like the copies ``BaseModel.copy`` makes, and never match
+        if commemoration.pk is None:
+            return None
+        return self.holy_days.get(commemoration.pk)
+
+    def standard_day(self, month, day):
+        try:
+            return self.standard_days[(month, day)]
+        except KeyError:
+            raise StandardOfficeDay.DoesNotExist("No office readings for {}/{}".format(month, day))
+
+    def psalter_day(self, day):
+        try:
+            return self.psalter_days[day]
+        except KeyError:
+            raise ThirtyDayPsalterDay.DoesNotExist("No thirty day psalter for day {}".format(day))
+
+    def office_day(self, calendar_date):
+        # the readings of the day's primary feast if it has its own, and of the day of the year otherwise
+        holy_day = self.holy_day(calendar_date.primary)
+        if holy_day is not None:
+            return holy_day
+        return self.standard_day(calendar_date.date.month, calendar_date.date.day)
+
+
+def get_lectionary():
+    # reloaded when this worker notices that the lectionary's generation changed, or after LECTIONARY_TIMEOUT
+    global _lectionary, _lectionary_generation, _lectionary_loaded_at
+    generation = local_cache.generation(LECTIONARY_GENERATION)
+    now = time.monotonic()
+    if _lectionary is None or _lectionary_generation != generation or now - _lectionary_loaded_at > LECTIONARY_TIMEOUT:
+        _lectionary = Lectionary.load()
+        _lectionary_generation = generation
+        _lectionary_loaded_at = now
+    return _lectionary
@@ -0,0 +1,44 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from churchcal.benchmarks import seconds_per_call
+from office.api.text_store import TEXTS_DIRECTORY, TextStore, compile_text
+
+
+class Command(BaseCommand):
+    help = (
+        "Times reading the office texts the way every request used to (opening and parsing each file) against "
+        "reading them from the in-memory text store"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=100, help="Reads of every text per benchmark")
+        parser.add_argument(
+            "--per-request",
+            type=int,
+            default=40,
+            help="Texts read by a typical office request, to estimate the cost per request",
+        )
+
+    def handle(self, *args, **options):
+        names = sorted(entry.name[:-4] for entry in os.scandir(TEXTS_DIRECTORY) if entry.name.endswith(".csv"))
+        store = TextStore(reload=False)
+        reloading_store = TextStore(reload=True)
+
+        def from_disk(name):
+            return list(compile_text(store.path(name)))
+
+        timings = [
+            ("parsed from disk", from_disk),
+            ("text store", store.lines),
+            ("text store (reload)", reloading_store.lines),
+        ]
+        for label, read in timings:
+            # the warm-up compiles every text into the stores
+            per_read = seconds_per_call(read, [(name,) for name in names], options["number"])
+            self.stdout.write(
+                "{:<22} {:>8.2f} us/text {:>8.3f} ms/request".format(
+                    label, per_read * 1_000_000, per_read * options["per_request"] * 1000
+                )
+            )
@@ -0,0 +1,109 @@
+import time
+from datetime import timedelta
+
+import kronos
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from churchcal.snapshot import DEFAULT_CALENDAR, cache_key, get_church_year_snapshot
+
+OFFICE_PATHS = (
+    "/api/v1/office/morning_prayer/{}-{}-{}",
+    "/api/v1/office/midday_prayer/{}-{}-{}",
+    "/api/v1/office/evening_prayer/{}-{}-{}",
+    "/api/v1/office/compline/{}-{}-{}",
+    "/api/v1/family/morning_prayer/{}-{}-{}",
+    "/api/v1/family/midday_prayer/{}-{}-{}",
+    "/api/v1/family/early_evening_prayer/{}-{}-{}",
+    "/api/v1/family/close_of_day_prayer/{}-{}-{}",
+    "/api/v1/readings/{}-{}-{}",
+)
+
+# query strings for the settings most requests use; "" is the default settings
+COMMON_SETTINGS = (
+    "",
+    "language_style=contemporary",
+    "psalter=30",
+    "language_style=contemporary&psalter=30",
+)
+
+
+@kronos.register("0 * * * *")
+class Command(BaseCommand):
+    help = "Precomputes church years and the upcoming offices so that a cold cache is never hit by a request"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calendar", action="append", dest="calendars")
+        parser.add_argument("--first-year", type=int, default=settings.FIRST_BEGINNING_YEAR)
+        parser.add_argument("--last-year", type=int, default=settings.LAST_BEGINNING_YEAR)
+        parser.add_argument("--days", type=int, default=7, help="Number of days of offices to render, from today")
+        parser.add_argument(
+            "--office-settings", action="append", dest="office_settings", help="Office settings as a query string"
+        )
+
+    def handle(self, *args, **options):
+        calendars = options["calendars"] or [DEFAULT_CALENDAR]
+        started = time.perf_counter()
+        for calendar in calendars:
+            self.warm_years(calendar, options["first_year"], options["last_year"])
+            self.warm_offices(calendar, options["days"], options["office_settings"] or COMMON_SETTINGS)
+        self.stdout.write("Warmed caches in {:.2f}s".format(time.perf_counter() - started))
+
+    def warm_years(self, calendar, first_year, last_year):
+        built = 0
+        started = time.perf_counter()
+        for year in range(first_year, last_year + 1):
+            year_started = time.perf_counter()
+            cached = cache.has_key(cache_key(year, calendar))
+            get_church_year_snapshot(year, calendar)
+            if not cached:
+                built += 1
+                self.stdout.write("{} {}: built in {:.2f}s".format(calendar, year, time.perf_counter() - year_started))
+        self.stdout.write(
+            "{} church years {}-{}: {} built, {} already cached, {:.2f}s".format(
+                calendar,
+                first_year,
+                last_year,
+                built,
+                last_year - first_year + 1 - built,
+                time.perf_counter() - started,
+            )
+        )
+
+    def warm_offices(self, calendar, days, settings_options):
+        factory = APIRequestFactory()
+        today = timezone.localtime().date()
+        rendered = 0
+        failed = 0
+        started = time.perf_counter()
+        for offset in range(days):
+            date = today + timedelta(days=offset)
+            for path in OFFICE_PATHS:
+                path = path.format(date.year, date.month, date.day)
+                match = resolve(path)
+                for query in settings_options:
+                    if calendar != DEFAULT_CALENDAR:
+                        query = "&".join(part for part in (query, "calendar={}".format(calendar)) if part)
+                    try:
+                        response = match.func(factory.get("{}?{}".format(path, query)), *match.args, **match.kwargs)
+                        # the offices are cached as rendered responses, the readings are rendered here
+                        if hasattr(response, "render"):
+                            response.render()
+                    except Exception as exception:
+                        failed += 1
+                        self.stderr.write("{}?{}: {!r}".format(path, query, exception))
+                        continue
+                    if response.status_code == 200:
+                        rendered += 1
+                    else:
+                        failed += 1
+                        self.stderr.write("{}?{}: status {}".format(path, query, response.status_code))
+        self.stdout.write(
+            "{} offices for {} days: {} rendered, {} failed, {:.2f}s".format(
+                calendar, days, rendered, failed, time.perf_counter() - started
+            )
+        )
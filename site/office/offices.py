@@ -4,7 +4,7 @@ from django.urls import reverse
 from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
 
-from office.models import HolyDayOfficeDay, StandardOfficeDay, ThirtyDayPsalterDay
+from office.lectionary import get_lectionary
 from office.utils import passage_to_citation
 
 
@@ -16,16 +16,14 @@ class Office(object):
         return "{dt:%A} {dt:%B} {dt.day}, {dt.year}".format(dt=self.date.date)
 
     def __init__(self, date):
-        from churchcal.calculations import get_calendar_date
+        from churchcal.calculations import BaseCalendarDate, get_calendar_date
 
-        self.date = get_calendar_date(date)
+        # a day that has already been looked up, e.g. from a ``ChurchYearRange``, is used as it is
+        self.date = date if isinstance(date, BaseCalendarDate) else get_calendar_date(date)
 
-        try:
-            self.office_readings = HolyDayOfficeDay.objects.get(commemoration=self.date.primary)
-        except HolyDayOfficeDay.DoesNotExist:
-            self.office_readings = StandardOfficeDay.objects.get(month=self.date.date.month, day=self.date.date.day)
-
-        self.thirty_day_psalter_day = ThirtyDayPsalterDay.objects.get(day=self.date.date.day)
+        lectionary = get_lectionary()
+        self.office_readings = lectionary.office_day(self.date)
+        self.thirty_day_psalter_day = lectionary.psalter_day(self.date.date.day)
 
         primary_feast_name = (
             self.date.primary_evening.name
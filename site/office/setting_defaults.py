@@ -0,0 +1,82 @@
+"""
+Office settings from the query string, checked against the ``Setting``s and ``SettingOption``s kept in memory.
+
+Each worker loads every setting with its options once (``get_setting_defaults``) instead of on every office request,
+and reloads them when a setting or option is saved or deleted (see ``office.signals``). A value that is not one of a
+setting's options is replaced with the setting's default, so every request maps onto one of a known set of
+``SettingsKey``s that can be used in cache keys.
+"""
+import hashlib
+import time
+
+from django.db.models import Prefetch
+
+from churchcal.local_cache import local_cache
+from office.models import Setting, SettingOption
+
+# the name the settings' generation is kept under, next to the calendars' generations
+SETTINGS_GENERATION = "office_settings"
+SETTINGS_TIMEOUT = 60 * 60 * 12
+
+_defaults = None
+_defaults_generation = None
+_defaults_loaded_at = None
+
+
+class SettingsKey(tuple):
+    """
+    The canonical, hashable form of an office's settings: ``(name, value)`` for every setting, sorted by name, and the
+    sorted primary keys of the extra collects.
+    """
+
+    def __new__(cls, settings, extra_collect_ids=()):
+        return super().__new__(
+            cls, (tuple(sorted(settings.items())), tuple(sorted(str(pk) for pk in extra_collect_ids)))
+        )
+
+    @property
+    def digest(self):
+        # short enough for memcached keys
+        return hashlib.sha1(repr(tuple(self)).encode("utf-8")).hexdigest()
+
+
+class SettingDefaults(object):
+    def __init__(self, settings):
+        # settings are in (site, setting type, order) order; a later setting with the same name sets the default, as
+        # it always has, and either setting's options are accepted
+        self.defaults = {}
+        self.options = {}
+        for setting in settings:
+            if not setting.options:
+                continue
+            self.defaults[setting.name] = setting.options[0].value
+            self.options.setdefault(setting.name, set()).update(option.value for option in setting.options)
+
+    @classmethod
+    def load(cls):
+        return cls(
+            Setting.objects.order_by("site", "setting_type", "order").prefetch_related(
+                Prefetch("settingoption_set", queryset=SettingOption.objects.order_by("order"), to_attr="options")
+            )
+        )
+
+    def normalize(self, query_params):
+        # every setting, with the requested value where it is one of the setting's options and the default otherwise
+        settings = self.defaults.copy()
+        for name, options in self.options.items():
+            value = query_params.get(name)
+            if value in options:
+                settings[name] = value
+        return settings
+
+
+def get_setting_defaults():
+    # reloaded when this worker notices that the settings' generation changed, or after SETTINGS_TIMEOUT
+    global _defaults, _defaults_generation, _defaults_loaded_at
+    generation = local_cache.generation(SETTINGS_GENERATION)
+    now = time.monotonic()
+    if _defaults is None or _defaults_generation != generation or now - _defaults_loaded_at > SETTINGS_TIMEOUT:
+        _defaults = SettingDefaults.load()
+        _defaults_generation = generation
+        _defaults_loaded_at = now
+    return _defaults
@@ -0,0 +1,50 @@
+"""
+Reloads the in-memory lectionary (see ``office.lectionary``) and settings (see ``office.setting_defaults``) when their
+data changes, and expires the cached office responses (see ``office.api.response_cache``) when the Scripture or psalter
+texts they show change.
+"""
+from django.db.models.signals import post_delete, post_save
+
+from churchcal.signals import bump_generations
+from office.api.response_cache import TEXTS_GENERATION
+from office.lectionary import LECTIONARY_GENERATION
+from office.models import HolyDayOfficeDay, Scripture, Setting, SettingOption, StandardOfficeDay, ThirtyDayPsalterDay
+from office.setting_defaults import SETTINGS_GENERATION
+from psalter.models import Psalm, PsalmVerse
+
+LECTIONARY_MODELS = (HolyDayOfficeDay, StandardOfficeDay, ThirtyDayPsalterDay)
+SETTINGS_MODELS = (Setting, SettingOption)
+TEXTS_MODELS = (Scripture, Psalm, PsalmVerse)
+
+
+def lectionary_changed(sender, instance, **kwargs):
+    bump_generations([LECTIONARY_GENERATION])
+
+
+def settings_changed(sender, instance, **kwargs):
+    bump_generations([SETTINGS_GENERATION])
+
+
+def texts_changed(sender, instance, **kwargs):
+    bump_generations([TEXTS_GENERATION])
+
+
+for model in LECTIONARY_MODELS:
+    post_save.connect(
+        lectionary_changed, sender=model, dispatch_uid="office_invalidate_lectionary_{}".format(model.__name__)
+    )
+    post_delete.connect(
+        lectionary_changed, sender=model, dispatch_uid="office_invalidate_lectionary_{}".format(model.__name__)
+    )
+
+for model in SETTINGS_MODELS:
+    post_save.connect(
+        settings_changed, sender=model, dispatch_uid="office_invalidate_settings_{}".format(model.__name__)
+    )
+    post_delete.connect(
+        settings_changed, sender=model, dispatch_uid="office_invalidate_settings_{}".format(model.__name__)
+    )
+
+for model in TEXTS_MODELS:
+    post_save.connect(texts_changed, sender=model, dispatch_uid="office_invalidate_texts_{}".format(model.__name__))
+    post_delete.connect(texts_changed, sender=model, dispatch_uid="office_invalidate_texts_{}".format(model.__name__))
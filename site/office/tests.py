@@ -1,3 +1,131 @@
-from django.test import TestCase
+import datetime
+import json
+from types import SimpleNamespace
+from uuid import uuid4
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIRequestFactory
+
+from churchcal.local_cache import local_cache
+from churchcal.records import ResolvedCommemoration
+from office.api.response_cache import cached_office_response
+from office.api.text_store import process_row
+from office.api.views.index import OfficeAPIView
+from office.lectionary import Lectionary
+from office.models import Scripture
+
+
+def commemoration_record(name):
+    uuid = uuid4()
+    return SimpleNamespace(
+        uuid=uuid,
+        pk=uuid,
+        name=name,
+        rank=SimpleNamespace(name="HOLY_DAY", formatted_name="Holy Day"),
+        alternate_color=None,
+        alternate_color_2=None,
+        collect_1=None,
+        collect_2=None,
+        collect_eve=None,
+    )
+
+
+class LectionaryTestCase(SimpleTestCase):
+    def setUp(self):
+        self.record = commemoration_record("Saint Andrew the Apostle")
+        self.holy_day = SimpleNamespace(commemoration_id=self.record.uuid)
+        self.standard_day = SimpleNamespace(month=11, day=30)
+        self.lectionary = Lectionary([self.holy_day], [self.standard_day], [])
+
+    def office_day(self, primary):
+        calendar_date = SimpleNamespace(primary=primary, date=datetime.date(2019, 11, 30))
+        return self.lectionary.office_day(calendar_date)
+
+    def test_primary_uses_its_holy_day(self):
+        self.assertIs(self.office_day(ResolvedCommemoration(self.record)), self.holy_day)
+
+    def test_transferred_primary_uses_its_holy_day(self):
+        primary = ResolvedCommemoration(self.record)
+        primary.transferred = True
+        self.assertIs(self.office_day(primary), self.holy_day)
+
+    def test_copied_primary_uses_the_day_of_the_year(self):
+        # an alternate Sunday or an eve is a copy, which has no primary key, so it never had the holy day's readings
+        primary = ResolvedCommemoration(self.record).copy()
+        self.assertIsNone(primary.pk)
+        self.assertIs(self.office_day(primary), self.standard_day)
+
+    def test_unsaved_primary_uses_the_day_of_the_year(self):
+        primary = SimpleNamespace(uuid=self.record.uuid, pk=None)
+        self.assertIs(self.office_day(primary), self.standard_day)
+
+
+class CachedOfficeView(OfficeAPIView):
+    renders = 0
+
+    def get(self, request, year, month, day):
+        return cached_office_response(request, "TestOffice", year, month, day, self.render)
+
+    @classmethod
+    def render(cls):
+        cls.renders += 1
+        return {"name": "Test Office", "renders": cls.renders}
+
+
+class ResponseCacheTestCase(TestCase):
+    fixtures = ["bench_calendar"]
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        CachedOfficeView.renders = 0
+
+    @staticmethod
+    def get(data=None, **kwargs):
+        request = APIRequestFactory().get("/api/v1/office/test_office/2024-6-1", data, **kwargs)
+        response = CachedOfficeView.as_view()(request, year="2024", month="6", day="1")
+        return response.render() if hasattr(response, "render") else response
+
+    def test_office_is_rendered_once(self):
+        first = self.get()
+        second = self.get()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["Content-Type"], "application/json")
+        self.assertEqual(json.loads(first.content), {"name": "Test Office", "renders": 1})
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(CachedOfficeView.renders, 1)
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.get()["ETag"]
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+    def test_cached_office_keeps_content_negotiation(self):
+        self.get()
+        response = self.get({"format": "api"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/html"))
+        self.assertIn("Accept", response["Vary"])
+        self.assertEqual(CachedOfficeView.renders, 1)
+
+    def test_editing_scripture_renders_the_office_again(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            Scripture.objects.create(passage="John 1:1", esv="In the beginning was the Word")
+        self.assertEqual(json.loads(self.get().content)["renders"], 2)
+
+    def test_unknown_calendar_is_not_found(self):
+        self.assertEqual(self.get({"calendar": "nope"}).status_code, 404)
+
+
+class ProcessRowTestCase(SimpleTestCase):
+    def test_extra_space_before(self):
+        self.assertEqual(process_row(["Amen."]), {"content": "Amen.", "indented": False})
+        self.assertIs(process_row(["Amen.", "", "", "true"])["extra_space_before"], True)
+        self.assertIs(process_row(["Amen.", "", "", "True"])["extra_space_before"], True)
+        self.assertIs(process_row(["Amen.", "", "", "false"])["extra_space_before"], False)
+        self.assertIs(process_row(["Amen.", "", "", ""])["extra_space_before"], False)
@@ -14,6 +14,7 @@ from meta.views import Meta
 
 from churchcal.calculations import ChurchYear
 from churchcal.models import Season, SanctoraleCommemoration, MassReading
+from churchcal.year_range import ChurchYearRange
 from office.compline import Compline
 from office.evening_prayer import EveningPrayer
 from office.family_close_of_day import FamilyCloseOfDay
@@ -206,7 +207,7 @@ def signup_thank_you(request):
 def church_year(request, start_year, end_year=None, family=False):
     church_year = ChurchYear(start_year)
     months = []
-    for date_str, date in church_year.dates.items():
+    for date in church_year:
         month = date.date.strftime("%b %Y")
         if month not in months:
             months.append(month)
@@ -366,11 +367,10 @@ def calendar(request):
     cal.add("prodid", "-//Daily Office//mxm.dk//")
     cal.add("version", "2.0")
 
-    years = range(FIRST_BEGINNING_YEAR, LAST_BEGINNING_YEAR + 1)
-    for year in years:
-        year = ChurchYear(year)
-        for datestring, calendardate in year.dates.items():
-            office = Office(datestring)
+    years = ChurchYearRange.from_cache(FIRST_BEGINNING_YEAR, LAST_BEGINNING_YEAR)
+    for year in years.years:
+        for calendardate in year:
+            office = Office(calendardate)
             event = Event()
             event.add("SUMMARY", calendardate.primary.name)
             event.add("DTSTART", date(calendardate.date.year, calendardate.date.month, calendardate.date.day))
@@ -5,7 +5,7 @@ from rest_framework import permissions
 from rest_framework import routers
 
 from bible.api.BiblePassageView import BiblePassageView
-from churchcal.api.views import DayView, MonthView, YearView
+from churchcal.api.views import CacheStatsView, DayView, FactsView, MonthView, RangeView, YearView
 from office.api.views.index import (
     MorningPrayerView,
     AvailableSettings,
@@ -58,6 +58,9 @@ urlpatterns = [
     path(r"api/v1/litany", GreatLitanyView.as_view(), name="litany"),
     path(r"api/v1/calendar/<int:year>-<int:month>", MonthView.as_view(), name="month_view"),
     path(r"api/v1/calendar/<int:year>", YearView.as_view(), name="month_view"),
+    path(r"api/v1/calendar/cache_stats", CacheStatsView.as_view(), name="cache_stats_view"),
+    path(r"api/v1/calendar/facts/<int:start>/<int:end>", FactsView.as_view(), name="facts_view"),
+    path(r"api/v1/calendar/<str:start>/<str:end>", RangeView.as_view(), name="range_view"),
     path(
         r"api/v1/office/morning_prayer/<int:year>-<int:month>-<int:day>",
         MorningPrayerView.as_view(),
@@ -0,0 +1,23 @@
+"""
+Settings for benchmarking the calendar without Postgres or memcached:
+
+    python manage.py bench_churchcal --fixture --settings=website.settings_bench
+
+The database is an in-memory SQLite database, which ``bench_churchcal --fixture`` migrates and fills with the bundled
+fixture calendar (churchcal/fixtures/bench_calendar.json).
+"""
+from website.settings import *  # noqa: F401, F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    }
+}
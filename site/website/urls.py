@@ -27,7 +27,7 @@ from django.utils import timezone
 from django.views.generic import TemplateView
 from django_distill import distill_path
 
-from churchcal.calculations import ChurchYear
+from churchcal.year_range import ChurchYearRange
 from office import views as office_views
 from standrew import views as standrew_views
 from standrew.views import MovieCandidateCreate, MovieBallotCreate
@@ -52,11 +52,6 @@ def get_none():
 
 
 def get_days():
-    date_list = []
-    for year in get_church_years():
-        church_year = ChurchYear(year["start_year"])
-        for day in church_year:
-            date_list.append(day.date)
     now = timezone.now()
     if settings.DEBUG_DATES:
         date_list = [
@@ -67,11 +62,8 @@ def get_days():
             now + timedelta(days=2),
         ]
     else:
-        date_list = []
-        for year in get_church_years():
-            church_year = ChurchYear(year["start_year"])
-            for day in church_year:
-                date_list.append(day.date)
+        years = [year["start_year"] for year in get_church_years()]
+        date_list = ChurchYearRange(years[0], years[-1]).iter_dates()
 
     for date in date_list:
         yield {"year": date.year, "month": date.month, "day": date.day}